@@ -1,12 +1,66 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
 import pandas as pd
 import numpy as np
-from dataclasses import dataclass
-from typing import List, Optional
-from datetime import date
+from typing import Annotated, List, Literal, Optional
+from datetime import date, datetime, timezone
 
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, field_validator
+from starlette.routing import Match
+
+from backtest_engine import (
+    PairWorkspace,
+    Trade,
+    metrics_summary,
+    results_frame,
+    run_pair_backtest,
+    sweep_pair,
+    trades_frame,
+)
+from downsample import DEFAULT_MAX_POINTS, downsample_indices, window_slice
+from hedge import HEDGE_WINDOW, hedge_ratio, latest_beta, static_betas
+from jobs import FINISHED, JobManager, JobQueueFull
+from metrics import (
+    IN_FLIGHT,
+    METRICS_ENABLED,
+    REQUEST_SECONDS,
+    REQUESTS,
+    finish_profile,
+    profiling,
+    render as render_metrics,
+    sample_lines,
+    span,
+    start_profile,
+    timed,
+)
+from pair_views import VIEW_ENTRY_Z, VIEW_EXIT_Z, VIEW_LOOKBACK, VIEWS_DIR, PairViews, load_views, views_version
+from portfolio import portfolio_backtest
+from price_store import load_prices as load_price_store, open_store, store_version
+from result_cache import ResultCache, cache_key
+from significance import DEFAULT_CONFIDENCE, DEFAULT_RESAMPLES, MAX_RESAMPLES, pair_significance
+from signals import SIGNAL_ENTRY_Z, SIGNAL_EXIT_Z, SIGNAL_LOOKBACK, SignalEngine, replay_feed
+from stability import (
+    MIN_WINDOW,
+    PVALUE_THRESHOLD,
+    STABILITY_WINDOW,
+    adf_maxlag,
+    pair_stability,
+    pairs_stability,
+    stability_summary,
+)
 
 # =============================
 # CONFIG & GLOBAL STATE
@@ -15,41 +69,68 @@ from pydantic import BaseModel
 PRICES_CSV = "prices_daily_adj_close.csv"
 COINTEGRATION_CSV = "cointegration_good_pairs.csv"
 ANNUAL_TRADING_DAYS = 252
+DATA_WATCH_SECONDS = float(os.environ.get("DATA_WATCH_SECONDS", 5))  # 0 = reload only on request
+# build the first snapshot in the background at startup; off = on the first request
+DATA_PRELOAD = os.environ.get("DATA_PRELOAD", "1") != "0"
+
+
+def data_signature():
+    """
+    (mtime_ns, size) of the data files plus the price store's and the
+    precomputed pair views' version counters; changes whenever any of them
+    is rewritten, so every worker picks up what another process published.
+    """
+    sig = []
+    for path in (PRICES_CSV, COINTEGRATION_CSV):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            raise RuntimeError(f"Could not find {path}. Run stat_arb_pairs.py first.")
+        sig.append((st.st_mtime_ns, st.st_size))
+    sig.append(views_version(VIEWS_DIR))
+    sig.append(store_version())
+    return tuple(sig)
+
+
+def load_data():
+    """
+    (prices, coint, store version). Prices are a read-only view over the
+    memory-mapped store, so every worker process shares one copy of the
+    matrix through the page cache.
+    """
+    try:
+        store = open_store(PRICES_CSV)
+    except FileNotFoundError:
+        raise RuntimeError(f"Could not find {PRICES_CSV}. Run stat_arb_pairs.py first.")
+    prices = store.frame()
+
+    try:
+        coint = pd.read_csv(COINTEGRATION_CSV)
+    except FileNotFoundError:
+        raise RuntimeError(f"Could not find {COINTEGRATION_CSV}. Run stat_arb_pairs.py first.")
 
-try:
-    PRICES = pd.read_csv(PRICES_CSV, index_col=0, parse_dates=True)
-except FileNotFoundError:
-    raise RuntimeError(f"Could not find {PRICES_CSV}. Run stat_arb_pairs.py first.")
+    return prices, coint, store.version
 
-try:
-    COINT = pd.read_csv(COINTEGRATION_CSV)
-except FileNotFoundError:
-    raise RuntimeError(f"Could not find {COINTEGRATION_CSV}. Run stat_arb_pairs.py first.")
+
+def data_version(signature) -> str:
+    return hashlib.sha1(repr(signature).encode()).hexdigest()[:16]
+
+
+RESULT_CACHE = ResultCache()
 
 
 # =============================
 # QUANT CORE
 # =============================
 
-@dataclass
-class Trade:
-    direction: str
-    entry_date: pd.Timestamp
-    exit_date: Optional[pd.Timestamp]
-    entry_z: float
-    exit_z: Optional[float]
-    pnl: float
-    return_pct: float
-    bars_held: int
-
-
 def compute_hedge_ratio(s1: pd.Series, s2: pd.Series) -> float:
-    x = s2.values
-    y = s1.values
-    beta = np.polyfit(x, y, 1)[0]
-    return float(beta)
+    # same OLS slope as the precomputed pair views (static_betas, NaN-aware)
+    y = s1.to_numpy(dtype=float)[:, None]
+    x = s2.to_numpy(dtype=float)[:, None]
+    return float(static_betas(y, x)[0])
 
 
+@timed("compute_half_life")
 def compute_half_life(spread: pd.Series) -> float:
     spread = spread.dropna()
     if len(spread) < 2:
@@ -73,189 +154,866 @@ def compute_half_life(spread: pd.Series) -> float:
     return float(halflife)
 
 
-def backtest_pair(
+@timed("compute_half_lives")
+def compute_half_lives(spreads: np.ndarray) -> np.ndarray:
+    """
+    Batched compute_half_life over the columns of a (bars x pairs) spread
+    matrix: the AR(1) slope of dy on lagged y (with intercept) is the
+    closed-form cov / var per column. Columns with gaps or a degenerate
+    lag variance go through compute_half_life instead.
+    """
+    out = np.full(spreads.shape[1], np.nan)
+    if spreads.shape[0] < 2:
+        return out
+
+    x = spreads[:-1]
+    dy = np.diff(spreads, axis=0)
+    xc = x - x.mean(axis=0)
+    sxx = np.einsum("ij,ij->j", xc, xc)
+    sxy = np.einsum("ij,ij->j", xc, dy - dy.mean(axis=0))
+    fast = ~np.isnan(spreads).any(axis=0) & (sxx > 0)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        beta = sxy / sxx
+        halflife = -np.log(2) / beta
+    ok = fast & (beta < 0)
+    out[ok] = halflife[ok]
+
+    for k in np.flatnonzero(~fast):
+        out[k] = compute_half_life(pd.Series(spreads[:, k]))
+    return out
+
+
+def build_pair_table(prices: pd.DataFrame, coint: pd.DataFrame) -> list:
+    """
+    Pairs table for /api/pairs: one correlation matrix over the needed
+    tickers and one batched half-life regression over all spreads.
+    """
+    if coint.empty:
+        return []
+
+    rows = coint[coint["ticker1"].isin(prices.columns) & coint["ticker2"].isin(prices.columns)]
+    if rows.empty:
+        return []
+
+    t1s = rows["ticker1"].to_numpy()
+    t2s = rows["ticker2"].to_numpy()
+    needed = list(dict.fromkeys(list(t1s) + list(t2s)))
+    sub = prices[needed].astype(np.float64, copy=False)  # float32 stores
+
+    with span("build_pair_table.correlation"):
+        corr_matrix = sub.pct_change().corr()
+    pos = {t: k for k, t in enumerate(needed)}
+    i1 = np.array([pos[t] for t in t1s])
+    i2 = np.array([pos[t] for t in t2s])
+    corrs = corr_matrix.to_numpy()[i1, i2]
+
+    values = sub.to_numpy(dtype=float)
+    halflives = compute_half_lives(values[:, i1] - values[:, i2])
+
+    pvalues = rows["pvalue"].to_numpy(dtype=float)
+    scores = rows["score"].to_numpy(dtype=float)
+
+    pairs = []
+    for t1, t2, pvalue, score, corr, halflife in zip(t1s, t2s, pvalues, scores, corrs, halflives):
+        corr = None if np.isnan(corr) else float(corr)
+        halflife = None if np.isnan(halflife) else float(halflife)
+        status = "Strong" if pvalue < 0.02 else "Moderate"
+
+        tags = []
+        if corr is not None and abs(corr) > 0.9:
+            tags.append("Highly Correlated")
+        if halflife and halflife < 20:
+            tags.append("Fast Reversion")
+        elif halflife and halflife < 60:
+            tags.append("Slow Reversion")
+
+        pairs.append(
+            {
+                "id": f"{t1}-{t2}",
+                "ticker1": t1,
+                "ticker2": t2,
+                "pvalue": float(pvalue),
+                "score": float(score),
+                "correlation": corr,
+                "half_life": halflife,
+                "status": status,
+                "tags": tags,
+            }
+        )
+
+    return sorted(pairs, key=lambda x: x["pvalue"])
+
+
+# =============================
+# DATA SNAPSHOTS
+# =============================
+
+@dataclass(frozen=True)
+class DataSnapshot:
+    """Everything one request reads; never mutated once published."""
+    version: str
+    signature: tuple
+    prices: pd.DataFrame
+    coint: pd.DataFrame
+    pairs: list  # /api/pairs table, built with the snapshot
+    loaded_at: float
+    store_version: Optional[int] = None  # price store version the prices map
+    views: Optional[PairViews] = None  # default /api/pair payloads, if built for this store
+
+
+def build_snapshot() -> DataSnapshot:
+    # if the files change while we read them the signature is already stale,
+    # so the next check sees a difference and builds again
+    sig = data_signature()
+    prices, coint, mapped = load_data()
+    # the version actually mapped, in case this process (or another) just
+    # converted the CSV; workers on the same files agree on data_version
+    sig = sig[:-1] + (mapped,)
+    return DataSnapshot(
+        version=data_version(sig),
+        signature=sig,
+        prices=prices,
+        coint=coint,
+        pairs=build_pair_table(prices, coint),
+        loaded_at=time.time(),
+        store_version=mapped,
+        views=load_views(VIEWS_DIR, mapped, prices.index),
+    )
+
+
+class SnapshotHolder:
+    """
+    Owns the current DataSnapshot. Requests take the reference once and use
+    it to the end, so a reload never changes data under a running request.
+    Reloads build the next snapshot on a background thread and publish it
+    with one assignment. A failed build keeps the old snapshot and records
+    the error. watch() polls the data files and reloads when they change.
+
+    Nothing is loaded at import: the first current() builds the snapshot,
+    or waits for a startup build already under way (see lifespan).
+    """
+
+    def __init__(self):
+        self._current: Optional[DataSnapshot] = None
+        self._lock = threading.Lock()
+        self._first_lock = threading.Lock()
+        self._builder: Optional[threading.Thread] = None
+        self._watcher: Optional[threading.Thread] = None
+        self.last_error: Optional[str] = None
+        self.reloads = 0
+
+    def current(self) -> DataSnapshot:
+        snap = self._current
+        return snap if snap is not None else self._first_load()
+
+    def peek(self) -> Optional[DataSnapshot]:
+        """The published snapshot, or None before the first load; never builds."""
+        return self._current
+
+    def _first_load(self) -> DataSnapshot:
+        self.wait()
+        with self._first_lock:  # concurrent first requests build once
+            if self._current is None:
+                self.load()  # raises RuntimeError when the data files are missing
+        return self._current
+
+    def load(self) -> DataSnapshot:
+        """Build and publish synchronously (startup)."""
+        self._publish(build_snapshot())
+        return self._current
+
+    def _publish(self, snap: DataSnapshot):
+        self._current = snap
+        RESULT_CACHE.set_version(snap.version)
+        self.reloads += 1
+
+    def reload(self, force: bool = False) -> str:
+        """Start a background rebuild; returns started / unchanged / already_running / failed."""
+        with self._lock:
+            if self._builder is not None and self._builder.is_alive():
+                return "already_running"
+            if not force and self._current is not None:
+                try:
+                    if data_signature() == self._current.signature:
+                        return "unchanged"
+                except RuntimeError as e:
+                    self.last_error = str(e)
+                    return "failed"
+            self._builder = threading.Thread(target=self._build, name="data-reload", daemon=True)
+            self._builder.start()
+            return "started"
+
+    def _build(self):
+        try:
+            snap = build_snapshot()
+        except Exception as e:
+            self.last_error = f"{type(e).__name__}: {e}"
+            return
+        self.last_error = None
+        self._publish(snap)
+
+    def wait(self, timeout: float = None):
+        builder = self._builder
+        if builder is not None:
+            builder.join(timeout)
+
+    def watch(self, interval: float):
+        if interval <= 0 or self._watcher is not None:
+            return
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                self.reload()
+
+        self._watcher = threading.Thread(target=loop, name="data-watch", daemon=True)
+        self._watcher.start()
+
+    def status(self) -> dict:
+        snap = self._current
+        return {
+            "data_version": snap.version if snap else None,
+            "store_version": snap.store_version if snap else None,
+            "views_version": snap.views.version if snap and snap.views is not None else None,
+            "pid": os.getpid(),  # which worker answered
+            "loaded_at": snap.loaded_at if snap else None,
+            "num_tickers": snap.prices.shape[1] if snap else 0,
+            "num_bars": snap.prices.shape[0] if snap else 0,
+            "num_pairs": len(snap.pairs) if snap else 0,
+            "reloading": self._builder is not None and self._builder.is_alive(),
+            "reloads": self.reloads,
+            "last_error": self.last_error,
+            "watch_seconds": DATA_WATCH_SECONDS,
+        }
+
+
+SNAPSHOTS = SnapshotHolder()
+
+
+def current_snapshot(request: Request) -> DataSnapshot:
+    """Dependency: pin the request to the current snapshot and tag its response."""
+    try:
+        snap = SNAPSHOTS.current()
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    request.state.data_version = snap.version
+    return snap
+
+
+def render_json(payload) -> bytes:
+    with span("serialize"):
+        return JSONResponse(jsonable_encoder(payload)).body
+
+
+def cached_response(
+    request: Request, snap: DataSnapshot, kind: str, params: dict, compute
+) -> Response:
+    """
+    Serve `compute()` through RESULT_CACHE. The ETag is the cache key, which
+    already covers the snapshot's data version, so a matching If-None-Match
+    is answered with 304 before anything is looked up or computed.
+    Profiled requests (?profile=1) always compute, so the breakdown shows
+    the real work, and leave the cache untouched.
+    """
+    key = cache_key(kind, params, snap.version)
+    etag = f'"{key}"'
+    headers = {"ETag": etag}
+
+    if profiling():
+        headers["X-Cache"] = "BYPASS"
+        return Response(content=render_json(compute()), media_type="application/json", headers=headers)
+
+    if etag in request.headers.get("if-none-match", ""):
+        RESULT_CACHE.record_not_modified()
+        return Response(status_code=304, headers=headers)
+
+    with span("cache.lookup"):
+        body = RESULT_CACHE.get(key)
+    if body is None:
+        body = render_json(compute())
+        RESULT_CACHE.put(key, body)
+        headers["X-Cache"] = "MISS"
+    else:
+        headers["X-Cache"] = "HIT"
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def slice_pair(
     prices: pd.DataFrame,
     t1: str,
     t2: str,
-    start: Optional[pd.Timestamp] = None,
-    end: Optional[pd.Timestamp] = None,
-    lookback: int = 60,
-    entry_z: float = 2.0,
-    exit_z: float = 0.5,
+    start: Optional[pd.Timestamp],
+    end: Optional[pd.Timestamp],
+    lookback: int,
 ):
+    """
+    The two columns for start <= t <= end as Series views on `prices`, with
+    no copy: rows by binary search on the sorted index, columns straight off
+    the frame (for the snapshot, the store's memory map). A float32 store is
+    widened to float64 here, two columns at a time.
+    """
     if t1 not in prices.columns or t2 not in prices.columns:
         raise ValueError(f"Tickers {t1} or {t2} not in price data.")
 
-    data = prices.copy()
-    if start is not None:
-        data = data[data.index >= start]
-    if end is not None:
-        data = data[data.index <= end]
-
-    if data.shape[0] < lookback + 10:
+    rows = window_slice(prices.index, start, end)
+    if rows.stop - rows.start < lookback + 10:
         raise ValueError("Not enough data for this date range and lookback.")
 
-    s1 = data[t1]
-    s2 = data[t2]
-    beta = compute_hedge_ratio(s1, s2)
-
-    spread = s1 - beta * s2
-    spread_mean = spread.rolling(lookback).mean()
-    spread_std = spread.rolling(lookback).std()
-    zscore = (spread - spread_mean) / spread_std
-
-    ret1 = s1.pct_change()
-    ret2 = s2.pct_change()
-
-    pos = 0
-    pos_history = []
-    trade_list: List[Trade] = []
-    current_trade_index = None
-    trade_entry_z = None
-    trade_entry_date = None
-    strat_ret = []
-
-    dates = data.index
-
-    for i in range(len(dates)):
-        d = dates[i]
-        if i == 0:
-            pos_history.append(0)
-            strat_ret.append(0.0)
-            continue
+    s1, s2 = prices[t1].iloc[rows], prices[t2].iloc[rows]
+    return s1.astype(np.float64, copy=False), s2.astype(np.float64, copy=False)
 
-        z = zscore.iloc[i]
-        prev_pos = pos
-        pos = prev_pos
-
-        if not np.isnan(z):
-            if pos == 0:
-                if z > entry_z:
-                    pos = -1
-                    trade_entry_z = float(z)
-                    trade_entry_date = d
-                    current_trade_index = len(strat_ret)
-                elif z < -entry_z:
-                    pos = 1
-                    trade_entry_z = float(z)
-                    trade_entry_date = d
-                    current_trade_index = len(strat_ret)
-            else:
-                if abs(z) < exit_z:
-                    trade_pnl = float(np.nansum(strat_ret[current_trade_index:]))
-                    trade_ret_pct = trade_pnl
-                    bars_held = i - current_trade_index
-                    trade = Trade(
-                        direction="long_spread" if prev_pos == 1 else "short_spread",
-                        entry_date=trade_entry_date,
-                        exit_date=d,
-                        entry_z=trade_entry_z,
-                        exit_z=float(z),
-                        pnl=trade_pnl,
-                        return_pct=trade_ret_pct,
-                        bars_held=bars_held,
-                    )
-                    trade_list.append(trade)
-                    pos = 0
-                    current_trade_index = None
-                    trade_entry_z = None
-                    trade_entry_date = None
-
-        r1 = ret1.iloc[i]
-        r2 = ret2.iloc[i]
-        if np.isnan(r1) or np.isnan(r2):
-            r_strategy = 0.0
-        else:
-            base = r1 - beta * r2
-            r_strategy = pos * base
-
-        strat_ret.append(float(r_strategy))
-        pos_history.append(pos)
-
-    strat_ret_series = pd.Series(strat_ret, index=dates)
-    pos_series = pd.Series(pos_history, index=dates)
-    equity = (1 + strat_ret_series.fillna(0)).cumprod()
-
-    daily_ret = strat_ret_series.replace([np.inf, -np.inf], np.nan).dropna()
-    if len(daily_ret) > 1:
-        mean_ret = daily_ret.mean()
-        vol_ret = daily_ret.std()
-        if vol_ret != 0:
-            sharpe = np.sqrt(ANNUAL_TRADING_DAYS) * mean_ret / vol_ret
-        else:
-            sharpe = np.nan
-        cum_return = equity.iloc[-1] - 1.0
-        ann_return = (
-            (1 + cum_return) ** (ANNUAL_TRADING_DAYS / len(daily_ret)) - 1
-            if len(daily_ret) > 0
-            else np.nan
-        )
-        rolling_max = equity.cummax()
-        drawdown = equity / rolling_max - 1.0
-        max_dd = drawdown.min()
-    else:
-        sharpe = np.nan
-        cum_return = 0.0
-        ann_return = np.nan
-        max_dd = np.nan
-
-    if trade_list:
-        wins = [1 for t in trade_list if t.return_pct > 0]
-        win_rate = len(wins) / len(trade_list)
-        avg_bars = float(np.mean([t.bars_held for t in trade_list]))
-    else:
-        win_rate = np.nan
-        avg_bars = np.nan
 
+def resolve_hedge(s1: pd.Series, s2: pd.Series, hedge_method: str, hedge_window: int):
+    """Float beta for "static", per-bar beta array for the rolling methods."""
+    if hedge_method == "static":
+        return compute_hedge_ratio(s1, s2)
+    return hedge_ratio(s1.to_numpy(dtype=float), s2.to_numpy(dtype=float), hedge_method, hedge_window)
+
+
+_THREAD = threading.local()
+
+
+def thread_workspace() -> PairWorkspace:
+    """This thread's backtest buffers; request threads reuse them from one request to the next."""
+    workspace = getattr(_THREAD, "workspace", None)
+    if workspace is None:
+        workspace = _THREAD.workspace = PairWorkspace()
+    return workspace
+
+
+def backtest_pair(
+    prices: pd.DataFrame,
+    t1: str,
+    t2: str,
+    start: Optional[pd.Timestamp] = None,
+    end: Optional[pd.Timestamp] = None,
+    lookback: int = 60,
+    entry_z: float = 2.0,
+    exit_z: float = 0.5,
+    hedge_method: str = "static",
+    hedge_window: int = HEDGE_WINDOW,
+):
+    warmup = lookback + (hedge_window if hedge_method == "rolling_ols" else 0)
+    with span("backtest_pair.slice"):
+        s1, s2 = slice_pair(prices, t1, t2, start, end, warmup)
+    with span("backtest_pair.hedge"):
+        hedge = resolve_hedge(s1, s2, hedge_method, hedge_window)
+        beta = latest_beta(hedge)
+
+    bt = run_pair_backtest(
+        s1, s2, hedge, lookback, entry_z, exit_z, ANNUAL_TRADING_DAYS, workspace=thread_workspace()
+    )
     metrics = {
         "pair": f"{t1}/{t2}",
         "beta": beta,
         "lookback": lookback,
         "entry_z": entry_z,
         "exit_z": exit_z,
-        "cumulative_return": float(cum_return),
-        "annualized_return": float(ann_return),
-        "sharpe_ratio": float(sharpe),
-        "max_drawdown": float(max_dd),
-        "num_trades": len(trade_list),
-        "win_rate": float(win_rate) if not np.isnan(win_rate) else None,
-        "avg_bars_held": float(avg_bars) if not np.isnan(avg_bars) else None,
+        **metrics_summary(bt.stats),
+        "hedge_method": hedge_method,
     }
 
-    results_df = pd.DataFrame(
-        {
-            "equity": equity,
-            "strategy_return": strat_ret_series,
-            "position": pos_series,
-            "spread": spread,
-            "zscore": zscore,
-        }
-    )
+    with span("backtest_pair.frames"):
+        # copies: bt's arrays are this thread's workspace, reused by its next backtest
+        results_df = results_frame(bt)
+        if np.ndim(hedge):
+            results_df["hedge_ratio"] = hedge
+        trades_df = trades_frame(bt)
+
+    return metrics, results_df, trades_df, beta, results_df["spread"], results_df["zscore"]
+
+
+def sweep_backtest(
+    prices: pd.DataFrame,
+    t1: str,
+    t2: str,
+    lookbacks: List[int],
+    entry_zs: List[float],
+    exit_zs: List[float],
+    start: Optional[pd.Timestamp] = None,
+    end: Optional[pd.Timestamp] = None,
+    hedge_method: str = "static",
+    hedge_window: int = HEDGE_WINDOW,
+    progress=None,
+):
+    if min(lookbacks) < 2:
+        raise ValueError("lookback values must be >= 2.")
+
+    warmup = max(lookbacks) + (hedge_window if hedge_method == "rolling_ols" else 0)
+    s1, s2 = slice_pair(prices, t1, t2, start, end, warmup)
+    hedge = resolve_hedge(s1, s2, hedge_method, hedge_window)
+    with span("sweep.surface"):
+        surface = sweep_pair(
+            s1, s2, hedge, lookbacks, entry_zs, exit_zs, ANNUAL_TRADING_DAYS, progress=progress
+        )
+    return latest_beta(hedge), surface
+
+
+def select_portfolio_pairs(coint: pd.DataFrame, prices: pd.DataFrame, pair_ids, max_pairs):
+    """Explicit 'T1-T2' ids, or the cointegrated pairs in p-value order."""
+    if pair_ids:
+        pairs = []
+        for pair_id in pair_ids:
+            try:
+                t1, t2 = pair_id.split("-")
+            except ValueError:
+                raise ValueError(f"pair id '{pair_id}' must be like 'AAPL-MSFT'")
+            pairs.append((t1, t2))
+    else:
+        rows = coint.sort_values("pvalue")
+        rows = rows[rows["ticker1"].isin(prices.columns) & rows["ticker2"].isin(prices.columns)]
+        pairs = list(zip(rows["ticker1"], rows["ticker2"]))
+    if max_pairs is not None:
+        pairs = pairs[:max_pairs]
+    return list(dict.fromkeys(pairs))
+
+
+def json_float(value):
+    # numpy scalars -> Python, NaN -> None; everything else unchanged
+    if isinstance(value, (float, np.floating)):
+        return None if np.isnan(value) else float(value)
+    if isinstance(value, np.integer):
+        return int(value)
+    return value
 
-    trades_df = pd.DataFrame([t.__dict__ for t in trade_list])
 
-    return metrics, results_df, trades_df, beta, spread, zscore
+def nan_to_none(values: np.ndarray) -> list:
+    out = values.astype(object)
+    if values.dtype.kind == "f":
+        out[np.isnan(values)] = None
+    return out.tolist()
 
 
 # =============================
 # API MODELS
 # =============================
 
+HedgeMethod = Literal["static", "rolling_ols", "kalman"]
+
+
 class BacktestRequest(BaseModel):
     ticker1: str
     ticker2: str
     start_date: Optional[date] = None
     end_date: Optional[date] = None
-    lookback: int = 60
+    lookback: int = Field(60, ge=2)
+    entry_z: float = 2.0
+    exit_z: float = 0.5
+    hedge_method: HedgeMethod = "static"
+    hedge_window: int = Field(HEDGE_WINDOW, ge=2)
+
+
+class BacktestSweepRequest(BaseModel):
+    ticker1: str
+    ticker2: str
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    lookbacks: List[Annotated[int, Field(ge=2)]] = [60]
+    entry_zs: List[float] = [2.0]
+    exit_zs: List[float] = [0.5]
+    hedge_method: HedgeMethod = "static"
+    hedge_window: int = Field(HEDGE_WINDOW, ge=2)
+
+
+MAX_SWEEP_CELLS = 20_000
+
+
+class PortfolioBacktestRequest(BaseModel):
+    pairs: Optional[List[str]] = None  # "AAPL-MSFT" ids; default: all cointegrated pairs
+    max_pairs: Optional[int] = None
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    lookback: int = Field(60, ge=2)
+    entry_z: float = 2.0
+    exit_z: float = 0.5
+    weighting: Literal["equal", "capital"] = "equal"
+    hedge_method: HedgeMethod = "static"
+    hedge_window: int = Field(HEDGE_WINDOW, ge=2)
+
+
+class BacktestBatchRequest(BaseModel):
+    pairs: Optional[List[str]] = None  # "AAPL-MSFT" ids; default: all cointegrated pairs
+    max_pairs: Optional[int] = None
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    lookback: int = Field(60, ge=2)
+    entry_z: float = 2.0
+    exit_z: float = 0.5
+    hedge_method: HedgeMethod = "static"
+    hedge_window: int = Field(HEDGE_WINDOW, ge=2)
+
+
+MAX_BATCH_PAIRS = 5000
+
+
+class SignificanceRequest(BaseModel):
+    ticker1: str
+    ticker2: str
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    lookback: int = Field(60, ge=2)
     entry_z: float = 2.0
     exit_z: float = 0.5
+    hedge_method: HedgeMethod = "static"
+    hedge_window: int = Field(HEDGE_WINDOW, ge=2)
+    methods: List[Literal["bootstrap", "permutation"]] = ["bootstrap", "permutation"]
+    resamples: int = Field(DEFAULT_RESAMPLES, ge=100, le=MAX_RESAMPLES)
+    block_size: Optional[float] = Field(None, ge=1)  # mean bootstrap block, bars; default n ** (1/3)
+    confidence: float = Field(DEFAULT_CONFIDENCE, gt=0, lt=1)
+    seed: int = Field(0, ge=0)
+
+
+class SeriesView(BaseModel):
+    """Query parameters shaping a time-series response."""
+
+    model_config = ConfigDict(populate_by_name=True)
+
+    max_points: int = Field(DEFAULT_MAX_POINTS, ge=0)  # 0 = every point, else at least 2
+    from_: Optional[datetime] = Field(None, alias="from")  # inclusive
+    to: Optional[datetime] = None  # inclusive
+    method: Literal["lttb", "minmax"] = "lttb"
+
+    @field_validator("max_points")
+    @classmethod
+    def _first_and_last(cls, value: int) -> int:
+        # downsampling always keeps the first and last point
+        if value == 1:
+            raise ValueError("max_points must be 0 (every point) or at least 2")
+        return value
+
+    @field_validator("from_", "to")
+    @classmethod
+    def _naive_utc(cls, value: Optional[datetime]) -> Optional[datetime]:
+        # the price index is tz-naive UTC; "...Z" / "+02:00" bounds are converted to it
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+
+class StabilityView(SeriesView):
+    """SeriesView plus the rolling-window test's parameters (/api/pair/{id}/stability)."""
+
+    window: int = Field(STABILITY_WINDOW, ge=MIN_WINDOW)
+    step: int = Field(1, ge=1)
+    pvalue_threshold: float = Field(PVALUE_THRESHOLD, gt=0, lt=1)
+
+
+class ScanRequest(BaseModel):
+    tickers: Optional[List[str]] = None  # default: the whole universe
+    pvalue_threshold: float = 0.05
+    engine: Literal["statsmodels", "batched"] = "batched"
+    # candidate pruning before the tests (prefilter.prune_pairs); all off by default
+    min_corr: Optional[float] = None
+    max_corr: Optional[float] = None
+    ssd_keep: Optional[float] = Field(None, gt=0, le=1)
+    n_clusters: Optional[int] = Field(None, ge=1)
+
+
+class StabilityRequest(BaseModel):
+    pairs: Optional[List[str]] = None  # "AAPL-MSFT" ids; default: all cointegrated pairs
+    max_pairs: Optional[int] = None
+    window: int = Field(STABILITY_WINDOW, ge=MIN_WINDOW)
+    step: int = Field(5, ge=1)
+    pvalue_threshold: float = Field(PVALUE_THRESHOLD, gt=0, lt=1)
+
+
+class JobRequest(BaseModel):
+    kind: Literal["backtest", "sweep", "scan", "stability"]
+    params: dict = {}
+    timeout: Optional[float] = Field(None, gt=0)  # seconds; default jobs.JOB_TIMEOUT
+
+
+# =============================
+# RESPONSE BUILDERS
+# =============================
+
+def series_payload(frame: pd.DataFrame, primary: str, view: SeriesView, keep=None) -> dict:
+    """
+    Columnar series for charts: parallel "times" / column arrays for the
+    rows between view.from_ and view.to, downsampled on `primary` to at most
+    view.max_points rows. NaN -> null. `keep` is a row selection already
+    computed for this view (precomputed pair views).
+    """
+    with span("series.downsample"):
+        window = frame.iloc[window_slice(frame.index, view.from_, view.to)]
+        if keep is None:
+            keep = downsample_indices(
+                window[primary].to_numpy(dtype=float), view.max_points or None, view.method
+            )
+        rows = window.iloc[keep]
+    with span("series.columns"):
+        out = {"times": np.datetime_as_string(rows.index.to_numpy(), unit="s").tolist()}
+        for col in frame.columns:
+            out[col] = nan_to_none(rows[col].to_numpy(dtype=float))
+    out["total_points"] = len(window)
+    return out
+
+
+def backtest_payload(
+    prices: pd.DataFrame, req: BacktestRequest, view: SeriesView = SeriesView()
+) -> dict:
+    start_ts = pd.to_datetime(req.start_date) if req.start_date else None
+    end_ts = pd.to_datetime(req.end_date) if req.end_date else None
+
+    metrics, results_df, trades_df, _, _, _ = backtest_pair(
+        prices,
+        req.ticker1,
+        req.ticker2,
+        start=start_ts,
+        end=end_ts,
+        lookback=req.lookback,
+        entry_z=req.entry_z,
+        exit_z=req.exit_z,
+        hedge_method=req.hedge_method,
+        hedge_window=req.hedge_window,
+    )
+
+    return {
+        "metrics": metrics,
+        "equity_curve": series_payload(results_df[["equity"]], "equity", view),
+        "trades": trades_df.to_dict(orient="records"),
+    }
+
+
+def sweep_payload(prices: pd.DataFrame, req: BacktestSweepRequest, progress=None) -> dict:
+    lookbacks = sorted(set(req.lookbacks))
+    entry_zs = sorted(set(req.entry_zs))
+    exit_zs = sorted(set(req.exit_zs))
+    if not lookbacks or not entry_zs or not exit_zs:
+        raise ValueError("Parameter grids must not be empty.")
+    if len(lookbacks) * len(entry_zs) * len(exit_zs) > MAX_SWEEP_CELLS:
+        raise ValueError(f"Grid too large (max {MAX_SWEEP_CELLS} cells).")
+
+    start_ts = pd.to_datetime(req.start_date) if req.start_date else None
+    end_ts = pd.to_datetime(req.end_date) if req.end_date else None
+
+    beta, surface = sweep_backtest(
+        prices,
+        req.ticker1,
+        req.ticker2,
+        lookbacks,
+        entry_zs,
+        exit_zs,
+        start=start_ts,
+        end=end_ts,
+        hedge_method=req.hedge_method,
+        hedge_window=req.hedge_window,
+        progress=progress,
+    )
+
+    # surfaces are indexed [lookback][entry_z][exit_z]; NaN -> null for JSON
+    return {
+        "pair": f"{req.ticker1}/{req.ticker2}",
+        "beta": beta,
+        "lookbacks": lookbacks,
+        "entry_zs": entry_zs,
+        "exit_zs": exit_zs,
+        "surface": {key: nan_to_none(values) for key, values in surface.items()},
+    }
+
+
+def batch_rows(prices: pd.DataFrame, pairs: list, params: dict) -> list:
+    """
+    Metrics of each pair for the batch endpoint, one JSON-ready dict per
+    pair; a pair that cannot be backtested gets an "error" row instead of
+    failing the batch.
+    """
+    rows = []
+    for t1, t2 in pairs:
+        try:
+            metrics, _, _, _, _, _ = backtest_pair(prices, t1, t2, **params)
+        except ValueError as e:
+            rows.append({"id": f"{t1}-{t2}", "error": str(e)})
+            continue
+        rows.append({"id": f"{t1}-{t2}", **{k: json_float(v) for k, v in metrics.items()}})
+    return rows
+
+
+def batch_chunk(pairs: list, params: dict, version: Optional[int]):
+    """
+    Pool-process side of /api/backtest/batch: maps only the chunk's tickers
+    from the binary store. Returns (pairs, rows), with rows None when the
+    store was republished since the request's snapshot, so the caller can
+    redo the chunk on the snapshot it answered from.
+    """
+    store = open_store(PRICES_CSV)
+    if store.version != version:
+        return pairs, None
+    tickers = list(dict.fromkeys(t for pair in pairs for t in pair))
+    return pairs, batch_rows(store.frame(tickers), pairs, params)
+
+
+_BATCH_POOL = None
+_BATCH_POOL_LOCK = threading.Lock()
+
+
+def batch_pool() -> ProcessPoolExecutor:
+    global _BATCH_POOL
+    with _BATCH_POOL_LOCK:
+        if _BATCH_POOL is None:
+            _BATCH_POOL = ProcessPoolExecutor(max_workers=BATCH_WORKERS)
+        return _BATCH_POOL
+
+
+def significance_payload(prices: pd.DataFrame, req: SignificanceRequest) -> dict:
+    start_ts = pd.to_datetime(req.start_date) if req.start_date else None
+    end_ts = pd.to_datetime(req.end_date) if req.end_date else None
+    warmup = req.lookback + (req.hedge_window if req.hedge_method == "rolling_ols" else 0)
+    s1, s2 = slice_pair(prices, req.ticker1, req.ticker2, start_ts, end_ts, warmup)
+    hedge = resolve_hedge(s1, s2, req.hedge_method, req.hedge_window)
+
+    result = pair_significance(
+        s1,
+        s2,
+        hedge,
+        req.lookback,
+        req.entry_z,
+        req.exit_z,
+        resamples=req.resamples,
+        seed=req.seed,
+        block_size=req.block_size,
+        methods=req.methods,
+        confidence=req.confidence,
+        annual_days=ANNUAL_TRADING_DAYS,
+        executor=batch_pool() if BATCH_WORKERS > 1 else None,
+    )
+    return {
+        "pair": f"{req.ticker1}/{req.ticker2}",
+        "beta": json_float(latest_beta(hedge)),
+        "hedge_method": req.hedge_method,
+        **result,
+    }
+
+
+# =============================
+# BACKGROUND JOBS
+# =============================
+# Runners execute in jobs.JobManager pool processes: they take the validated
+# request as a dict plus a progress(done, total, message) callback, and read
+# prices from the binary store so they always see the current data.
+
+def job_backtest(params: dict, progress) -> dict:
+    # progress reports are the cancellation / timeout points: one between
+    # loading and backtesting, one before the result is sent back. The
+    # backtest itself is a single stage and runs to completion once started.
+    version = data_version(data_signature())
+    prices = load_price_store(PRICES_CSV)
+    progress(1, 3, "prices loaded")
+    # full-resolution equity curve; clients can window / downsample it themselves
+    payload = backtest_payload(prices, BacktestRequest(**params), SeriesView(max_points=0))
+    progress(2, 3, "backtest done")
+    return {**payload, "data_version": version}
+
+
+def job_sweep(params: dict, progress) -> dict:
+    req = BacktestSweepRequest(**params)
+    version = data_version(data_signature())
+    payload = sweep_payload(
+        load_price_store(PRICES_CSV),
+        req,
+        progress=lambda done, total: progress(done, total, f"{done}/{total} lookbacks"),
+    )
+    return {**payload, "data_version": version}
+
+
+def job_scan(params: dict, progress) -> dict:
+    req = ScanRequest(**params)
+    version = data_version(data_signature())
+    prices = load_price_store(PRICES_CSV, tickers=req.tickers)
+    from prefilter import prune_pairs
+    from scanner import scan_pairs  # keeps statsmodels out of the API worker's import
+
+    prune = {k: getattr(req, k) for k in ("min_corr", "max_corr", "ssd_keep", "n_clusters")}
+    pairs, pruning = None, []
+    if any(v is not None for v in prune.values()):
+        pairs, pruning = prune_pairs(prices, **prune)
+
+    all_pairs, good_pairs = scan_pairs(
+        prices,
+        req.pvalue_threshold,
+        workers=1,  # already inside a pool process
+        chunk_size=JOB_SCAN_CHUNK,
+        engine=req.engine,
+        pairs=pairs,
+        progress=lambda done, total: progress(done, total, f"{done}/{total} pairs"),
+    )
+    return {
+        "pruning": pruning,
+        "num_tested": len(all_pairs),
+        "num_cointegrated": len(good_pairs),
+        "pairs": good_pairs.to_dict(orient="records"),
+        "data_version": version,
+    }
+
+
+def job_stability(params: dict, progress) -> dict:
+    req = StabilityRequest(**params)
+    version = data_version(data_signature())
+    prices = load_price_store(PRICES_CSV)
+    pairs = select_portfolio_pairs(pd.read_csv(COINTEGRATION_CSV), prices, req.pairs, req.max_pairs)
+    missing = sorted({t for pair in pairs for t in pair} - set(prices.columns))
+    if missing:
+        raise ValueError(f"Unknown tickers: {', '.join(missing)}")
+
+    table = pairs_stability(
+        prices,
+        pd.DataFrame(pairs, columns=["ticker1", "ticker2"]),
+        req.window,
+        req.step,
+        req.pvalue_threshold,
+        progress=lambda done, total: progress(done, total, f"{done}/{total} pairs"),
+    )
+    return {
+        "window": req.window,
+        "step": req.step,
+        "num_pairs": len(table),
+        "num_cointegrated_now": int(table["cointegrated_now"].sum()),
+        "pairs": table.sort_values("latest_pvalue").to_dict(orient="records"),
+        "data_version": version,
+    }
+
+
+JOB_KINDS = {
+    "backtest": (BacktestRequest, job_backtest),
+    "sweep": (BacktestSweepRequest, job_sweep),
+    "scan": (ScanRequest, job_scan),
+    "stability": (StabilityRequest, job_stability),
+}
+JOB_EVENT_POLL = 0.25  # seconds between SSE progress checks
+JOB_SCAN_CHUNK = 50  # pairs per progress report (and cancellation point) in scan jobs
+
+JOBS = JobManager()
+
+# /api/backtest/batch and large /api/backtest/significance and /api/pair/{id}/stability
+# runs: processes working through chunks of pairs / resamples / windows (1 = in the
+# request thread)
+BATCH_WORKERS = int(os.environ.get("BATCH_WORKERS", os.cpu_count() or 1))
+BATCH_CHUNK_PAIRS = 8  # pairs per pool task; results stream back a chunk at a time
+
+SIGNAL_REPLAY_BARS = 250  # default bars /ws/signals replays; everything before warms the engine
+SIGNAL_REPLAY_SECONDS = float(os.environ.get("SIGNAL_REPLAY_SECONDS", 1.0))  # between replayed bars
+SIGNAL_MAX_REPLAY_BARS = 10_000  # upper bounds on the /ws/signals parameters
+SIGNAL_MAX_INTERVAL = 60.0
+SIGNAL_ENGINE_CACHE = 8  # warmed engines kept, one per (data version, parameters)
 
 
 # =============================
 # FASTAPI APP
 # =============================
 
-app = FastAPI(title="QuantPairs Lab API", version="0.1.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if DATA_PRELOAD:
+        SNAPSHOTS.reload()  # background; requests arriving first wait for it
+    SNAPSHOTS.watch(DATA_WATCH_SECONDS)
+    yield
+    JOBS.shutdown()
+    if _BATCH_POOL is not None:
+        _BATCH_POOL.shutdown(wait=False, cancel_futures=True)
+
+
+app = FastAPI(title="QuantPairs Lab API", version="0.1.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -263,122 +1021,571 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Cache", "X-Data-Version"],
 )
 
 
+def route_label(request: Request) -> str:
+    """Path template of the matching route, so metrics are per endpoint, not per URL."""
+    for route in app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+
+@app.middleware("http")
+async def tag_data_version(request: Request, call_next):
+    # the version the handler pinned (see current_snapshot), else the live one
+    response = await call_next(request)
+    version = getattr(request.state, "data_version", None)
+    if version is None and SNAPSHOTS.peek() is not None:
+        version = SNAPSHOTS.peek().version
+    if version is not None:
+        response.headers["X-Data-Version"] = version
+    return response
+
+
+@app.middleware("http")
+async def instrument(request: Request, call_next):
+    """
+    Request count, latency (to the first response byte) and in-flight gauge
+    per endpoint. With ?profile=1 the spans hit while serving the request
+    come back in a Server-Timing header and, for JSON objects, under a
+    "profile" key.
+    """
+    if not METRICS_ENABLED:
+        return await call_next(request)
+
+    endpoint = route_label(request)
+    method = request.method
+    token = start_profile() if request.query_params.get("profile") in ("1", "true") else None
+    IN_FLIGHT.inc(endpoint, method)
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        elapsed = time.perf_counter() - started
+        IN_FLIGHT.dec(endpoint, method)
+        REQUEST_SECONDS.observe(elapsed, endpoint, method)
+        REQUESTS.inc(endpoint, method, str(status))
+        stages = finish_profile(token) if token is not None else None
+
+    if stages is None:
+        return response
+    return await attach_profile(response, stages, elapsed)
+
+
+async def attach_profile(response: Response, stages: list, elapsed: float) -> Response:
+    total_ms = round(elapsed * 1000.0, 3)
+    timing = [f"s{k};desc=\"{st['stage']}\";dur={st['ms']}" for k, st in enumerate(stages)]
+    timing.append(f"total;dur={total_ms}")
+    headers = {k: v for k, v in response.headers.items() if k.lower() != "content-length"}
+    headers["Server-Timing"] = ", ".join(timing)
+
+    content_type = response.headers.get("content-type", "")
+    if content_type.startswith("text/event-stream"):
+        response.headers["Server-Timing"] = headers["Server-Timing"]  # never buffer a stream
+        return response
+    if not content_type.startswith("application/json"):
+        return Response(
+            content=b"".join([chunk async for chunk in response.body_iterator]),
+            status_code=response.status_code,
+            headers=headers,
+        )
+    payload = json.loads(b"".join([chunk async for chunk in response.body_iterator]) or b"null")
+    if isinstance(payload, dict):
+        payload["profile"] = {"total_ms": total_ms, "stages": stages}
+    return JSONResponse(payload, status_code=response.status_code, headers=headers)
+
+
 @app.get("/api/universe")
-def get_universe():
-    tickers = list(PRICES.columns)
+def get_universe(snap: DataSnapshot = Depends(current_snapshot)):
+    tickers = list(snap.prices.columns)
     return {
         "universe_name": "US Large Cap (Demo)",
         "num_tickers": len(tickers),
         "tickers": tickers,
-        "last_date": str(PRICES.index.max().date()),
+        "last_date": str(snap.prices.index.max().date()),
     }
 
 
 @app.get("/api/pairs")
-def get_pairs():
-    if COINT.empty:
-        return {"pairs": []}
+def get_pairs(snap: DataSnapshot = Depends(current_snapshot)):
+    # the table is plain JSON types already; skip FastAPI's per-field encoder
+    with span("get_pairs.serialize"):
+        return JSONResponse({"pairs": snap.pairs})
 
-    returns = PRICES.pct_change()
-    pairs = []
-
-    for _, row in COINT.iterrows():
-        t1 = row["ticker1"]
-        t2 = row["ticker2"]
-        if t1 not in PRICES.columns or t2 not in PRICES.columns:
-            continue
-
-        corr = float(returns[[t1, t2]].dropna().corr().iloc[0, 1])
-        spread = PRICES[t1] - PRICES[t2]
-        halflife = compute_half_life(spread)
 
-        pair_id = f"{t1}-{t2}"
-        status = "Strong" if row["pvalue"] < 0.02 else "Moderate"
-
-        tags = []
-        if abs(corr) > 0.9:
-            tags.append("Highly Correlated")
-        if halflife and halflife < 20:
-            tags.append("Fast Reversion")
-        elif halflife and halflife < 60:
-            tags.append("Slow Reversion")
+@app.get("/api/pair/{pair_id}")
+def get_pair_detail(
+    pair_id: str,
+    request: Request,
+    view: Annotated[SeriesView, Query()],
+    snap: DataSnapshot = Depends(current_snapshot),
+):
+    try:
+        t1, t2 = pair_id.split("-")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="pair_id must be like 'AAPL-MSFT'")
 
-        pairs.append(
-            {
-                "id": pair_id,
-                "ticker1": t1,
-                "ticker2": t2,
-                "pvalue": float(row["pvalue"]),
-                "score": float(row["score"]),
-                "correlation": corr,
-                "half_life": halflife,
-                "status": status,
-                "tags": tags,
+    def compute():
+        if t1 not in snap.prices.columns or t2 not in snap.prices.columns:
+            raise HTTPException(status_code=404, detail="Tickers not in universe")
+
+        # precomputed at refresh time for the cointegrated pairs; any other
+        # pair (or a stale / missing views build) is backtested live
+        keep = None
+        with span("pair.lookup"):
+            found = snap.views.get(pair_id) if snap.views is not None else None
+            if found is not None and view == SeriesView():
+                keep = snap.views.default_rows(pair_id)
+        if found is not None:
+            beta, summary, results_df = found
+            metrics = {
+                "pair": f"{t1}/{t2}",
+                "beta": beta,
+                "lookback": VIEW_LOOKBACK,
+                "entry_z": VIEW_ENTRY_Z,
+                "exit_z": VIEW_EXIT_Z,
+                **summary,
+                "hedge_method": "static",
             }
-        )
+        else:
+            metrics, results_df, _, beta, _, _ = backtest_pair(
+                snap.prices, t1, t2, lookback=VIEW_LOOKBACK, entry_z=VIEW_ENTRY_Z, exit_z=VIEW_EXIT_Z
+            )
+
+        return {
+            "pair": metrics["pair"],
+            "beta": beta,
+            **series_payload(results_df[["spread", "zscore", "equity"]], "spread", view, keep),
+            "metrics": metrics,
+        }
 
-    pairs = sorted(pairs, key=lambda x: x["pvalue"])
-    return {"pairs": pairs}
+    params = {"ticker1": t1, "ticker2": t2, "view": view.model_dump()}
+    return cached_response(request, snap, "pair", params, compute)
 
 
-@app.get("/api/pair/{pair_id}")
-def get_pair_detail(pair_id: str):
+@app.get("/api/pair/{pair_id}/stability")
+def get_pair_stability(
+    pair_id: str,
+    request: Request,
+    view: Annotated[StabilityView, Query()],
+    snap: DataSnapshot = Depends(current_snapshot),
+):
+    """
+    Rolling Engle-Granger test of the pair: statistic, p-value and hedge
+    ratio of the `window` bars ending at each time, one window every `step`
+    bars, plus how long the pair has been (or stopped being) cointegrated.
+    """
     try:
         t1, t2 = pair_id.split("-")
     except ValueError:
         raise HTTPException(status_code=400, detail="pair_id must be like 'AAPL-MSFT'")
 
-    if t1 not in PRICES.columns or t2 not in PRICES.columns:
-        raise HTTPException(status_code=404, detail="Tickers not in universe")
+    def compute():
+        if t1 not in snap.prices.columns or t2 not in snap.prices.columns:
+            raise HTTPException(status_code=404, detail="Tickers not in universe")
+        with span("stability.windows"):
+            try:
+                frame = pair_stability(
+                    snap.prices[t1],
+                    snap.prices[t2],
+                    view.window,
+                    view.step,
+                    executor=batch_pool() if BATCH_WORKERS > 1 else None,
+                )
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+        # (almost) colinear windows have no ADF statistic (-inf, p-value 0) -> null
+        frame["statistic"] = frame["statistic"].where(np.isfinite(frame["statistic"]))
+        summary = stability_summary(frame, view.pvalue_threshold)
+        summary["latest_statistic"] = json_float(summary["latest_statistic"])
+        return {
+            "pair": f"{t1}/{t2}",
+            "window": view.window,
+            "step": view.step,
+            "maxlag": adf_maxlag(view.window),
+            "pvalue_threshold": view.pvalue_threshold,
+            **series_payload(frame, "statistic", view),
+            "summary": summary,
+        }
 
-    metrics, results_df, _, beta, _, _ = backtest_pair(
-        PRICES, t1, t2, lookback=60, entry_z=2.0, exit_z=0.5
-    )
+    params = {"ticker1": t1, "ticker2": t2, "view": view.model_dump()}
+    return cached_response(request, snap, "stability", params, compute)
 
-    N = 500
-    df = results_df.tail(N)
-    times = [ts.isoformat() for ts in df.index]
 
-    return {
-        "pair": metrics["pair"],
-        "beta": beta,
-        "times": times,
-        "spread": df["spread"].tolist(),
-        "zscore": df["zscore"].tolist(),
-        "equity": df["equity"].tolist(),
-        "metrics": metrics,
-    }
+@app.post("/api/backtest")
+def run_backtest(
+    req: BacktestRequest,
+    request: Request,
+    view: Annotated[SeriesView, Query()],
+    snap: DataSnapshot = Depends(current_snapshot),
+):
+    def compute():
+        try:
+            return backtest_payload(snap.prices, req, view)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    params = {**req.model_dump(), "view": view.model_dump()}
+    return cached_response(request, snap, "backtest", params, compute)
+
+
+@app.get("/api/cache/stats")
+def get_cache_stats():
+    return RESULT_CACHE.stats()
+
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """Prometheus text format: request/span metrics plus cache, job and data gauges read now."""
+    cache = RESULT_CACHE.stats()
+    lookups = cache["hits"] + cache["disk_hits"] + cache["misses"]
+    job_counts = {status: 0 for status in ("queued", "running", *FINISHED)}
+    for job in JOBS.list():
+        job_counts[job.status] += 1
+    data = SNAPSHOTS.status()
+
+    extra = [
+        *sample_lines(
+            "result_cache_lookups_total",
+            "Result cache lookups by outcome.",
+            "counter",
+            {
+                (("outcome", "hit"),): cache["hits"],
+                (("outcome", "disk_hit"),): cache["disk_hits"],
+                (("outcome", "miss"),): cache["misses"],
+                (("outcome", "not_modified"),): cache["not_modified"],
+            },
+        ),
+        *sample_lines(
+            "result_cache_hit_ratio",
+            "Share of cache lookups served from memory or disk.",
+            "gauge",
+            (cache["hits"] + cache["disk_hits"]) / lookups if lookups else 0.0,
+        ),
+        *sample_lines("result_cache_entries", "Responses held in memory.", "gauge", cache["entries"]),
+        *sample_lines("result_cache_bytes", "Bytes held in memory.", "gauge", cache["bytes"]),
+        *sample_lines("result_cache_evictions_total", "LRU evictions.", "counter", cache["evictions"]),
+        *sample_lines(
+            "jobs",
+            "Background jobs by status.",
+            "gauge",
+            {(("status", status),): n for status, n in job_counts.items()},
+        ),
+        *sample_lines(
+            "data_snapshot_info",
+            "Data version being served.",
+            "gauge",
+            {(("version", data["data_version"]),): 1},
+        ),
+        *sample_lines("data_reloads_total", "Snapshots published.", "counter", data["reloads"]),
+        *sample_lines("data_tickers", "Tickers in the current snapshot.", "gauge", data["num_tickers"]),
+        *sample_lines("data_pairs", "Cointegrated pairs in the current snapshot.", "gauge", data["num_pairs"]),
+    ]
+    return PlainTextResponse(render_metrics(extra), media_type="text/plain; version=0.0.4")
+
+
+@app.post("/api/backtest/sweep")
+def run_backtest_sweep(req: BacktestSweepRequest, snap: DataSnapshot = Depends(current_snapshot)):
+    try:
+        return sweep_payload(snap.prices, req)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
-@app.post("/api/backtest")
-def run_backtest(req: BacktestRequest):
+@app.post("/api/backtest/batch")
+async def run_backtest_batch(req: BacktestBatchRequest, snap: DataSnapshot = Depends(current_snapshot)):
+    """
+    Metrics of many pairs with shared parameters, streamed as NDJSON: one
+    line per pair, in completion order, as soon as its chunk is done.
+    Chunks of BATCH_CHUNK_PAIRS run on a process pool that maps the price
+    store; lines carry the pair "id" plus the /api/backtest metrics, or an
+    "error".
+    """
     try:
+        pairs = select_portfolio_pairs(snap.coint, snap.prices, req.pairs, req.max_pairs)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    missing = sorted({t for pair in pairs for t in pair} - set(snap.prices.columns))
+    if missing:
+        raise HTTPException(status_code=400, detail=f"Tickers not in universe: {', '.join(missing)}")
+    if not pairs:
+        raise HTTPException(status_code=400, detail="No pairs to backtest.")
+    if len(pairs) > MAX_BATCH_PAIRS:
+        raise HTTPException(status_code=400, detail=f"Too many pairs (max {MAX_BATCH_PAIRS}).")
+
+    params = {
+        "start": pd.to_datetime(req.start_date) if req.start_date else None,
+        "end": pd.to_datetime(req.end_date) if req.end_date else None,
+        "lookback": req.lookback,
+        "entry_z": req.entry_z,
+        "exit_z": req.exit_z,
+        "hedge_method": req.hedge_method,
+        "hedge_window": req.hedge_window,
+    }
+    chunks = [pairs[i:i + BATCH_CHUNK_PAIRS] for i in range(0, len(pairs), BATCH_CHUNK_PAIRS)]
+
+    def ndjson(rows: list) -> str:
+        return "".join(json.dumps(row) + "\n" for row in rows)
+
+    async def lines():
+        if BATCH_WORKERS <= 1 or len(chunks) == 1:
+            for chunk in chunks:
+                yield ndjson(await run_in_threadpool(batch_rows, snap.prices, chunk, params))
+            return
+
+        pool = batch_pool()
+        futures = [pool.submit(batch_chunk, chunk, params, snap.store_version) for chunk in chunks]
+        try:
+            for done in asyncio.as_completed([asyncio.wrap_future(f) for f in futures]):
+                chunk, rows = await done
+                if rows is None:  # store republished mid-request: stay on this snapshot
+                    rows = await run_in_threadpool(batch_rows, snap.prices, chunk, params)
+                yield ndjson(rows)
+        finally:
+            for f in futures:  # client went away: drop chunks not started yet
+                f.cancel()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@app.post("/api/backtest/significance")
+def run_backtest_significance(
+    req: SignificanceRequest,
+    request: Request,
+    snap: DataSnapshot = Depends(current_snapshot),
+):
+    """
+    Bootstrap confidence intervals and permutation p-values for a pair
+    backtest's metrics. Seeded, so responses are cached like /api/backtest.
+    """
+    if not req.methods:
+        raise HTTPException(status_code=400, detail="methods must not be empty.")
+
+    def compute():
+        try:
+            return significance_payload(snap.prices, req)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    return cached_response(request, snap, "significance", req.model_dump(), compute)
+
+
+@app.post("/api/portfolio/backtest")
+def run_portfolio_backtest(
+    req: PortfolioBacktestRequest,
+    view: Annotated[SeriesView, Query()],
+    snap: DataSnapshot = Depends(current_snapshot),
+):
+    try:
+        pairs = select_portfolio_pairs(snap.coint, snap.prices, req.pairs, req.max_pairs)
+
+        # a row slice of the snapshot (a view, like slice_pair), not a masked copy of the universe
         start_ts = pd.to_datetime(req.start_date) if req.start_date else None
         end_ts = pd.to_datetime(req.end_date) if req.end_date else None
-
-        metrics, results_df, trades_df, _, _, _ = backtest_pair(
-            PRICES,
-            req.ticker1,
-            req.ticker2,
-            start=start_ts,
-            end=end_ts,
-            lookback=req.lookback,
-            entry_z=req.entry_z,
-            exit_z=req.exit_z,
-        )
+        prices = snap.prices.iloc[window_slice(snap.prices.index, start_ts, end_ts)]
+        warmup = req.lookback + (req.hedge_window if req.hedge_method == "rolling_ols" else 0)
+        if prices.shape[0] < warmup + 10:
+            raise ValueError("Not enough data for this date range and lookback.")
+
+        with span("portfolio.backtest"):
+            result = portfolio_backtest(
+                prices,
+                pairs,
+                lookback=req.lookback,
+                entry_z=req.entry_z,
+                exit_z=req.exit_z,
+                weighting=req.weighting,
+                hedge_method=req.hedge_method,
+                hedge_window=req.hedge_window,
+                annual_days=ANNUAL_TRADING_DAYS,
+            )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-    eq = results_df["equity"]
+    metrics = {k: json_float(v) for k, v in result.stats.items()}
+    contributions = result.pairs.sort_values("contribution", ascending=False)
+    pairs = [
+        {k: json_float(v) for k, v in row.items()}
+        for row in contributions.to_dict(orient="records")
+    ]
 
     return {
         "metrics": metrics,
-        "equity_curve": [
-            {"timestamp": ts.isoformat(), "equity": float(eq_val)}
-            for ts, eq_val in eq.items()
-        ],
-        "trades": trades_df.to_dict(orient="records"),
+        "equity_curve": series_payload(result.equity.to_frame("equity"), "equity", view),
+        "pairs": pairs,
     }
+
+
+@app.post("/api/jobs", status_code=202)
+def submit_job(req: JobRequest):
+    model, runner = JOB_KINDS[req.kind]
+    try:
+        params = model(**req.params).model_dump(mode="json")
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False))
+    try:
+        job = JOBS.submit(req.kind, runner, params, timeout=req.timeout)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return job.to_dict(include_result=False)
+
+
+@app.get("/api/jobs")
+def list_jobs():
+    return {"jobs": [job.to_dict(include_result=False) for job in JOBS.list()]}
+
+
+@app.get("/api/jobs/{job_id}")
+def get_job(job_id: str):
+    job = JOBS.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return job.to_dict()
+
+
+@app.delete("/api/jobs/{job_id}")
+def cancel_job(job_id: str):
+    job = JOBS.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return job.to_dict(include_result=False)
+
+
+@app.get("/api/jobs/{job_id}/events")
+async def stream_job(job_id: str):
+    """Server-sent events: one "progress" event per change, then "end" with the result."""
+    if JOBS.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+
+    async def events():
+        revision = None
+        while True:
+            job = JOBS.get(job_id)
+            if job is None:
+                return
+            if job.revision != revision:
+                revision = job.revision
+                finished = job.status in FINISHED
+                data = json.dumps(jsonable_encoder(job.to_dict(include_result=finished)))
+                yield f"event: {'end' if finished else 'progress'}\ndata: {data}\n\n"
+                if finished:
+                    return
+            await asyncio.sleep(JOB_EVENT_POLL)
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+_SIGNAL_ENGINES: "OrderedDict[tuple, SignalEngine]" = OrderedDict()
+_SIGNAL_ENGINES_LOCK = threading.Lock()
+
+
+def start_signal_engine(snap: DataSnapshot, lookback: int, entry_z: float, exit_z: float, start: int):
+    """
+    Engine over the snapshot's pairs, warmed on the bars before `start`.
+    The warmed engine is built once per snapshot and parameter set (the
+    last SIGNAL_ENGINE_CACHE of them are kept); every feed gets its own copy.
+    """
+    key = (snap.version, lookback, entry_z, exit_z, start)
+    with _SIGNAL_ENGINES_LOCK:
+        engine = _SIGNAL_ENGINES.get(key)
+        if engine is not None:
+            _SIGNAL_ENGINES.move_to_end(key)
+    if engine is None:
+        pairs = [(p["ticker1"], p["ticker2"]) for p in snap.pairs]
+        engine = SignalEngine.from_history(snap.prices.iloc[:start], pairs, lookback, entry_z, exit_z)
+        with _SIGNAL_ENGINES_LOCK:
+            _SIGNAL_ENGINES[key] = engine
+            while len(_SIGNAL_ENGINES) > SIGNAL_ENGINE_CACHE:
+                _SIGNAL_ENGINES.popitem(last=False)
+    return engine.copy()
+
+
+@app.websocket("/ws/signals")
+async def signals_feed(
+    websocket: WebSocket,
+    lookback: int = SIGNAL_LOOKBACK,
+    entry_z: float = SIGNAL_ENTRY_Z,
+    exit_z: float = SIGNAL_EXIT_Z,
+    replay_bars: int = SIGNAL_REPLAY_BARS,
+    interval: float = SIGNAL_REPLAY_SECONDS,
+    zscores: bool = False,
+):
+    """
+    Live entry / exit signals for every cointegrated pair. The feed replays
+    the last `replay_bars` stored bars, one per `interval` seconds, into a
+    SignalEngine warmed (static betas, window, positions) on the bars before.
+
+    Messages: "state" (every pair's beta / z / position) once, then one
+    "bar" per bar with the signals it fired (and all z-scores when
+    zscores=true), then "end". Errors close the socket with code 1008 / 1011;
+    lookback may not exceed the warm-up bars, replay_bars and interval are
+    capped at SIGNAL_MAX_REPLAY_BARS / SIGNAL_MAX_INTERVAL.
+    """
+    await websocket.accept()
+    if (
+        lookback < 2
+        or entry_z <= 0
+        or exit_z < 0
+        or not 0 <= replay_bars <= SIGNAL_MAX_REPLAY_BARS
+        or not 0 <= interval <= SIGNAL_MAX_INTERVAL
+    ):
+        await websocket.close(code=1008, reason="Invalid signal parameters")
+        return
+    try:
+        snap = await run_in_threadpool(SNAPSHOTS.current)
+    except RuntimeError as e:
+        await websocket.close(code=1011, reason=str(e)[:120])
+        return
+
+    start = max(len(snap.prices) - replay_bars, 0)
+    if lookback > start:
+        await websocket.close(code=1008, reason="Not enough data before the replay window for this lookback")
+        return
+    engine = await run_in_threadpool(start_signal_engine, snap, lookback, entry_z, exit_z, start)
+    try:
+        await websocket.send_json(
+            {
+                "type": "state",
+                "data_version": snap.version,
+                "time": engine.last_time.isoformat() if engine.last_time is not None else None,
+                "lookback": lookback,
+                "entry_z": entry_z,
+                "exit_z": exit_z,
+                "pairs": engine.state(),
+            }
+        )
+        bars = 0
+        async for ts, row in replay_feed(snap.prices, start, interval):
+            message = {"type": "bar", "time": ts.isoformat(), "signals": engine.update(row, ts)}
+            if zscores:
+                message["zscores"] = nan_to_none(engine.z)
+            await websocket.send_json(message)
+            bars += 1
+        await websocket.send_json({"type": "end", "bars": bars})
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+
+
+@app.post("/api/admin/reload", status_code=202)
+def reload_data(force: bool = False, wait: bool = False):
+    """
+    Rebuild the data snapshot in the background (only if the files changed,
+    unless force=true) and swap it in when ready. wait=true blocks until
+    the new snapshot is live.
+    """
+    status = SNAPSHOTS.reload(force=force)
+    if wait and status in ("started", "already_running"):
+        SNAPSHOTS.wait()
+    return {"status": status, **SNAPSHOTS.status()}
+
+
+@app.get("/api/admin/data")
+def get_data_status():
+    return SNAPSHOTS.status()
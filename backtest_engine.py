@@ -0,0 +1,436 @@
+import pandas as pd
+import numpy as np
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import List, Optional
+
+from metrics import span
+
+# -----------------------------
+# CONFIG
+# -----------------------------
+ANNUAL_TRADING_DAYS = 252
+
+
+@dataclass
+class Trade:
+    direction: str  # "long_spread" or "short_spread"
+    entry_date: pd.Timestamp
+    exit_date: Optional[pd.Timestamp]
+    entry_z: float
+    exit_z: Optional[float]
+    pnl: float
+    return_pct: float
+    bars_held: int
+
+
+@dataclass
+class PairBacktest:
+    spread: pd.Series
+    zscore: pd.Series
+    strategy_return: pd.Series
+    position: pd.Series
+    equity: pd.Series
+    trades: List[Trade]
+    stats: dict
+
+
+class PairWorkspace:
+    """
+    Reusable float64 work arrays for run_pair_backtest, grown on demand, so
+    repeated backtests (one per request on an API thread) do not allocate
+    the spread / z-score / return / equity arrays each time. The result of
+    a run aliases these arrays until the next run on the same workspace;
+    callers that keep results beyond that copy them (results_frame does).
+    Not thread-safe: one workspace per thread.
+    """
+
+    def __init__(self):
+        self._arrays = {}
+
+    def array(self, name: str, n: int) -> np.ndarray:
+        arr = self._arrays.get(name)
+        if arr is None or len(arr) < n:
+            arr = self._arrays[name] = np.empty(n)
+        return arr[:n]
+
+
+# -----------------------------
+# SIGNALS
+# -----------------------------
+def pct_change_into(x: np.ndarray, out: np.ndarray) -> np.ndarray:
+    # Series.pct_change (x[t] / x[t-1] - 1, same operations) without temporaries
+    out[:1] = np.nan
+    with np.errstate(invalid="ignore", divide="ignore"):
+        np.divide(x[1:], x[:-1], out=out[1:])
+    np.subtract(out[1:], 1.0, out=out[1:])
+    return out
+
+
+def rolling_zscore(spread: pd.Series, lookback: int) -> pd.Series:
+    spread_mean = spread.rolling(lookback).mean()
+    spread_std = spread.rolling(lookback).std()
+    return (spread - spread_mean) / spread_std
+
+
+def simulate_positions(z: np.ndarray, entry_z: float, exit_z: float):
+    """
+    Run the flat / long-spread / short-spread state machine over a z-score array.
+
+    Returns (pos, legs) where pos is the int8 position path and legs is a
+    list of (side, entry_idx, exit_idx) with exit_idx None for an open trade.
+    """
+    n = len(z)
+    return walk_events(n, entry_table(z, entry_z), exit_table(z, exit_z))
+
+
+class _NextEvent:
+    """
+    nxt[i]: index of the first event strictly after bar i, i.e.
+    np.searchsorted(events, i, side="right"), by bisection on the event
+    list. Only looked up once per trade, so no per-bar table is built.
+    """
+
+    __slots__ = ("events",)
+
+    def __init__(self, events: list):
+        self.events = events
+
+    def __getitem__(self, i: int) -> int:
+        return bisect_right(self.events, i)
+
+
+def _event_table(events: np.ndarray, n: int):
+    # (event bar indices + [None], index of the first event strictly after bar i)
+    positions = events.tolist()
+    return positions + [None], _NextEvent(positions)
+
+
+def entry_table(z: np.ndarray, entry_z: float):
+    with np.errstate(invalid="ignore"):
+        short_entry = z > entry_z
+        entries = np.flatnonzero(short_entry | (z < -entry_z))
+    sides = np.where(short_entry[entries], -1, 1).tolist()
+    return _event_table(entries, len(z)) + (sides,)
+
+
+def exit_table(z: np.ndarray, exit_z: float):
+    with np.errstate(invalid="ignore"):
+        exits = np.flatnonzero(np.abs(z) < exit_z)
+    return _event_table(exits, len(z))
+
+
+def walk_events(n: int, entries, exits):
+    """
+    Instead of visiting every bar, jump between candidate events: from flat,
+    the next bar beyond an entry threshold opens a trade; from a position,
+    the next bar inside the exit band closes it. The "next event after bar i"
+    lookups come precomputed from entry_table / exit_table, so Python work is
+    proportional to the number of trades, not bars.
+    Bar 0 never trades and NaN z-scores never trigger anything.
+    """
+    entry_idx, next_entry, sides = entries
+    exit_idx, next_exit = exits
+
+    legs = []
+    k = next_entry[0] if n else len(sides)
+    while k < len(sides):
+        e = entry_idx[k]
+        x = exit_idx[next_exit[e]]
+        legs.append((sides[k], e, x))
+        if x is None:
+            break
+        # flat again after the exit bar
+        k = next_entry[x]
+
+    delta = np.zeros(n + 1, dtype=np.int8)
+    if legs:
+        side, starts, ends = zip(*legs)
+        side = np.array(side, dtype=np.int8)
+        delta[list(starts)] = side
+        np.subtract.at(delta, [n if x is None else x for x in ends], side)
+    pos = np.cumsum(delta[:n], dtype=np.int8)
+    return pos, legs
+
+
+def strategy_returns(
+    pos: np.ndarray, ret1: np.ndarray, ret2: np.ndarray, beta, first_bar: bool = True, out: np.ndarray = None
+) -> np.ndarray:
+    # long_spread: long s1, short beta*s2 -> ret ≈ r1 - beta*r2
+    # short_spread: -(r1 - beta*r2)
+    # beta may be a per-bar array (rolling hedge); it is NaN only during
+    # warm-up, when no z-score exists and we are always flat
+    # first_bar=False: a later chunk of a longer series (see streaming.py)
+    # out: array to write into (a PairWorkspace buffer) instead of a new one
+    if np.ndim(beta):
+        beta = np.nan_to_num(beta)
+    with np.errstate(invalid="ignore"):
+        strat = np.multiply(beta, ret2, out=out)
+        np.subtract(ret1, strat, out=strat)
+        np.multiply(pos, strat, out=strat)
+    strat[np.isnan(ret1) | np.isnan(ret2)] = 0.0
+    if len(strat) and first_bar:
+        strat[0] = 0.0
+    return strat
+
+
+def build_trades(
+    dates: pd.Index, z: np.ndarray, strat_ret: np.ndarray, legs
+) -> List[Trade]:
+    trades = []
+    for side, e, x in legs:
+        if x is None:
+            # still open at the end of the sample -> not reported
+            continue
+        trade_pnl = float(np.nansum(strat_ret[e:x]))
+        trades.append(
+            Trade(
+                direction="long_spread" if side == 1 else "short_spread",
+                entry_date=dates[e],
+                exit_date=dates[x],
+                entry_z=float(z[e]),
+                exit_z=float(z[x]),
+                pnl=trade_pnl,
+                return_pct=trade_pnl,  # returns are already pct
+                bars_held=x - e,
+            )
+        )
+    return trades
+
+
+# -----------------------------
+# METRICS
+# -----------------------------
+def compute_stats(
+    strat_ret: pd.Series,
+    equity: pd.Series,
+    trades: List[Trade],
+    annual_days: int = ANNUAL_TRADING_DAYS,
+) -> dict:
+    daily_ret = strat_ret.replace([np.inf, -np.inf], np.nan).dropna()
+    if len(daily_ret) > 1:
+        mean_ret = daily_ret.mean()
+        vol_ret = daily_ret.std()
+        if vol_ret != 0:
+            sharpe = np.sqrt(annual_days) * mean_ret / vol_ret
+        else:
+            sharpe = np.nan
+        cum_return = equity.iloc[-1] - 1.0
+        ann_return = (1 + cum_return) ** (annual_days / len(daily_ret)) - 1
+
+        rolling_max = equity.cummax()
+        drawdown = equity / rolling_max - 1.0
+        max_dd = drawdown.min()
+    else:
+        sharpe = np.nan
+        cum_return = 0.0
+        ann_return = np.nan
+        max_dd = np.nan
+
+    if trades:
+        wins = [1 for t in trades if t.return_pct > 0]
+        win_rate = len(wins) / len(trades)
+        avg_bars = np.mean([t.bars_held for t in trades])
+    else:
+        win_rate = np.nan
+        avg_bars = np.nan
+
+    return {
+        "cumulative_return": cum_return,
+        "annualized_return": ann_return,
+        "sharpe_ratio": sharpe,
+        "max_drawdown": max_dd,
+        "num_trades": len(trades),
+        "win_rate": win_rate,
+        "avg_bars_held": avg_bars,
+    }
+
+
+def metrics_summary(stats: dict) -> dict:
+    """
+    compute_stats as JSON-ready numbers: undefined values are None (win
+    rate / holding period without trades, Sharpe of a flat return series).
+    """
+    def number(value):
+        return float(value) if np.isfinite(value) else None
+
+    return {
+        "cumulative_return": number(stats["cumulative_return"]),
+        "annualized_return": number(stats["annualized_return"]),
+        "sharpe_ratio": number(stats["sharpe_ratio"]),
+        "max_drawdown": number(stats["max_drawdown"]),
+        "num_trades": int(stats["num_trades"]),
+        "win_rate": number(stats["win_rate"]),
+        "avg_bars_held": number(stats["avg_bars_held"]),
+    }
+
+
+# -----------------------------
+# ENGINE
+# -----------------------------
+def run_pair_backtest(
+    s1: pd.Series,
+    s2: pd.Series,
+    beta,
+    lookback: int,
+    entry_z: float,
+    exit_z: float,
+    annual_days: int = ANNUAL_TRADING_DAYS,
+    workspace: Optional[PairWorkspace] = None,
+) -> PairBacktest:
+    """
+    Array-based mean-reversion backtest of the spread s1 - beta * s2.
+    Produces the same position path, trades and metrics as the original
+    per-bar loop. `beta` is a float, or a per-bar array for a time-varying
+    hedge ratio (see hedge.py). Spread, z-score, returns and equity are
+    written into `workspace` buffers (a fresh one by default), with the
+    same operations as the pandas expressions they replace.
+    """
+    ws = workspace if workspace is not None else PairWorkspace()
+    n = len(s1)
+    dates = s1.index
+    x1 = s1.to_numpy(dtype=float)  # no copy for float64 columns
+    x2 = s2.to_numpy(dtype=float)
+    with span("backtest.rolling_stats"):
+        spread = np.multiply(beta, x2, out=ws.array("spread", n))
+        np.subtract(x1, spread, out=spread)
+        spread_series = pd.Series(spread, index=dates, copy=False)
+        rolling = spread_series.rolling(lookback)
+        z = ws.array("zscore", n)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            np.subtract(spread, rolling.mean().to_numpy(), out=z)
+            np.divide(z, rolling.std().to_numpy(), out=z)
+
+    with span("backtest.positions"):
+        pos, legs = simulate_positions(z, entry_z, exit_z)
+
+    with span("backtest.returns"):
+        ret1 = pct_change_into(x1, ws.array("ret1", n))
+        ret2 = pct_change_into(x2, ws.array("ret2", n))
+        strat = strategy_returns(pos, ret1, ret2, beta, out=ws.array("strat", n))
+        trades = build_trades(dates, z, strat, legs)
+
+    with span("backtest.stats"):
+        strat_ret_series = pd.Series(strat, index=dates, copy=False)
+        pos_series = pd.Series(pos.astype(np.int64), index=dates, copy=False)
+        equity = ws.array("equity", n)
+        np.copyto(equity, strat)
+        equity[np.isnan(equity)] = 0.0
+        np.add(equity, 1.0, out=equity)
+        np.cumprod(equity, out=equity)
+        equity = pd.Series(equity, index=dates, copy=False)
+        stats = compute_stats(strat_ret_series, equity, trades, annual_days)
+
+    return PairBacktest(
+        spread=spread_series,
+        zscore=pd.Series(z, index=dates, copy=False),
+        strategy_return=strat_ret_series,
+        position=pos_series,
+        equity=equity,
+        trades=trades,
+        stats=stats,
+    )
+
+
+def results_frame(bt: PairBacktest) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "equity": bt.equity,
+            "strategy_return": bt.strategy_return,
+            "position": bt.position,
+            "spread": bt.spread,
+            "zscore": bt.zscore,
+        }
+    )
+
+
+def trades_frame(bt: PairBacktest) -> pd.DataFrame:
+    return pd.DataFrame([t.__dict__ for t in bt.trades])
+
+
+# -----------------------------
+# PARAMETER SWEEP
+# -----------------------------
+def batch_metrics(strat: np.ndarray, annual_days: int = ANNUAL_TRADING_DAYS) -> dict:
+    """
+    Column-wise Sharpe / cumulative return / max drawdown for a (bars x runs)
+    matrix of strategy returns, using the same definitions as compute_stats.
+    """
+    finite = np.isfinite(strat)
+    count = finite.sum(axis=0)
+    clean = np.where(finite, strat, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_ret = clean.sum(axis=0) / count
+        dev = np.where(finite, strat - mean_ret, 0.0)
+        vol_ret = np.sqrt((dev ** 2).sum(axis=0) / (count - 1))
+        sharpe = np.where(vol_ret != 0, np.sqrt(annual_days) * mean_ret / vol_ret, np.nan)
+
+        equity = np.cumprod(1 + np.where(np.isnan(strat), 0.0, strat), axis=0)
+        cum_return = equity[-1] - 1.0
+        max_dd = (equity / np.maximum.accumulate(equity, axis=0) - 1.0).min(axis=0)
+
+    enough = count > 1
+    return {
+        "sharpe_ratio": np.where(enough, sharpe, np.nan),
+        "cumulative_return": np.where(enough, cum_return, 0.0),
+        "max_drawdown": np.where(enough, max_dd, np.nan),
+    }
+
+
+def sweep_pair(
+    s1: pd.Series,
+    s2: pd.Series,
+    beta,
+    lookbacks: List[int],
+    entry_zs: List[float],
+    exit_zs: List[float],
+    annual_days: int = ANNUAL_TRADING_DAYS,
+    progress=None,
+) -> dict:
+    """
+    Evaluate a lookback x entry_z x exit_z grid for one pair.
+
+    The spread and returns are built once, the rolling z-score once per
+    lookback, and every entry/exit combination for that lookback is scored
+    as one (bars x combos) matrix. Returns metric arrays shaped
+    (len(lookbacks), len(entry_zs), len(exit_zs)). `progress(done, total)`
+    is called after every lookback.
+    """
+    spread = s1 - beta * s2
+    ret1 = s1.pct_change().to_numpy(dtype=float)
+    ret2 = s2.pct_change().to_numpy(dtype=float)
+    with np.errstate(invalid="ignore"):
+        base = ret1 - (np.nan_to_num(beta) if np.ndim(beta) else beta) * ret2
+    base[np.isnan(ret1) | np.isnan(ret2)] = 0.0
+    if len(base):
+        base[0] = 0.0
+
+    n = len(spread)
+    shape = (len(lookbacks), len(entry_zs), len(exit_zs))
+    out = {
+        "sharpe_ratio": np.full(shape, np.nan),
+        "cumulative_return": np.zeros(shape),
+        "max_drawdown": np.full(shape, np.nan),
+        "num_trades": np.zeros(shape, dtype=np.int64),
+    }
+    positions = np.empty((n, len(entry_zs) * len(exit_zs)), dtype=np.int8)
+
+    for li, lookback in enumerate(lookbacks):
+        z = rolling_zscore(spread, lookback).to_numpy(dtype=float)
+        exits = [exit_table(z, x) for x in exit_zs]
+        for ei, entry in enumerate(entry_zs):
+            entries = entry_table(z, entry)
+            for xi, exit_events in enumerate(exits):
+                pos, legs = walk_events(n, entries, exit_events)
+                positions[:, ei * len(exit_zs) + xi] = pos
+                open_trade = bool(legs) and legs[-1][2] is None
+                out["num_trades"][li, ei, xi] = len(legs) - open_trade
+
+        with np.errstate(invalid="ignore"):
+            strat = positions * base[:, None]
+        for key, values in batch_metrics(strat, annual_days).items():
+            out[key][li] = values.reshape(shape[1:])
+        if progress is not None:
+            progress(li + 1, len(lookbacks))
+
+    return out
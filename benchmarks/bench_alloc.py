@@ -0,0 +1,134 @@
+"""
+Per-request allocations of the pair backtest path, and what a float32 store costs in precision.
+
+    python -m benchmarks.bench_alloc [--tickers 500] [--bars 20000] [--requests 50] [--pairs 100]
+
+For a float64 and a float32 price store of the same universe:
+
+- slicing: bytes allocated (tracemalloc peak) and time to cut a pair and a
+  date range out of the mapped matrix, slice_pair's binary search + column
+  views against the copy-and-mask selection it replaced;
+- backtest: allocation peak and time of run_pair_backtest with a fresh
+  workspace per request against one reused workspace;
+- store: matrix size, and for float32 the largest z-score / metric
+  differences against float64 plus how many pairs keep identical trades.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from backtest_engine import PairWorkspace, metrics_summary, run_pair_backtest
+from benchmarks.synthetic import make_universe
+from hedge import static_beta
+from price_store import PriceStore, write_store
+
+
+def _traced(fn, repeat: int) -> tuple:
+    """(last result, mean ms, mean tracemalloc peak MB above the start) over `repeat` calls after a warm-up."""
+    fn()  # imports, index hash tables and other one-off caches
+    peaks, elapsed, result = [], 0.0, None
+    for _ in range(repeat):
+        tracemalloc.start()
+        started = time.perf_counter()
+        result = fn()
+        elapsed += time.perf_counter() - started
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return result, round(elapsed / repeat * 1000.0, 3), round(float(np.mean(peaks)) / 2**20, 3)
+
+
+def _copy_and_mask(prices, t1, t2, start, end):
+    # the selection slice_pair used to do: a two-column copy, then two boolean masks
+    data = prices[[t1, t2]]
+    data = data[data.index >= start]
+    data = data[data.index <= end]
+    return data[t1], data[t2]
+
+
+def _views(prices, t1, t2, start, end):
+    from api_server import slice_pair
+
+    return slice_pair(prices, t1, t2, start, end, 0)
+
+
+def run(n_tickers: int, n_bars: int, requests: int, n_pairs: int, seed: int = 0) -> dict:
+    prices = make_universe(n_tickers, n_bars, seed=seed)
+    cols = list(prices.columns)
+    rng = np.random.default_rng(seed)
+    pairs = [tuple(cols[k] for k in rng.choice(n_tickers, 2, replace=False)) for _ in range(n_pairs)]
+    start, end = prices.index[n_bars // 4], prices.index[-1]
+
+    out = {"tickers": n_tickers, "bars": n_bars, "window_bars": n_bars - n_bars // 4}
+    reference = {}
+    with tempfile.TemporaryDirectory(prefix="pairs-alloc-") as root:
+        for dtype in ("float64", "float32"):
+            store_dir = os.path.join(root, dtype)
+            write_store(prices, store_dir, dtype=dtype)
+            store = PriceStore(store_dir)
+            frame = store.frame()
+            t1, t2 = pairs[0]
+            result = {"matrix_mb": round(store.values.nbytes / 2**20, 1)}
+
+            _, ms, mb = _traced(lambda: _copy_and_mask(frame, t1, t2, start, end), requests)
+            result["slice_copy_mask"] = {"ms": ms, "alloc_mb": mb}
+            (s1, s2), ms, mb = _traced(lambda: _views(frame, t1, t2, start, end), requests)
+            result["slice_views"] = {"ms": ms, "alloc_mb": mb}
+
+            beta = static_beta(s1.to_numpy(), s2.to_numpy())
+            _, ms, mb = _traced(lambda: run_pair_backtest(s1, s2, beta, 60, 2.0, 0.5), requests)
+            result["backtest_fresh_buffers"] = {"ms": ms, "alloc_mb": mb}
+            workspace = PairWorkspace()
+            _, ms, mb = _traced(
+                lambda: run_pair_backtest(s1, s2, beta, 60, 2.0, 0.5, workspace=workspace), requests
+            )
+            result["backtest_reused_buffers"] = {"ms": ms, "alloc_mb": mb}
+
+            # precision: the same pairs on both stores
+            z_diff, metric_diff, same_trades = 0.0, 0.0, 0
+            for a, b in pairs:
+                s1, s2 = _views(frame, a, b, start, end)
+                bt = run_pair_backtest(s1, s2, static_beta(s1.to_numpy(), s2.to_numpy()), 60, 2.0, 0.5)
+                z = bt.zscore.to_numpy().copy()
+                summary = metrics_summary(bt.stats)
+                trades = [t.__dict__ for t in bt.trades]
+                if dtype == "float64":
+                    reference[(a, b)] = (z, summary, trades)
+                    continue
+                ref_z, ref_summary, ref_trades = reference[(a, b)]
+                with np.errstate(invalid="ignore"):
+                    z_diff = max(z_diff, float(np.nanmax(np.abs(z - ref_z))))
+                for key in ("cumulative_return", "sharpe_ratio", "max_drawdown"):
+                    if summary[key] is not None and ref_summary[key] is not None:
+                        metric_diff = max(metric_diff, abs(summary[key] - ref_summary[key]))
+                same_trades += [(t["entry_date"], t["exit_date"]) for t in trades] == [
+                    (t["entry_date"], t["exit_date"]) for t in ref_trades
+                ]
+            if dtype == "float32":
+                result["vs_float64"] = {
+                    "max_abs_zscore_diff": z_diff,
+                    "max_abs_metric_diff": metric_diff,
+                    "pairs_with_identical_trade_dates": f"{same_trades}/{len(pairs)}",
+                }
+            del frame, store
+            out[dtype] = result
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tickers", type=int, default=500)
+    parser.add_argument("--bars", type=int, default=20000)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--pairs", type=int, default=100)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.tickers, args.bars, args.requests, args.pairs)))
+
+
+if __name__ == "__main__":
+    main()
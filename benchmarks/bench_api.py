@@ -0,0 +1,131 @@
+"""
+API latency under concurrent clients, in-process (needs httpx).
+
+    python -m benchmarks.bench_api [--tickers 100] [--bars 2000] [--clients 8] [--requests 200]
+
+Serves a synthetic universe through api_server's ASGI app and, endpoint by
+endpoint, has `clients` concurrent clients issue `requests` requests in
+total. Requests pick random pairs and parameters, so most miss the result
+cache; "pair_repeat" asks for one pair over and over to time the cached
+path. Reports p50 / p99 / mean / max latency, errors and cache hit rate.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import httpx
+
+from benchmarks.harness import load_api, percentiles, prepare_universe, reset_cache, workspace
+
+CLIENTS = 8
+REQUESTS = 200
+PORTFOLIO_PAIRS = 20
+
+
+def endpoints(pair_ids: list) -> dict:
+    """{name: make(rng) -> (method, path, json body or None)}"""
+
+    def backtest_body(rng):
+        t1, t2 = rng.choice(pair_ids).split("-")
+        return {
+            "ticker1": t1,
+            "ticker2": t2,
+            "lookback": rng.randint(20, 120),
+            "entry_z": rng.choice([1.5, 2.0, 2.5]),
+            "exit_z": rng.choice([0.0, 0.5]),
+        }
+
+    def sweep_body(rng):
+        body = backtest_body(rng)
+        return {
+            "ticker1": body["ticker1"],
+            "ticker2": body["ticker2"],
+            "lookbacks": [20, 40, 60, 90],
+            "entry_zs": [1.5, 2.0, 2.5],
+            "exit_zs": [0.0, 0.5],
+        }
+
+    return {
+        "universe": lambda rng: ("GET", "/api/universe", None),
+        "pairs": lambda rng: ("GET", "/api/pairs", None),
+        "pair": lambda rng: ("GET", f"/api/pair/{rng.choice(pair_ids)}", None),
+        "pair_repeat": lambda rng: ("GET", f"/api/pair/{pair_ids[0]}", None),
+        "backtest": lambda rng: ("POST", "/api/backtest", backtest_body(rng)),
+        "backtest_sweep": lambda rng: ("POST", "/api/backtest/sweep", sweep_body(rng)),
+        "portfolio_backtest": lambda rng: (
+            "POST",
+            "/api/portfolio/backtest",
+            {"max_pairs": PORTFOLIO_PAIRS, "lookback": rng.randint(20, 120)},
+        ),
+    }
+
+
+async def _hammer(app, make, clients: int, requests: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    work = [make(rng) for _ in range(requests)]
+    latencies, errors, hits = [], 0, 0
+
+    async def client(http):
+        nonlocal errors, hits
+        while work:
+            method, path, body = work.pop()
+            started = time.perf_counter()
+            resp = await http.request(method, path, json=body)
+            latencies.append(time.perf_counter() - started)
+            if resp.status_code >= 400:
+                errors += 1
+            if resp.headers.get("x-cache") == "HIT":
+                hits += 1
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        started = time.perf_counter()
+        await asyncio.gather(*(client(http) for _ in range(clients)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "requests": requests,
+        "clients": clients,
+        **percentiles(latencies),
+        "throughput_rps": round(requests / elapsed, 1),
+        "errors": errors,
+        "cache_hit_rate": round(hits / requests, 3) if requests else None,
+    }
+
+
+def run_clients(api, clients: int = CLIENTS, requests: int = REQUESTS, seed: int = 0) -> dict:
+    """Latency per endpoint against the loaded API; the result cache starts empty for each."""
+    pair_ids = [p["id"] for p in api.SNAPSHOTS.current().pairs]
+    if not pair_ids:
+        raise RuntimeError("The synthetic universe has no cointegrated pairs to request.")
+
+    out = {}
+    for k, (name, make) in enumerate(endpoints(pair_ids).items()):
+        reset_cache(api)
+        out[name] = asyncio.run(_hammer(api.app, make, clients, requests, seed + k))
+    return out
+
+
+def run(n_tickers: int, n_bars: int, clients: int = CLIENTS, requests: int = REQUESTS, seed: int = 0) -> dict:
+    universe = prepare_universe(n_tickers, n_bars, seed=seed)
+    with workspace(universe):
+        api = load_api(universe)
+        latency = run_clients(api, clients, requests, seed)
+    return {"tickers": n_tickers, "bars": n_bars, "clients": clients, "api": latency}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tickers", type=int, default=100)
+    parser.add_argument("--bars", type=int, default=2000)
+    parser.add_argument("--clients", type=int, default=CLIENTS)
+    parser.add_argument("--requests", type=int, default=REQUESTS)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.tickers, args.bars, args.clients, args.requests)))
+
+
+if __name__ == "__main__":
+    main()
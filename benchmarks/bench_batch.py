@@ -0,0 +1,80 @@
+"""
+Ranking many pairs: one POST /api/backtest/batch against one /api/backtest per pair.
+
+    python -m benchmarks.bench_batch [--tickers 100] [--bars 2500] [--pairs 300] [--workers 1 4]
+
+Serves a synthetic universe in-process and backtests `pairs` pairs with
+shared parameters, once as separate /api/backtest calls (result cache
+emptied first) and once per worker count as a single streamed batch
+request. Reports wall time, pairs per second and whether the batch metrics
+equal the per-pair ones.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+from benchmarks.harness import load_api, prepare_universe, reset_cache, workspace
+
+PARAMS = {"lookback": 40, "entry_z": 2.0, "exit_z": 0.5}
+
+
+async def _single(api, pairs: list) -> tuple:
+    transport = httpx.ASGITransport(app=api.app)
+    metrics = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        started = time.perf_counter()
+        for t1, t2 in pairs:
+            resp = await http.post("/api/backtest", json={"ticker1": t1, "ticker2": t2, **PARAMS})
+            metrics[f"{t1}-{t2}"] = resp.json()["metrics"]
+    return time.perf_counter() - started, metrics
+
+
+async def _batch(api, pairs: list) -> tuple:
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as http:
+        started = time.perf_counter()
+        resp = await http.post("/api/backtest/batch", json={"pairs": [f"{a}-{b}" for a, b in pairs], **PARAMS})
+        rows = [json.loads(line) for line in resp.text.splitlines()]
+    return time.perf_counter() - started, {row.pop("id"): row for row in rows}
+
+
+def run(n_tickers: int, n_bars: int, n_pairs: int, worker_counts: list, seed: int = 0) -> dict:
+    universe = prepare_universe(n_tickers, n_bars, seed=seed)
+    pairs = universe.bench_pairs(n_pairs)
+    out = {"tickers": n_tickers, "bars": n_bars, "pairs": len(pairs)}
+    with workspace(universe):
+        api = load_api(universe)
+        reset_cache(api)
+        single_s, single = asyncio.run(_single(api, pairs))
+        out["per_pair_requests"] = {"seconds": round(single_s, 3), "pairs_per_s": round(len(pairs) / single_s, 1)}
+
+        for workers in worker_counts:
+            api.BATCH_WORKERS = workers
+            batch_s, batch = asyncio.run(_batch(api, pairs))
+            out[f"batch_{workers}_workers"] = {
+                "seconds": round(batch_s, 3),
+                "pairs_per_s": round(len(pairs) / batch_s, 1),
+                "speedup": round(single_s / batch_s, 2),
+                "identical": batch == single,
+            }
+        if api._BATCH_POOL is not None:
+            api._BATCH_POOL.shutdown()
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tickers", type=int, default=100)
+    parser.add_argument("--bars", type=int, default=2500)
+    parser.add_argument("--pairs", type=int, default=300)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.tickers, args.bars, args.pairs, args.workers)))
+
+
+if __name__ == "__main__":
+    main()
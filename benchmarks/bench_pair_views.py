@@ -0,0 +1,80 @@
+"""
+/api/pair served from precomputed views against the live backtest.
+
+    python -m benchmarks.bench_pair_views [--tickers 200] [--bars 2500] [--requests 200]
+
+Builds the default views of every cointegrated pair of a synthetic universe
+(timed, with the size on disk), then asks for random cointegrated pairs
+with the result cache emptied before each request, once with the views and
+once with them dropped from the snapshot (the live fallback). Reports
+p50 / p99 / mean latency of both and checks the payloads are identical.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+
+import httpx
+
+from benchmarks.harness import load_api, measure, percentiles, prepare_universe, quiet, reset_cache, workspace
+
+
+async def _fetch(api, paths: list) -> tuple:
+    latencies, bodies = [], []
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        for path in paths:
+            reset_cache(api)
+            started = time.perf_counter()
+            resp = await http.get(path)
+            latencies.append(time.perf_counter() - started)
+            bodies.append(resp.json())
+    return latencies, bodies
+
+
+def run(n_tickers: int, n_bars: int, requests: int, seed: int = 0) -> dict:
+    from pair_views import VIEWS_DIR, build_views
+
+    universe = prepare_universe(n_tickers, n_bars, seed=seed)
+    out = {"tickers": n_tickers, "bars": n_bars, "pairs": len(universe.good_pairs)}
+    with workspace(universe):
+        _, out["build"] = measure(quiet, build_views)
+        out["views_mb"] = round(
+            sum(os.path.getsize(os.path.join(VIEWS_DIR, f)) for f in os.listdir(VIEWS_DIR)) / 2**20, 1
+        )
+        api = load_api(universe)
+        snap = api.SNAPSHOTS.current()
+        views = snap.views
+
+        rng = random.Random(seed)
+        ids = [f"{a}-{b}" for a, b in zip(universe.good_pairs["ticker1"], universe.good_pairs["ticker2"])]
+        paths = [f"/api/pair/{rng.choice(ids)}" for _ in range(requests)]
+
+        lookup, precomputed = asyncio.run(_fetch(api, paths))
+        object.__setattr__(snap, "views", None)  # snapshots are frozen; force the live path
+        try:
+            live, computed = asyncio.run(_fetch(api, paths))
+        finally:
+            object.__setattr__(snap, "views", views)
+
+    out["precomputed"] = percentiles(lookup)
+    out["live"] = percentiles(live)
+    out["identical"] = precomputed == computed
+    out["speedup"] = round(out["live"]["mean_ms"] / out["precomputed"]["mean_ms"], 1)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tickers", type=int, default=200)
+    parser.add_argument("--bars", type=int, default=2500)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.tickers, args.bars, args.requests)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Stage timings and peak memory for the research pipeline on synthetic data.
+
+    python -m benchmarks.bench_pipeline [--tickers 10 100] [--bars 2000 20000]
+
+For every (tickers, bars) combination: generate the universe, scan it for
+cointegrated pairs, write it out as the API's data files, build the API
+snapshot, then run half-lives (per pair and batched), single-pair
+backtests, one parameter sweep and one portfolio backtest. Each stage
+reports wall time, peak RSS and RSS growth; one JSON line per combination.
+"""
+import argparse
+import json
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.harness import MAX_SCAN_PAIRS, load_api, measure, prepare_universe, workspace
+
+BACKTEST_PAIRS = 20
+PORTFOLIO_PAIRS = 200
+SWEEP_GRID = ([20, 40, 60, 90, 120], [1.5, 2.0, 2.5], [0.0, 0.5])
+
+
+def _half_lives_loop(api, spreads: np.ndarray):
+    return [api.compute_half_life(pd.Series(spreads[:, k])) for k in range(spreads.shape[1])]
+
+
+def _backtest_loop(api, prices, pairs):
+    for t1, t2 in pairs:
+        api.backtest_pair(prices, t1, t2)
+
+
+def run_stages(api, universe, backtest_pairs: int = BACKTEST_PAIRS, portfolio_pairs: int = PORTFOLIO_PAIRS) -> dict:
+    """Time the pipeline stages against the loaded API; returns {stage: measurement}."""
+    prices = api.SNAPSHOTS.current().prices
+    stages = {}
+
+    pairs = universe.bench_pairs(backtest_pairs)
+    y = prices[[t1 for t1, _ in pairs]].to_numpy(dtype=float)
+    x = prices[[t2 for _, t2 in pairs]].to_numpy(dtype=float)
+    betas = np.array([api.compute_hedge_ratio(prices[t1], prices[t2]) for t1, t2 in pairs])
+    spreads = y - x * betas
+
+    _, stages["compute_half_life"] = measure(_half_lives_loop, api, spreads)
+    _, stages["compute_half_lives"] = measure(api.compute_half_lives, spreads)
+    _, stages["backtest_pair"] = measure(_backtest_loop, api, prices, pairs)
+    for name in ("compute_half_life", "compute_half_lives", "backtest_pair"):
+        stages[name]["pairs"] = len(pairs)
+    stages["backtest_pair"]["ms_per_pair"] = round(
+        stages["backtest_pair"]["seconds"] / max(len(pairs), 1) * 1000, 2
+    )
+
+    lookbacks, entry_zs, exit_zs = SWEEP_GRID
+    t1, t2 = pairs[0]
+    _, stages["sweep_backtest"] = measure(api.sweep_backtest, prices, t1, t2, lookbacks, entry_zs, exit_zs)
+    stages["sweep_backtest"]["cells"] = len(lookbacks) * len(entry_zs) * len(exit_zs)
+
+    basket = universe.bench_pairs(portfolio_pairs)
+    _, stages["portfolio_backtest"] = measure(api.portfolio_backtest, prices, basket)
+    stages["portfolio_backtest"]["pairs"] = len(basket)
+    return stages
+
+
+def run(
+    n_tickers: int,
+    n_bars: int,
+    max_scan_pairs: int = MAX_SCAN_PAIRS,
+    engine: str = "batched",
+    workers: int = None,
+    seed: int = 0,
+) -> dict:
+    universe = prepare_universe(n_tickers, n_bars, max_scan_pairs, engine, workers, seed)
+    with workspace(universe):
+        api = load_api(universe)
+        stages = run_stages(api, universe)
+    return {"tickers": n_tickers, "bars": n_bars, "stages": {**universe.stages, **stages}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tickers", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--bars", type=int, nargs="+", default=[2000, 20000])
+    parser.add_argument("--max-scan-pairs", type=int, default=MAX_SCAN_PAIRS)
+    parser.add_argument("--engine", choices=["batched", "statsmodels"], default="batched")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    for n in args.tickers:
+        for bars in args.bars:
+            print(json.dumps(run(n, bars, args.max_scan_pairs, args.engine, args.workers)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Candidate pruning ahead of the cointegration scan.
+
+    python -m benchmarks.bench_prefilter [--tickers 200 1000] [--bars 2500] [--full-scan-max 300]
+
+For each universe size: time prefilter.prune_pairs under a few filter
+settings, report what each filter removed, then scan the survivors with
+the batched Engle-Granger engine. Recall is measured against the pairs the
+synthetic universe planted as cointegrated and, for universes up to
+--full-scan-max tickers, against the p < 0.05 pairs of a full scan (whose
+runtime is otherwise extrapolated from the pruned scan's per-pair rate).
+"""
+import argparse
+import json
+import time
+
+from benchmarks.harness import quiet
+from benchmarks.synthetic import make_universe, planted_pairs
+from prefilter import PRUNE_DEFAULTS, prune_pairs
+from scanner import scan_pairs
+
+SETTINGS = {
+    "default": PRUNE_DEFAULTS,
+    "clusters": {"n_clusters": None},  # filled in per universe: one cluster per ~10 tickers
+    "corr+ssd": {**PRUNE_DEFAULTS, "ssd_keep": 0.75},
+}
+
+
+def _scan(prices, pairs):
+    started = time.perf_counter()
+    _, good = quiet(scan_pairs, prices, engine="batched", workers=1, chunk_size=10_000, pairs=pairs)
+    return time.perf_counter() - started, set(zip(good["ticker1"], good["ticker2"]))
+
+
+def _recall(found: set, truth: set):
+    return round(len(found & truth) / len(truth), 4) if truth else None
+
+
+def run(n_tickers: int, n_bars: int, full_scan_max: int = 300, seed: int = 0) -> dict:
+    prices = make_universe(n_tickers, n_bars, seed=seed)
+    planted = planted_pairs(n_tickers, n_bars, seed=seed)
+    n_pairs = n_tickers * (n_tickers - 1) // 2
+
+    full_s, full_good = None, None
+    if n_tickers <= full_scan_max:
+        full_s, full_good = _scan(prices, None)
+
+    results = {}
+    for name, kwargs in SETTINGS.items():
+        if name == "clusters":
+            kwargs = {"n_clusters": max(1, n_tickers // 10)}
+        started = time.perf_counter()
+        pairs, report = quiet(prune_pairs, prices, **kwargs)
+        prune_s = time.perf_counter() - started
+        scan_s, good = _scan(prices, pairs)
+        kept = set(pairs)
+        results[name] = {
+            "filters": kwargs,
+            "report": report,
+            "kept": len(pairs),
+            "prune_s": round(prune_s, 3),
+            "scan_s": round(scan_s, 3),
+            "planted_recall": _recall(kept, planted),
+            "full_scan_recall": _recall(good, full_good) if full_good is not None else None,
+            "full_scan_est_s": round(scan_s / len(pairs) * n_pairs, 1) if pairs and full_s is None else None,
+        }
+
+    return {
+        "tickers": n_tickers,
+        "bars": n_bars,
+        "pairs": n_pairs,
+        "planted_pairs": len(planted),
+        "full_scan_s": round(full_s, 3) if full_s is not None else None,
+        "settings": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tickers", type=int, nargs="+", default=[200, 1000])
+    parser.add_argument("--bars", type=int, default=2500)
+    parser.add_argument("--full-scan-max", type=int, default=300)
+    args = parser.parse_args()
+
+    for n in args.tickers:
+        print(json.dumps(run(n, args.bars, args.full_scan_max)))
+
+
+if __name__ == "__main__":
+    main()
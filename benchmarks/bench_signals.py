@@ -0,0 +1,72 @@
+"""
+Per-bar cost of the live signal engine against re-running the backtest.
+
+    python -m benchmarks.bench_signals [--pairs 100 1000 10000] [--bars 2500] [--updates 500]
+
+Warms a SignalEngine on `bars` of history, then times `updates` further
+bars (one vectorized update over all pairs each). The baseline is what the
+engine replaces: run_pair_backtest over the full history for every pair on
+every bar, timed on a few pairs and scaled to all of them.
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from backtest_engine import run_pair_backtest
+from benchmarks.harness import percentiles
+from benchmarks.synthetic import make_universe
+from signals import SIGNAL_ENTRY_Z, SIGNAL_EXIT_Z, SIGNAL_LOOKBACK, SignalEngine
+
+BASELINE_PAIRS = 5
+
+
+def run(n_pairs: int, n_bars: int, updates: int, seed: int = 0) -> dict:
+    n_tickers = int(np.ceil((1 + np.sqrt(1 + 8 * n_pairs)) / 2))
+    prices = make_universe(n_tickers, n_bars + updates, seed=seed)
+    cols = list(prices.columns)
+    pairs = [(cols[i], cols[j]) for i in range(n_tickers) for j in range(i + 1, n_tickers)][:n_pairs]
+
+    history = prices.iloc[:n_bars]
+    started = time.perf_counter()
+    engine = SignalEngine.from_history(history, pairs)
+    warm_s = time.perf_counter() - started
+
+    latencies = []
+    signals = 0
+    for ts, row in zip(prices.index[n_bars:], prices.to_numpy()[n_bars:]):
+        started = time.perf_counter()
+        signals += len(engine.update(row, ts))
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for (a, b), beta in list(zip(pairs, engine.betas))[:BASELINE_PAIRS]:
+        run_pair_backtest(prices[a], prices[b], beta, SIGNAL_LOOKBACK, SIGNAL_ENTRY_Z, SIGNAL_EXIT_Z)
+    rerun_ms = (time.perf_counter() - started) / min(BASELINE_PAIRS, n_pairs) * n_pairs * 1000.0
+
+    update = percentiles(latencies)
+    return {
+        "pairs": n_pairs,
+        "bars": n_bars,
+        "warm_s": round(warm_s, 3),
+        "update": update,
+        "signals": signals,
+        "rerun_per_bar_ms_est": round(rerun_ms, 1),
+        "speedup": round(rerun_ms / update["mean_ms"], 1) if update["mean_ms"] else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pairs", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--bars", type=int, default=2500)
+    parser.add_argument("--updates", type=int, default=500)
+    args = parser.parse_args()
+
+    for n in args.pairs:
+        print(json.dumps(run(n, args.bars, args.updates)))
+
+
+if __name__ == "__main__":
+    main()
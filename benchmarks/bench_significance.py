@@ -0,0 +1,78 @@
+"""
+Significance resamples scored as one matrix against one backtest-style pass per resample.
+
+    python -m benchmarks.bench_significance [--bars 2500] [--resamples 200 2000 10000] [--naive 200]
+
+On a synthetic pair, times pair_significance for each resample count (both
+methods), and for `naive` resamples the loop it replaces: every resampled
+return path scored on its own with compute_stats, as a per-resample
+backtest would. Reports resamples per second and checks that the batched
+metrics equal the per-resample ones.
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from backtest_engine import ANNUAL_TRADING_DAYS, batch_metrics, compute_stats, run_pair_backtest
+from benchmarks.synthetic import make_universe
+from hedge import static_beta
+from significance import pair_significance, stationary_bootstrap_indices
+
+
+def _naive(strat: np.ndarray, resamples: int, block: float, seed: int) -> tuple:
+    rng = np.random.default_rng(seed)
+    idx = stationary_bootstrap_indices(len(strat), resamples, block, rng)
+    started = time.perf_counter()
+    sharpe = []
+    for row in idx:
+        ret = pd.Series(strat[row])
+        stats = compute_stats(ret, (1.0 + ret).cumprod(), [], ANNUAL_TRADING_DAYS)
+        sharpe.append(stats["sharpe_ratio"])
+    elapsed = time.perf_counter() - started
+    started = time.perf_counter()
+    batched = batch_metrics(strat[idx].T, ANNUAL_TRADING_DAYS)["sharpe_ratio"]
+    return elapsed, time.perf_counter() - started, float(np.nanmax(np.abs(np.array(sharpe) - batched)))
+
+
+def run(n_bars: int, counts: list, naive: int, seed: int = 0) -> dict:
+    prices = make_universe(20, n_bars, seed=seed)
+    s1, s2 = prices.iloc[:, 0], prices.iloc[:, 1]
+    beta = static_beta(s1.to_numpy(), s2.to_numpy())
+    out = {"bars": n_bars}
+
+    for resamples in counts:
+        started = time.perf_counter()
+        pair_significance(s1, s2, beta, resamples=resamples, seed=seed)
+        elapsed = time.perf_counter() - started
+        out[f"resamples_{resamples}"] = {
+            "seconds": round(elapsed, 3),
+            "resamples_per_s": round(2 * resamples / elapsed, 1),  # bootstrap + permutation
+        }
+
+    strat = run_pair_backtest(s1, s2, beta, 60, 2.0, 0.5).strategy_return.to_numpy(dtype=float)
+    loop_s, batch_s, diff = _naive(strat, naive, max(1.0, round(n_bars ** (1.0 / 3.0))), seed)
+    out["per_resample_loop"] = {
+        "resamples": naive,
+        "loop_seconds": round(loop_s, 3),
+        "batched_seconds": round(batch_s, 4),
+        "speedup": round(loop_s / batch_s, 1),
+        "max_abs_sharpe_diff": diff,
+    }
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bars", type=int, default=2500)
+    parser.add_argument("--resamples", type=int, nargs="+", default=[200, 2000, 10000])
+    parser.add_argument("--naive", type=int, default=200)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.bars, args.resamples, args.naive)))
+
+
+if __name__ == "__main__":
+    main()
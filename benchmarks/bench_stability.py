@@ -0,0 +1,91 @@
+"""
+Rolling cointegration stability: running-sum windows against testing every window from scratch.
+
+    python -m benchmarks.bench_stability [--bars 2500] [--window 252] [--sample 200] [--pairs 50] [--workers 1 4]
+
+On a synthetic pair, times rolling_coint over every window ending at each
+bar against coint_batch.coint_anchor and statsmodels coint on each window
+(the latter two on `sample` evenly spaced windows, scaled up to all of
+them), and reports the largest statistic difference. Then times
+pairs_stability over `pairs` pairs for each worker count.
+"""
+import argparse
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import make_universe
+from coint_batch import coint_anchor
+from stability import pairs_stability, rolling_coint
+
+
+def _per_window(test, y, x, window, ends) -> tuple:
+    started = time.perf_counter()
+    scores = np.array([test(y[e - window + 1:e + 1], x[e - window + 1:e + 1]) for e in ends])
+    return time.perf_counter() - started, scores
+
+
+def run(n_bars: int, window: int, sample: int, n_pairs: int, worker_counts: list, seed: int = 0) -> dict:
+    from statsmodels.tsa.stattools import coint
+
+    prices = make_universe(max(20, n_pairs // 2), n_bars, seed=seed)
+    y, x = prices.iloc[:, 0].to_numpy(), prices.iloc[:, 1].to_numpy()
+    out = {"bars": n_bars, "window": window}
+
+    started = time.perf_counter()
+    ends, scores, _, _ = rolling_coint(y, x, window)
+    rolling_s = time.perf_counter() - started
+    out["windows"] = len(ends)
+    out["rolling"] = {"seconds": round(rolling_s, 3), "windows_per_s": round(len(ends) / rolling_s, 1)}
+
+    picked = np.linspace(0, len(ends) - 1, min(sample, len(ends))).astype(int)
+    for name, test in (
+        ("coint_anchor_per_window", lambda a, b: coint_anchor(a, b[:, None])[0][0]),
+        ("statsmodels_per_window", lambda a, b: coint(a, b)[0]),
+    ):
+        elapsed, ref = _per_window(test, y, x, window, ends[picked])
+        estimate = elapsed / len(picked) * len(ends)
+        out[name] = {
+            "seconds_all_windows": round(estimate, 2),
+            "speedup": round(estimate / rolling_s, 1),
+            "max_abs_stat_diff": float(np.max(np.abs(scores[picked] - ref))),
+        }
+
+    cols = list(prices.columns)
+    pairs = pd.DataFrame(
+        [(cols[i], cols[j]) for i in range(len(cols)) for j in range(i + 1, len(cols))][:n_pairs],
+        columns=["ticker1", "ticker2"],
+    )
+    for workers in worker_counts:
+        started = time.perf_counter()
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                pairs_stability(prices, pairs, window, executor=pool)
+        else:
+            pairs_stability(prices, pairs, window)
+        elapsed = time.perf_counter() - started
+        out[f"pairs_{workers}_workers"] = {
+            "pairs": len(pairs),
+            "seconds": round(elapsed, 3),
+            "pairs_per_s": round(len(pairs) / elapsed, 1),
+        }
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bars", type=int, default=2500)
+    parser.add_argument("--window", type=int, default=252)
+    parser.add_argument("--sample", type=int, default=200)
+    parser.add_argument("--pairs", type=int, default=50)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.bars, args.window, args.sample, args.pairs, args.workers)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Cold-start time of the API worker and the data-refresh CLI.
+
+    python -m benchmarks.bench_startup [--tickers 100] [--bars 2500] [--repeat 5]
+
+Every measurement runs in a fresh interpreter (so nothing is cached in
+sys.modules) inside a workspace holding a synthetic universe:
+
+- api: `import api_server`, then the first snapshot load, then the first
+  /api/pairs request through the ASGI app.
+- refresh_import: importing the refresh pipeline modules.
+- refresh_cli: `python manage_data.py --help`, end to end.
+
+Reports the median and best of `repeat` runs, the bare interpreter start
+time for reference, and which heavy libraries each path ended up importing
+(none of matplotlib / seaborn / statsmodels / yfinance should appear).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.harness import prepare_universe, workspace
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ("matplotlib", "seaborn", "statsmodels", "yfinance", "scipy")
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+{body}
+heavy = sorted(m for m in {heavy!r} if m in sys.modules)
+print(json.dumps({{**marks, "heavy_modules": heavy}}))
+"""
+
+API_BODY = """
+import api_server
+marks = {"import_s": time.perf_counter() - started}
+api_server.SNAPSHOTS.current()
+marks["first_load_s"] = time.perf_counter() - started - marks["import_s"]
+from fastapi.testclient import TestClient
+with TestClient(api_server.app) as client:
+    mark = time.perf_counter()
+    client.get("/api/pairs").raise_for_status()
+    marks["first_request_s"] = time.perf_counter() - mark
+marks["ready_s"] = time.perf_counter() - started
+"""
+
+REFRESH_BODY = """
+import data_refresh, stat_arb_pairs, manage_data
+marks = {"import_s": time.perf_counter() - started}
+"""
+
+
+def _child(args, env) -> tuple:
+    started = time.perf_counter()
+    out = subprocess.run(args, capture_output=True, text=True, env=env, check=True)
+    wall = time.perf_counter() - started
+    lines = [line for line in out.stdout.splitlines() if line.startswith("{")]
+    return wall, (json.loads(lines[-1]) if lines else {})
+
+
+def _summary(samples: list) -> dict:
+    keys = [k for k, v in samples[0].items() if isinstance(v, float)]
+    out = {}
+    for key in keys:
+        values = [s[key] for s in samples]
+        out[key] = {"median": round(statistics.median(values), 4), "best": round(min(values), 4)}
+    if "heavy_modules" in samples[0]:
+        out["heavy_modules"] = samples[0]["heavy_modules"]
+    return out
+
+
+def measure_startup(repeat: int = 5) -> dict:
+    """Run the probes from the current directory (a workspace with data files)."""
+    env = {**os.environ, "PYTHONPATH": REPO, "DATA_WATCH_SECONDS": "0", "DATA_PRELOAD": "0"}
+    probes = {
+        "interpreter": [sys.executable, "-c", "pass"],
+        "api": [sys.executable, "-c", _PROBE.format(body=API_BODY, heavy=HEAVY)],
+        "refresh_import": [sys.executable, "-c", _PROBE.format(body=REFRESH_BODY, heavy=HEAVY)],
+        "refresh_cli": [sys.executable, os.path.join(REPO, "manage_data.py"), "--help"],
+    }
+    results = {}
+    for name, args in probes.items():
+        samples = []
+        for _ in range(repeat):
+            wall, marks = _child(args, env)
+            samples.append({"process_s": wall, **marks})
+        results[name] = _summary(samples)
+    return results
+
+
+def run(n_tickers: int = 100, n_bars: int = 2500, repeat: int = 5) -> dict:
+    universe = prepare_universe(n_tickers, n_bars)
+    with workspace(universe):
+        startup = measure_startup(repeat)
+    return {"tickers": n_tickers, "bars": n_bars, "repeat": repeat, "startup": startup}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tickers", type=int, default=100)
+    parser.add_argument("--bars", type=int, default=2500)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.tickers, args.bars, args.repeat)))
+
+
+if __name__ == "__main__":
+    main()
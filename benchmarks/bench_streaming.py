@@ -0,0 +1,91 @@
+"""
+Chunked (out-of-core) pair backtest against the in-memory engine.
+
+    python -m benchmarks.bench_streaming [--bars 250000 1000000 4000000] [--chunk-bars 250000]
+
+For each history length: write a two-ticker synthetic minute store, run
+streaming.stream_pair_backtest over it, then load both columns and run
+the in-memory backtest. Reports time and RSS growth for both (streaming
+should stay flat as history grows) and how far the results differ:
+trades must be identical, metrics equal to rounding.
+"""
+import argparse
+import gc
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from backtest_engine import run_pair_backtest
+from benchmarks.harness import measure
+from benchmarks.synthetic import make_universe
+from hedge import HEDGE_METHODS, hedge_ratio
+from price_store import PriceStore, write_store
+from streaming import STREAM_CHUNK_BARS, stream_pair_backtest
+
+LOOKBACK, ENTRY_Z, EXIT_Z = 60, 2.0, 0.5
+
+
+def _in_memory(store: PriceStore, t1: str, t2: str, hedge_method: str):
+    prices = store.frame([t1, t2])
+    s1, s2 = prices[t1], prices[t2]
+    hedge = hedge_ratio(s1.to_numpy(), s2.to_numpy(), hedge_method)
+    return run_pair_backtest(s1, s2, hedge, LOOKBACK, ENTRY_Z, EXIT_Z)
+
+
+def _max_stat_diff(a: dict, b: dict) -> float:
+    diffs = [abs(a[k] - b[k]) for k in a if np.isfinite(a[k]) and np.isfinite(b[k])]
+    return float(max(diffs, default=0.0))
+
+
+def run(n_bars: int, chunk_bars: int = STREAM_CHUNK_BARS, hedge_method: str = "static", seed: int = 0) -> dict:
+    with tempfile.TemporaryDirectory() as store_dir:
+        prices = make_universe(2, n_bars, coint_frac=1.0, n_factors=1, seed=seed)
+        t1, t2 = prices.columns
+        write_store(prices, store_dir)
+        del prices
+        gc.collect()
+        store = PriceStore(store_dir)
+
+        streamed, stream_m = measure(
+            stream_pair_backtest, store, t1, t2, None, None, LOOKBACK, ENTRY_Z, EXIT_Z,
+            hedge_method, chunk_bars=chunk_bars,
+        )
+        gc.collect()
+        full, memory_m = measure(_in_memory, store, t1, t2, hedge_method)
+
+        same_trades = [(t.direction, t.entry_date, t.exit_date, t.bars_held) for t in streamed.trades] == [
+            (t.direction, t.entry_date, t.exit_date, t.bars_held) for t in full.trades
+        ]
+        pnl_diff = max((abs(a.pnl - b.pnl) for a, b in zip(streamed.trades, full.trades)), default=0.0)
+        store_mb = os.path.getsize(store.values.filename) / 2**20
+
+    return {
+        "bars": n_bars,
+        "chunk_bars": chunk_bars,
+        "hedge_method": hedge_method,
+        "store_mb": round(store_mb, 1),
+        "chunks": streamed.chunks,
+        "streaming": stream_m,
+        "in_memory": memory_m,
+        "trades": len(full.trades),
+        "identical_trades": same_trades,
+        "max_trade_pnl_diff": pnl_diff,
+        "max_stat_diff": _max_stat_diff(streamed.stats, full.stats),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bars", type=int, nargs="+", default=[250_000, 1_000_000, 4_000_000])
+    parser.add_argument("--chunk-bars", type=int, default=STREAM_CHUNK_BARS)
+    parser.add_argument("--hedge-method", choices=HEDGE_METHODS, default="static")
+    args = parser.parse_args()
+
+    for n_bars in args.bars:
+        print(json.dumps(run(n_bars, args.chunk_bars, args.hedge_method)))
+
+
+if __name__ == "__main__":
+    main()
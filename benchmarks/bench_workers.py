@@ -0,0 +1,135 @@
+"""
+Memory and refresh behaviour of several API worker processes sharing one
+price store.
+
+    python -m benchmarks.bench_workers [--workers 4] [--tickers 500] [--bars 20000]
+
+Starts `workers` fresh interpreters in a workspace whose store was deleted,
+so they race to convert the CSV. Each one imports api_server, builds its
+snapshot, and touches every price. The benchmark then reports:
+
+- how many store versions the workers ended up mapping (1 means one
+  process converted and the rest attached);
+- per-worker RSS, PSS and private memory, against a run where every worker
+  holds its own copy of the matrix (what per-worker CSV parsing costs);
+- whether every worker picks up a store republished by another process
+  through the version counter.
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+from benchmarks.harness import prepare_universe, workspace
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_WORKER = """
+import json, os, sys
+import api_server
+
+snap = api_server.SNAPSHOTS.current()
+prices = snap.prices.copy() if os.environ.get("BENCH_COPY") == "1" else snap.prices
+float(prices.to_numpy().sum())  # fault in every page
+
+def memory():
+    out = {}
+    with open("/proc/self/smaps_rollup") as fh:
+        for line in fh:
+            key, value = line.split(":", 1)
+            if key in ("Rss", "Pss", "Private_Clean", "Private_Dirty"):
+                out[key] = int(value.split()[0]) / 1024.0
+    return {
+        "rss_mb": round(out["Rss"], 1),
+        "pss_mb": round(out["Pss"], 1),
+        "private_mb": round(out["Private_Clean"] + out["Private_Dirty"], 1),
+    }
+
+print(json.dumps({"store_version": snap.store_version, "data_version": snap.version}), flush=True)
+for command in sys.stdin:
+    command = command.strip()
+    if command == "measure":
+        print(json.dumps(memory()), flush=True)
+    elif command == "reload":
+        api_server.SNAPSHOTS.reload()
+        api_server.SNAPSHOTS.wait()
+        snap = api_server.SNAPSHOTS.current()
+        print(json.dumps({"store_version": snap.store_version, "data_version": snap.version}), flush=True)
+    else:
+        break
+"""
+
+
+def _spawn(n: int, copy: bool) -> list:
+    env = {**os.environ, "PYTHONPATH": REPO, "DATA_WATCH_SECONDS": "0", "DATA_PRELOAD": "0",
+           "BENCH_COPY": "1" if copy else "0"}
+    return [
+        subprocess.Popen([sys.executable, "-c", _WORKER], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                         text=True, env=env)
+        for _ in range(n)
+    ]
+
+
+def _ask(procs: list, command: str = None) -> list:
+    if command is not None:
+        for p in procs:
+            p.stdin.write(command + "\n")
+            p.stdin.flush()
+    return [json.loads(p.stdout.readline()) for p in procs]
+
+
+def _stop(procs: list):
+    for p in procs:
+        p.stdin.close()
+        p.wait()
+
+
+def _summary(rows: list) -> dict:
+    return {key: round(sum(r[key] for r in rows), 1) for key in ("rss_mb", "pss_mb", "private_mb")}
+
+
+def run(n_workers: int = 4, n_tickers: int = 500, n_bars: int = 20000) -> dict:
+    from price_store import PRICES_CSV, STORE_DIR, PriceStore, store_lock, write_store
+
+    universe = prepare_universe(n_tickers, n_bars, max_scan_pairs=500)
+    out = {"workers": n_workers, "tickers": n_tickers, "bars": n_bars,
+           "matrix_mb": round(universe.prices.to_numpy().nbytes / 2**20, 1)}
+    with workspace(universe):
+        for mode, copy in (("shared", False), ("private_copy", True)):
+            shutil.rmtree(STORE_DIR)
+            procs = _spawn(n_workers, copy)
+            loaded = _ask(procs)
+            memory = _ask(procs, "measure")
+            result = {"store_versions": len({r["store_version"] for r in loaded}),
+                      "data_versions": len({r["data_version"] for r in loaded}),
+                      "total": _summary(memory), "per_worker": memory}
+
+            if mode == "shared":
+                # another process republishes (as data_refresh.save_prices does);
+                # every worker should follow the version counter
+                with store_lock(STORE_DIR):
+                    prices = universe.prices.iloc[:-1]
+                    prices.to_csv(PRICES_CSV)
+                    write_store(prices, STORE_DIR, source=PRICES_CSV)
+                published = PriceStore(STORE_DIR).version
+                reloaded = _ask(procs, "reload")
+                result["refresh_picked_up"] = all(r["store_version"] == published for r in reloaded)
+            _stop(procs)
+            out[mode] = result
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--tickers", type=int, default=500)
+    parser.add_argument("--bars", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.workers, args.tickers, args.bars)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""
+Shared plumbing for the benchmark scripts: stage timing with peak memory,
+latency percentiles, a synthetic universe written out as the API's data
+files, and run metadata for comparing results across commits.
+"""
+import contextlib
+import importlib
+import io
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import make_universe
+
+RSS_SAMPLE_SECONDS = 0.002
+MAX_SCAN_PAIRS = 5000  # beyond this the scan runs on a seeded sample of pairs
+
+
+# -----------------------------
+# MEASUREMENT
+# -----------------------------
+def _rss_bytes() -> int:
+    with open("/proc/self/statm") as fh:
+        return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+class PeakRSS:
+    """
+    Peak resident set size while the block runs, sampled on a thread.
+    Unlike tracemalloc it sees memory-mapped pages and costs nothing on the
+    measured code's allocations. Without /proc it falls back to the
+    process-wide ru_maxrss, which only moves when a new peak is reached.
+    """
+
+    def __init__(self, interval: float = RSS_SAMPLE_SECONDS):
+        self.interval = interval
+        self.start_bytes = 0
+        self.peak_bytes = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._proc = os.path.exists("/proc/self/statm")
+
+    def _sample(self) -> int:
+        if self._proc:
+            return _rss_bytes()
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self.peak_bytes = max(self.peak_bytes, self._sample())
+
+    def __enter__(self):
+        self.start_bytes = self.peak_bytes = self._sample()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_bytes = max(self.peak_bytes, self._sample())
+
+
+def measure(fn, *args, **kwargs):
+    """Run fn once; returns (result, {"seconds", "peak_rss_mb", "rss_delta_mb"})."""
+    with PeakRSS() as rss:
+        started = time.perf_counter()
+        result = fn(*args, **kwargs)
+        seconds = time.perf_counter() - started
+    return result, {
+        "seconds": round(seconds, 4),
+        "peak_rss_mb": round(rss.peak_bytes / 2**20, 1),
+        "rss_delta_mb": round((rss.peak_bytes - rss.start_bytes) / 2**20, 1),
+    }
+
+
+def percentiles(latencies) -> dict:
+    ms = np.asarray(latencies, dtype=float) * 1000.0
+    if not len(ms):
+        return {"p50_ms": None, "p99_ms": None, "mean_ms": None, "max_ms": None}
+    return {
+        "p50_ms": round(float(np.percentile(ms, 50)), 2),
+        "p99_ms": round(float(np.percentile(ms, 99)), 2),
+        "mean_ms": round(float(ms.mean()), 2),
+        "max_ms": round(float(ms.max()), 2),
+    }
+
+
+def quiet(fn, *args, **kwargs):
+    """Call fn with its progress prints swallowed."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn(*args, **kwargs)
+
+
+# -----------------------------
+# SYNTHETIC UNIVERSE
+# -----------------------------
+@dataclass
+class Universe:
+    prices: pd.DataFrame
+    all_pairs: pd.DataFrame
+    good_pairs: pd.DataFrame
+    pairs_scanned: int
+    stages: dict = field(default_factory=dict)
+
+    def bench_pairs(self, count: int) -> list:
+        """Up to `count` (t1, t2) pairs: cointegrated ones first, then the rest by p-value."""
+        rows = pd.concat([self.good_pairs, self.all_pairs]).drop_duplicates(["ticker1", "ticker2"])
+        return list(zip(rows["ticker1"], rows["ticker2"]))[:count]
+
+
+def prepare_universe(
+    n_tickers: int,
+    n_bars: int,
+    max_scan_pairs: int = MAX_SCAN_PAIRS,
+    engine: str = "batched",
+    workers: int = None,
+    seed: int = 0,
+) -> Universe:
+    """
+    Generate a universe and scan it, timing both stages. Universes with more
+    than `max_scan_pairs` pairs are scanned on a seeded sample of that size;
+    the stage then also reports the estimated time for every pair.
+    """
+    from scanner import scan_pairs
+
+    prices, generate = measure(make_universe, n_tickers, n_bars, seed=seed)
+
+    n_pairs = n_tickers * (n_tickers - 1) // 2
+    sample = None
+    if n_pairs > max_scan_pairs:
+        rng = np.random.default_rng(seed)
+        picks = set()
+        while len(picks) < max_scan_pairs:
+            i, j = sorted(rng.choice(n_tickers, 2, replace=False))
+            picks.add((prices.columns[i], prices.columns[j]))
+        sample = sorted(picks)
+    scanned = len(sample) if sample is not None else n_pairs
+
+    (all_pairs, good_pairs), scan = measure(
+        quiet, scan_pairs, prices, workers=workers or os.cpu_count(), pairs=sample, engine=engine
+    )
+    scan.update(
+        engine=engine,
+        pairs=scanned,
+        cointegrated=len(good_pairs),
+        us_per_pair=round(scan["seconds"] / max(scanned, 1) * 1e6, 1),
+        est_full_universe_s=round(scan["seconds"] / max(scanned, 1) * n_pairs, 2),
+    )
+    return Universe(
+        prices=prices,
+        all_pairs=all_pairs,
+        good_pairs=good_pairs,
+        pairs_scanned=scanned,
+        stages={"generate": generate, "find_cointegrated_pairs": scan},
+    )
+
+
+def _write_dataset(universe: Universe, prices_csv: str, coint_csv: str):
+    from price_store import write_store
+
+    universe.prices.to_csv(prices_csv)
+    write_store(universe.prices, source=prices_csv)
+    universe.good_pairs.to_csv(coint_csv, index=False)
+
+
+@contextlib.contextmanager
+def workspace(universe: Universe):
+    """
+    Temporary working directory holding the universe as the API's data files
+    (prices CSV + binary store + cointegrated pairs), with the process chdir'd
+    into it. Records a "write_dataset" stage on the universe.
+    """
+    from scanner import GOOD_PAIRS_CSV, PRICES_CSV
+
+    previous = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="pairs-bench-") as root:
+        os.chdir(root)
+        try:
+            _, universe.stages["write_dataset"] = measure(
+                _write_dataset, universe, PRICES_CSV, GOOD_PAIRS_CSV
+            )
+            yield root
+        finally:
+            os.chdir(previous)
+
+
+def load_api(universe: Universe):
+    """
+    api_server serving the current workspace, with a memory-only result
+    cache. Records "api_import" (first call only) and "api_snapshot" stages.
+    """
+    if "api_server" not in sys.modules:
+        _, universe.stages["api_import"] = measure(importlib.import_module, "api_server")
+    api = sys.modules["api_server"]
+    _, universe.stages["api_snapshot"] = measure(api.SNAPSHOTS.load)
+    reset_cache(api)
+    return api
+
+
+def reset_cache(api):
+    """Swap in an empty, memory-only result cache for the current data version."""
+    from result_cache import ResultCache
+
+    api.RESULT_CACHE = ResultCache(disk_dir=None)
+    api.RESULT_CACHE.set_version(api.SNAPSHOTS.current().version)
+
+
+# -----------------------------
+# RESULTS
+# -----------------------------
+def _git(*args) -> str:
+    try:
+        out = subprocess.run(
+            ["git", *args], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def environment() -> dict:
+    return {
+        "commit": _git("rev-parse", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
@@ -0,0 +1,145 @@
+"""
+Full benchmark suite: pipeline stages + API latency over a grid of
+synthetic universes, plus cold-start times, saved as JSON for comparison
+across commits.
+
+    python -m benchmarks.suite [--tickers 10 100 1000] [--bars 2000 20000 200000]
+    python -m benchmarks.suite --compare benchmarks/results/<old>.json [--against <new>.json]
+
+Results go to benchmarks/results/<commit>.json (commit suffixed "-dirty"
+for uncommitted trees) unless --out says otherwise. --compare runs the
+suite (or loads --against) and prints new/old ratios for stage times,
+peak memory and p50/p99 latency; ratios above 1 are regressions.
+"""
+import argparse
+import json
+import os
+
+from benchmarks import bench_api, bench_pipeline, bench_startup
+from benchmarks.harness import MAX_SCAN_PAIRS, environment, load_api, prepare_universe, workspace
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def run_suite(
+    tickers,
+    bars,
+    clients: int = bench_api.CLIENTS,
+    requests: int = bench_api.REQUESTS,
+    max_scan_pairs: int = MAX_SCAN_PAIRS,
+    skip_api: bool = False,
+    startup_repeat: int = 5,
+    seed: int = 0,
+) -> dict:
+    runs = []
+    for n_tickers in tickers:
+        for n_bars in bars:
+            print(f"[+] {n_tickers} tickers x {n_bars} bars")
+            universe = prepare_universe(n_tickers, n_bars, max_scan_pairs, seed=seed)
+            with workspace(universe):
+                api = load_api(universe)
+                stages = bench_pipeline.run_stages(api, universe)
+                latency = {} if skip_api else bench_api.run_clients(api, clients, requests, seed)
+            runs.append(
+                {
+                    "tickers": n_tickers,
+                    "bars": n_bars,
+                    "stages": {**universe.stages, **stages},
+                    "api": latency,
+                }
+            )
+            del universe, api
+    results = {"environment": environment(), "runs": runs}
+    if startup_repeat:
+        print("[+] cold start")
+        results["startup"] = bench_startup.run(repeat=startup_repeat)["startup"]
+    return results
+
+
+def default_output(env: dict) -> str:
+    name = (env["commit"] or "unknown")[:12] + ("-dirty" if env["dirty"] else "")
+    return os.path.join(RESULTS_DIR, f"{name}.json")
+
+
+def _ratio(new, old):
+    if new is None or old is None or not old:
+        return None
+    return round(new / old, 2)
+
+
+def compare(old: dict, new: dict) -> list:
+    """Rows of (run, metric, old, new, new/old) for runs present in both files."""
+    base = {(r["tickers"], r["bars"]): r for r in old["runs"]}
+    rows = []
+    for run in new["runs"]:
+        prev = base.get((run["tickers"], run["bars"]))
+        if prev is None:
+            continue
+        label = f"{run['tickers']}x{run['bars']}"
+        for stage, m in run["stages"].items():
+            p = prev["stages"].get(stage)
+            if p is None:
+                continue
+            for key in ("seconds", "peak_rss_mb"):
+                rows.append((label, f"{stage}.{key}", p.get(key), m.get(key), _ratio(m.get(key), p.get(key))))
+        for endpoint, m in run.get("api", {}).items():
+            p = prev.get("api", {}).get(endpoint)
+            if p is None:
+                continue
+            for key in ("p50_ms", "p99_ms"):
+                rows.append((label, f"api.{endpoint}.{key}", p.get(key), m.get(key), _ratio(m.get(key), p.get(key))))
+    for probe, m in new.get("startup", {}).items():
+        p = old.get("startup", {}).get(probe, {})
+        for key, value in m.items():
+            if isinstance(value, dict) and key in p:
+                rows.append(("startup", f"{probe}.{key}", p[key]["median"], value["median"],
+                             _ratio(value["median"], p[key]["median"])))
+    return rows
+
+
+def print_comparison(rows):
+    print(f"{'run':>14}  {'metric':<40} {'old':>10} {'new':>10} {'new/old':>8}")
+    for label, metric, old, new, ratio in rows:
+        print(f"{label:>14}  {metric:<40} {old!s:>10} {new!s:>10} {ratio!s:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tickers", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--bars", type=int, nargs="+", default=[2000, 20000])
+    parser.add_argument("--clients", type=int, default=bench_api.CLIENTS)
+    parser.add_argument("--requests", type=int, default=bench_api.REQUESTS)
+    parser.add_argument("--max-scan-pairs", type=int, default=MAX_SCAN_PAIRS)
+    parser.add_argument("--skip-api", action="store_true")
+    parser.add_argument("--startup-repeat", type=int, default=5, help="cold starts per probe; 0 skips")
+    parser.add_argument("--out", default=None)
+    parser.add_argument("--compare", default=None, help="earlier results JSON to compare against")
+    parser.add_argument("--against", default=None, help="compare this results JSON instead of running")
+    args = parser.parse_args()
+
+    if args.against:
+        with open(args.against) as fh:
+            results = json.load(fh)
+    else:
+        results = run_suite(
+            args.tickers,
+            args.bars,
+            args.clients,
+            args.requests,
+            args.max_scan_pairs,
+            args.skip_api,
+            args.startup_repeat,
+        )
+        out = args.out or default_output(results["environment"])
+        os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+        with open(out, "w") as fh:
+            json.dump(results, fh, indent=2)
+        print(f"[+] Saved {out}")
+
+    if args.compare:
+        with open(args.compare) as fh:
+            print_comparison(compare(json.load(fh), results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import pandas as pd
+import numpy as np
+
+
+def make_universe(
+    n_tickers: int,
+    n_bars: int,
+    coint_frac: float = 0.5,
+    n_factors: int = None,
+    seed: int = 0,
+    freq: str = None,
+) -> pd.DataFrame:
+    """
+    Synthetic price matrix (bars x tickers).
+
+    A `coint_frac` share of tickers load on a handful of common random-walk
+    factors plus stationary AR(1) noise, so tickers sharing a factor are
+    cointegrated; the rest are independent random walks.
+
+    Bars are business days by default; past ~50k bars (where daily dates
+    would run beyond pandas' timestamp range) they are minutes.
+    """
+    rng = np.random.default_rng(seed)
+    n_factors = n_factors or max(1, n_tickers // 10)
+    n_coint = int(round(n_tickers * coint_frac))
+
+    factors = np.cumsum(rng.normal(0, 1, (n_bars, n_factors)), axis=0)
+    prices = np.empty((n_bars, n_tickers))
+
+    loading = rng.uniform(0.5, 2.0, n_coint)
+    which = rng.integers(0, n_factors, n_coint)
+    shocks = rng.normal(0, 1, (n_bars, n_coint))
+    noise = np.empty_like(shocks)
+    noise[0] = shocks[0]
+    for t in range(1, n_bars):
+        noise[t] = 0.9 * noise[t - 1] + shocks[t]
+    prices[:, :n_coint] = factors[:, which] * loading + noise
+
+    prices[:, n_coint:] = np.cumsum(rng.normal(0, 1, (n_bars, n_tickers - n_coint)), axis=0)
+
+    # keep prices positive so pct_change is well defined
+    prices = 100.0 + prices - np.minimum(prices.min(axis=0), 0.0)
+
+    freq = freq or ("B" if n_bars <= 50_000 else "min")
+    index = pd.date_range("2000-01-03", periods=n_bars, freq=freq)
+    columns = [f"S{k:04d}" for k in range(n_tickers)]
+    return pd.DataFrame(prices, index=index, columns=columns)
+
+
+def planted_pairs(
+    n_tickers: int,
+    n_bars: int,
+    coint_frac: float = 0.5,
+    n_factors: int = None,
+    seed: int = 0,
+) -> set:
+    """
+    The (ticker1, ticker2) pairs make_universe built to be cointegrated
+    (same factor), found by replaying its random draws up to the factor
+    assignment. Arguments must match the make_universe call.
+    """
+    rng = np.random.default_rng(seed)
+    n_factors = n_factors or max(1, n_tickers // 10)
+    n_coint = int(round(n_tickers * coint_frac))
+    rng.normal(0, 1, (n_bars, n_factors))
+    rng.uniform(0.5, 2.0, n_coint)
+    which = rng.integers(0, n_factors, n_coint)
+    return {
+        (f"S{i:04d}", f"S{j:04d}")
+        for i in range(n_coint)
+        for j in range(i + 1, n_coint)
+        if which[i] == which[j]
+    }
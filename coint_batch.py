@@ -0,0 +1,154 @@
+import numpy as np
+from scipy.stats import norm
+from statsmodels.tsa.adfvalues import (
+    tau_c_largep,
+    tau_c_smallp,
+    tau_max_c,
+    tau_min_c,
+    tau_star_c,
+)
+
+# -----------------------------
+# CONFIG
+# -----------------------------
+SQRTEPS = np.sqrt(np.finfo(np.double).eps)
+COLUMN_CHUNK = 32  # residual columns per batched ADF pass (bounds memory)
+
+# Engle-Granger with a constant and two I(1) series -> MacKinnon (1994) N = 2
+_N = 2
+_TAU_MIN = tau_min_c[_N - 1]
+_TAU_MAX = tau_max_c[_N - 1]
+_TAU_STAR = tau_star_c[_N - 1]
+_TABLE_STEP = 5e-4
+
+
+def _mackinnon_curve(stats: np.ndarray) -> np.ndarray:
+    small = np.polyval(tau_c_smallp[_N - 1][::-1], stats)
+    large = np.polyval(tau_c_largep[_N - 1][::-1], stats)
+    return norm.cdf(np.where(stats <= _TAU_STAR, small, large))
+
+
+# Precomputed p-value table; the MacKinnon surface is smooth, so linear
+# interpolation on this grid stays within ~1e-8 of mackinnonp.
+_TABLE_X = np.arange(_TAU_MIN, _TAU_MAX + _TABLE_STEP, _TABLE_STEP)
+_TABLE_P = _mackinnon_curve(_TABLE_X)
+
+
+def mackinnon_pvalues(stats: np.ndarray) -> np.ndarray:
+    """Vectorized equivalent of mackinnonp(stat, regression="c", N=2)."""
+    stats = np.asarray(stats, dtype=float)
+    p = np.interp(stats, _TABLE_X, _TABLE_P)
+    p = np.where(stats > _TAU_MAX, 1.0, p)
+    return np.where(stats < _TAU_MIN, 0.0, p)
+
+
+# -----------------------------
+# COINTEGRATING REGRESSIONS
+# -----------------------------
+def cointegrating_residuals(y: np.ndarray, X: np.ndarray):
+    """
+    Fit y ~ const + beta_j * X[:, j] for every column j in one pass.
+    Returns (residual matrix, rsquared per column).
+    """
+    yc = y - y.mean()
+    Xc = X - X.mean(axis=0)
+    sxx = np.einsum("ij,ij->j", Xc, Xc)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        beta = np.where(sxx > 0, (Xc.T @ yc) / sxx, 0.0)
+    resid = yc[:, None] - Xc * beta
+    sst = yc @ yc
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rsquared = 1.0 - np.einsum("ij,ij->j", resid, resid) / sst
+    return resid, rsquared
+
+
+# -----------------------------
+# BATCHED ADF (regression="n", autolag="aic")
+# -----------------------------
+def _lag_design(resid: np.ndarray, diffs: np.ndarray, lag: int):
+    # resid (cols, n), diffs (cols, n - 1) -> regressors (cols, lag + 1, rows):
+    # level x[t-1] then dx[t-1..t-lag]; dependent dx[t]
+    n = resid.shape[1]
+    rows = n - 1 - lag
+    Z = np.empty((resid.shape[0], lag + 1, rows))
+    Z[:, 0] = resid[:, lag:n - 1]
+    for k in range(1, lag + 1):
+        Z[:, k] = diffs[:, lag - k:n - 1 - k]
+    return Z, diffs[:, lag:]
+
+
+def _normal_equations(Z: np.ndarray, dy: np.ndarray):
+    G = np.matmul(Z, Z.transpose(0, 2, 1))
+    c = np.matmul(Z, dy[:, :, None])[:, :, 0]
+    return G, c
+
+
+def _adf_tstat(resid: np.ndarray, diffs: np.ndarray, lag: int) -> np.ndarray:
+    Z, dy = _lag_design(resid, diffs, lag)
+    k, rows = Z.shape[1], Z.shape[2]
+    G, c = _normal_equations(Z, dy)
+    b = np.linalg.solve(G, c[:, :, None])[:, :, 0]
+    ssr = np.einsum("mt,mt->m", dy, dy) - np.einsum("mk,mk->m", b, c)
+    e0 = np.zeros((k, 1))
+    e0[0] = 1.0
+    g00 = np.linalg.solve(G, np.broadcast_to(e0, (Z.shape[0], k, 1)))[:, 0, 0]
+    return b[:, 0] / np.sqrt(ssr / (rows - k) * g00)
+
+
+def adf_statistics(resid: np.ndarray) -> np.ndarray:
+    """
+    ADF t-statistics for every column of `resid`, matching
+    adfuller(x, regression="n", autolag="aic")[0].
+
+    All candidate lag lengths share one Gram matrix per column (built on the
+    common maxlag-trimmed sample, as adfuller does); each lag's SSR comes from
+    solving its leading block. The chosen lag is then refit on its full
+    sample, batched over the columns that picked it.
+    """
+    n, m = resid.shape
+    maxlag = int(np.ceil(12.0 * np.power(n / 100.0, 1 / 4.0)))
+    maxlag = min(n // 2 - 1, maxlag)
+    resid = np.ascontiguousarray(resid.T)
+    diffs = np.diff(resid, axis=1)
+
+    Z, dy = _lag_design(resid, diffs, maxlag)
+    rows = Z.shape[2]
+    G, c = _normal_equations(Z, dy)
+    yy = np.einsum("mt,mt->m", dy, dy)
+    del Z
+
+    aic = np.empty((maxlag + 1, m))
+    for lag in range(maxlag + 1):
+        k = lag + 1
+        b = np.linalg.solve(G[:, :k, :k], c[:, :k, None])[:, :, 0]
+        ssr = yy - np.einsum("mk,mk->m", b, c[:, :k])
+        llf = -rows / 2.0 * (np.log(2 * np.pi) + np.log(ssr / rows) + 1)
+        aic[lag] = -2.0 * llf + 2.0 * k
+    best = np.argmin(aic, axis=0)  # ties -> shortest lag, like _autolag
+
+    stats = np.empty(m)
+    for lag in np.unique(best):
+        cols = np.flatnonzero(best == lag)
+        stats[cols] = _adf_tstat(resid[cols], diffs[cols], int(lag))
+    return stats
+
+
+# -----------------------------
+# ENGLE-GRANGER
+# -----------------------------
+def coint_anchor(y: np.ndarray, X: np.ndarray, column_chunk: int = COLUMN_CHUNK):
+    """
+    Engle-Granger test of y against every column of X, i.e. the batched
+    equivalent of [coint(y, X[:, j]) for j in ...]. Inputs must be NaN-free
+    and aligned. Returns (scores, pvalues).
+    """
+    scores = np.empty(X.shape[1])
+    for start in range(0, X.shape[1], column_chunk):
+        cols = slice(start, start + column_chunk)
+        resid, rsquared = cointegrating_residuals(y, X[:, cols])
+        ok = rsquared < 1 - 100 * SQRTEPS
+        block = np.full(resid.shape[1], -np.inf)  # (almost) colinear
+        if ok.any():
+            block[ok] = adf_statistics(resid[:, ok])
+        scores[cols] = block
+    return scores, mackinnon_pvalues(scores)
@@ -0,0 +1,59 @@
+from typing import List
+
+import pandas as pd
+
+
+class PriceProvider:
+    """
+    Source of daily adjusted close prices.
+
+    fetch() returns a (dates x tickers) frame for [start, end), sorted by
+    date, with days where every ticker is missing dropped.
+    """
+
+    def fetch(self, tickers: List[str], start: str, end: str) -> pd.DataFrame:
+        raise NotImplementedError
+
+
+class YFinanceProvider(PriceProvider):
+    def fetch(self, tickers: List[str], start: str, end: str) -> pd.DataFrame:
+        import yfinance as yf
+
+        tickers = list(tickers)
+        print(f"[+] Downloading data from {start} to {end} for {len(tickers)} tickers...")
+
+        # Force yfinance to keep OHLCV columns, including Adj Close
+        data = yf.download(tickers, start=start, end=end, auto_adjust=False)
+
+        # If multiple tickers, yfinance returns a MultiIndex columns (field, ticker)
+        if isinstance(data.columns, pd.MultiIndex):
+            # Select only the "Adj Close" level -> columns become tickers
+            data = data["Adj Close"]
+        else:
+            # Single ticker case: flat OHLCV columns
+            data = data[["Adj Close"]].rename(columns={"Adj Close": tickers[0]})
+
+        data = data.sort_index()
+        # Clean: drop days where everything is NaN
+        data = data.dropna(how="all")
+        print(f"[+] Data shape: {data.shape}")
+        return data
+
+
+class CSVPriceProvider(PriceProvider):
+    """
+    Serves prices from a local CSV in the prices_daily_adj_close.csv layout.
+    Stands in for the network provider in offline runs and tests.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._prices = None
+
+    def fetch(self, tickers: List[str], start: str, end: str) -> pd.DataFrame:
+        if self._prices is None:
+            self._prices = pd.read_csv(self.path, index_col=0, parse_dates=True).sort_index()
+        prices = self._prices
+        window = prices[(prices.index >= pd.Timestamp(start)) & (prices.index < pd.Timestamp(end))]
+        data = window.reindex(columns=list(tickers))
+        return data.dropna(how="all")
@@ -0,0 +1,203 @@
+import json
+import os
+from typing import List
+
+import pandas as pd
+
+from data_providers import PriceProvider, YFinanceProvider
+from price_store import STORE_DIR, load_prices, store_lock, store_version, write_store
+from prefilter import prune_pairs
+from scanner import scan_pairs
+from stat_arb_pairs import (
+    END_DATE,
+    SCAN_ENGINE,
+    SCAN_PRUNE,
+    SCAN_WORKERS,
+    START_DATE,
+    TICKERS,
+    clean_price_data,
+)
+
+# -----------------------------
+# CONFIG
+# -----------------------------
+PRICES_CSV = "prices_daily_adj_close.csv"
+ALL_PAIRS_CSV = "cointegration_all_pairs.csv"
+GOOD_PAIRS_CSV = "cointegration_good_pairs.csv"
+SCAN_STATE_JSON = "cointegration_scan_state.json"
+
+PVALUE_THRESHOLD = 0.05
+# Existing pairs are only re-tested once this many bars were added since
+# their last scan; one extra day barely moves a multi-year Engle-Granger stat.
+RESCAN_AFTER_BARS = 21
+
+
+# -----------------------------
+# STATE
+# -----------------------------
+def load_scan_state(path: str = SCAN_STATE_JSON) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def save_scan_state(state: dict, path: str = SCAN_STATE_JSON) -> None:
+    with open(path, "w") as fh:
+        json.dump(state, fh, indent=2)
+
+
+# -----------------------------
+# PRICES
+# -----------------------------
+def update_prices(
+    existing: pd.DataFrame,
+    provider: PriceProvider,
+    tickers: List[str],
+    start: str,
+    end: str,
+):
+    """
+    Append bars after the last stored date for known tickers and pull full
+    history for tickers not stored yet. Returns (prices, new_bars, new_tickers).
+    """
+    last = existing.index.max()
+    known = list(existing.columns)
+    added = [t for t in tickers if t not in existing.columns]
+
+    fetch_from = (last + pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+    appended = pd.DataFrame(columns=known, dtype=float)
+    if fetch_from < end:
+        appended = provider.fetch(known, fetch_from, end)
+        appended = appended[appended.index > last]
+
+    prices = pd.concat([existing, appended.reindex(columns=known)])
+    # stored history is already clean, so this only fills the new rows
+    prices = prices.ffill()
+
+    if added:
+        history = provider.fetch(added, start, end)
+        history = history.reindex(prices.index)
+        prices = pd.concat([prices, history], axis=1)
+
+    prices = clean_price_data(prices)
+    new_tickers = [t for t in added if t in prices.columns]
+    return prices, len(appended), new_tickers
+
+
+def load_refresh_base(path: str = PRICES_CSV) -> pd.DataFrame:
+    """
+    Stored prices to extend, at full precision: the canonical CSV when there
+    is one. A float32 store (PRICE_STORE_DTYPE) holds rounded prices, and
+    save_prices would write that rounding back into the CSV.
+    """
+    if os.path.exists(path):
+        return pd.read_csv(path, index_col=0, parse_dates=True)
+    return load_prices(path)
+
+
+def save_prices(prices: pd.DataFrame, new_rows: int, columns_changed: bool, path: str = PRICES_CSV):
+    # API workers polling the files wait on the lock rather than convert a half-written CSV
+    with store_lock(STORE_DIR):
+        if columns_changed or not os.path.exists(path):
+            prices.to_csv(path)
+        elif new_rows:
+            # same columns -> append only the new rows instead of rewriting history
+            prices.iloc[-new_rows:].to_csv(path, mode="a", header=False)
+        write_store(prices, STORE_DIR, source=path)
+
+
+# -----------------------------
+# SCAN
+# -----------------------------
+def update_scan(
+    prices: pd.DataFrame,
+    new_tickers: List[str],
+    rescan_after_bars: int = RESCAN_AFTER_BARS,
+    pvalue_threshold: float = PVALUE_THRESHOLD,
+    workers: int = SCAN_WORKERS,
+    engine: str = SCAN_ENGINE,
+    prune: dict = SCAN_PRUNE,
+):
+    state = load_scan_state()
+    bars_since = len(prices) - state.get("bars", 0)
+
+    if not os.path.exists(ALL_PAIRS_CSV) or not state or bars_since >= rescan_after_bars:
+        print(f"[+] Full cointegration rescan ({bars_since} bars since last scan)")
+        all_pairs, good_pairs = scan_pairs(
+            prices, pvalue_threshold, workers=workers, engine=engine, prune=prune
+        )
+        state = {
+            "scanned_through": str(prices.index.max().date()),
+            "bars": int(len(prices)),
+        }
+    else:
+        previous = pd.read_csv(ALL_PAIRS_CSV)
+        previous = previous[
+            previous["ticker1"].isin(prices.columns) & previous["ticker2"].isin(prices.columns)
+        ]
+        tickers = list(prices.columns)
+        added = set(new_tickers)
+        todo = [
+            (tickers[i], tickers[j])
+            for i in range(len(tickers))
+            for j in range(i + 1, len(tickers))
+            if tickers[i] in added or tickers[j] in added
+        ]
+        if todo and prune:
+            kept = set(prune_pairs(prices, **prune)[0])
+            todo = [p for p in todo if p in kept]
+        print(f"[+] Incremental scan: {len(todo)} new pairs ({bars_since} bars since last full scan)")
+        if todo:
+            fresh, _ = scan_pairs(
+                prices, pvalue_threshold, workers=workers, engine=engine, pairs=todo
+            )
+            previous = pd.concat([previous, fresh], ignore_index=True)
+        all_pairs = previous.sort_values("pvalue")
+        good_pairs = all_pairs[all_pairs["pvalue"] < pvalue_threshold].reset_index(drop=True)
+        # state keeps the bar count of the last full scan so staleness accumulates
+
+    state["tickers"] = list(prices.columns)
+    all_pairs.to_csv(ALL_PAIRS_CSV, index=False)
+    good_pairs.to_csv(GOOD_PAIRS_CSV, index=False)
+    save_scan_state(state)
+    print(f"[+] Saved cointegration results to {ALL_PAIRS_CSV} and {GOOD_PAIRS_CSV}")
+    return all_pairs, good_pairs
+
+
+# -----------------------------
+# PIPELINE
+# -----------------------------
+def incremental_refresh(
+    provider: PriceProvider = None,
+    tickers: List[str] = TICKERS,
+    start: str = START_DATE,
+    end: str = END_DATE,
+    rescan_after_bars: int = RESCAN_AFTER_BARS,
+):
+    """
+    Nightly refresh: fetch only the delta since the stored data, then test
+    only the pairs that involve newly added tickers. Existing pairs are
+    re-tested once `rescan_after_bars` bars have accumulated since their last
+    full scan. Falls back to a full download when nothing is stored yet.
+    """
+    provider = provider or YFinanceProvider()
+
+    # store_lock creates STORE_DIR before anything is written, so an empty
+    # directory left by an earlier start is not stored data: check meta.json
+    if not os.path.exists(PRICES_CSV) and store_version(STORE_DIR) is None:
+        print("[+] No stored prices, running full download...")
+        prices = clean_price_data(provider.fetch(tickers, start, end))
+        save_prices(prices, len(prices), columns_changed=True)
+        return prices, update_scan(prices, list(prices.columns), rescan_after_bars=0)
+
+    existing = load_refresh_base()
+    prices, new_rows, new_tickers = update_prices(existing, provider, tickers, start, end)
+    print(f"[+] {new_rows} new bars, {len(new_tickers)} new tickers")
+
+    if not new_rows and not new_tickers:
+        print("[+] Prices already up to date")
+        return prices, None
+
+    save_prices(prices, new_rows, columns_changed=bool(new_tickers))
+    return prices, update_scan(prices, new_tickers, rescan_after_bars)
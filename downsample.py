@@ -0,0 +1,146 @@
+import numpy as np
+import pandas as pd
+
+# -----------------------------
+# CONFIG
+# -----------------------------
+DOWNSAMPLE_METHODS = ("lttb", "minmax")
+DEFAULT_MAX_POINTS = 1000
+
+
+# -----------------------------
+# WINDOW
+# -----------------------------
+def window_slice(index: pd.DatetimeIndex, start=None, end=None) -> slice:
+    """Positions of start <= t <= end in a sorted index, by binary search."""
+    lo = 0 if start is None else int(index.searchsorted(pd.Timestamp(start), side="left"))
+    hi = len(index) if end is None else int(index.searchsorted(pd.Timestamp(end), side="right"))
+    return slice(lo, max(lo, hi))
+
+
+# -----------------------------
+# POINT SELECTION
+# -----------------------------
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Keep the first and last point plus the min and max of each of
+    (n_out - 2) // 2 equal buckets, so spikes survive at any zoom level.
+    Fully vectorized: buckets are laid out as rows of a padded matrix.
+    Below 4 points there is no room for a bucket: first and last only.
+    """
+    n = len(y)
+    if n <= n_out:
+        return np.arange(n)
+    if n_out < 4:
+        return np.array([0, n - 1])
+    n_buckets = (n_out - 2) // 2
+    edges = np.linspace(0, n, n_buckets + 1).astype(np.int64)
+    width = int(np.diff(edges).max())
+    idx = edges[:-1, None] + np.arange(width)
+    valid = (idx < edges[1:, None]) & (idx < n)
+    idx = np.minimum(idx, n - 1)
+    vals = y[idx]
+    valid &= ~np.isnan(vals)
+
+    lows = np.where(valid, vals, np.inf).argmin(axis=1)
+    highs = np.where(valid, vals, -np.inf).argmax(axis=1)
+    rows = np.arange(n_buckets)
+    keep = valid.any(axis=1)
+    picked = np.concatenate(
+        [[0, n - 1], idx[rows, lows][keep], idx[rows, highs][keep]]
+    )
+    return np.unique(picked)
+
+
+def lttb_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: from each bucket keep the point that
+    forms the largest triangle with the point kept before it and the mean
+    of the next bucket. x is the bar position. Bucket means come from one
+    cumulative sum. Only the pick itself, which depends on the previous
+    pick, loops, once per output point, with a numpy argmax over the bucket.
+    NaNs are never picked unless a whole bucket is NaN.
+    """
+    n = len(y)
+    if n <= n_out or n_out < 3:
+        return np.arange(n) if n <= n_out else np.array([0, n - 1])
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)  # bucket k: [edges[k], edges[k+1])
+    finite = ~np.isnan(y)
+    csum_y = np.concatenate([[0.0], np.cumsum(np.where(finite, y, 0.0))])
+    csum_x = np.concatenate([[0.0], np.cumsum(np.where(finite, np.arange(n), 0.0))])
+    csum_n = np.concatenate([[0], np.cumsum(finite)])
+
+    # mean of the bucket after bucket k; the last bucket looks at the final point
+    nxt_lo = np.append(edges[1:-1], n - 1)
+    nxt_hi = np.append(edges[2:], n)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        count = csum_n[nxt_hi] - csum_n[nxt_lo]
+        avg_y = (csum_y[nxt_hi] - csum_y[nxt_lo]) / count
+        avg_x = (csum_x[nxt_hi] - csum_x[nxt_lo]) / count
+    avg_x = np.where(count > 0, avg_x, (nxt_lo + nxt_hi - 1) / 2.0)
+
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for k in range(n_out - 2):
+        lo, hi = edges[k], edges[k + 1]
+        px = np.arange(lo, hi, dtype=float)
+        with np.errstate(invalid="ignore"):
+            area = np.abs((a - avg_x[k]) * (y[lo:hi] - y[a]) - (a - px) * (avg_y[k] - y[a]))
+        a = lo + int(np.argmax(np.where(np.isnan(area), -1.0, area)))
+        out[k + 1] = a
+    return out
+
+
+def lttb_indices_columns(y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    lttb_indices of every column of a (bars x series) matrix, as an
+    (n_out x series) array: the bucket loop runs once for all series, each
+    step an argmax down the columns. Picks are identical to lttb_indices.
+    """
+    y = np.asarray(y, dtype=float)
+    n, m = y.shape
+    if n <= n_out or n_out < 3:
+        return np.column_stack([lttb_indices(y[:, j], n_out) for j in range(m)])
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    finite = ~np.isnan(y)
+    zeros = np.zeros((1, m))
+    csum_y = np.concatenate([zeros, np.cumsum(np.where(finite, y, 0.0), axis=0)])
+    csum_x = np.concatenate([zeros, np.cumsum(np.where(finite, np.arange(n)[:, None], 0.0), axis=0)])
+    csum_n = np.concatenate([zeros.astype(np.int64), np.cumsum(finite, axis=0)])
+
+    nxt_lo = np.append(edges[1:-1], n - 1)
+    nxt_hi = np.append(edges[2:], n)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        count = csum_n[nxt_hi] - csum_n[nxt_lo]
+        avg_y = (csum_y[nxt_hi] - csum_y[nxt_lo]) / count
+        avg_x = (csum_x[nxt_hi] - csum_x[nxt_lo]) / count
+    avg_x = np.where(count > 0, avg_x, ((nxt_lo + nxt_hi - 1) / 2.0)[:, None])
+
+    out = np.empty((n_out, m), dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = np.zeros(m, dtype=np.int64)
+    cols = np.arange(m)
+    for k in range(n_out - 2):
+        lo, hi = edges[k], edges[k + 1]
+        px = np.arange(lo, hi, dtype=float)[:, None]
+        ya = y[a, cols]
+        with np.errstate(invalid="ignore"):
+            area = np.abs((a - avg_x[k]) * (y[lo:hi] - ya) - (a - px) * (avg_y[k] - ya))
+        a = lo + np.argmax(np.where(np.isnan(area), -1.0, area), axis=0)
+        out[k + 1] = a
+    return out
+
+
+def downsample_indices(y: np.ndarray, max_points: int = DEFAULT_MAX_POINTS, method: str = "lttb") -> np.ndarray:
+    """Sorted row positions to keep so that at most max_points (>= 2) remain."""
+    y = np.asarray(y, dtype=float)
+    if max_points is None or len(y) <= max_points:
+        return np.arange(len(y))
+    if method == "lttb":
+        return lttb_indices(y, max_points)
+    if method == "minmax":
+        return minmax_indices(y, max_points)
+    raise ValueError(f"Unknown downsample method '{method}'. Use one of {', '.join(DOWNSAMPLE_METHODS)}.")
@@ -0,0 +1,176 @@
+import numpy as np
+
+# -----------------------------
+# CONFIG
+# -----------------------------
+HEDGE_METHODS = ("static", "rolling_ols", "kalman")
+HEDGE_WINDOW = 120  # bars in the rolling OLS window
+
+# Kalman filter on [beta, alpha] as a random walk:
+# state noise Q = delta / (1 - delta) * I, observation noise R
+KALMAN_DELTA = 1e-4
+KALMAN_OBS_VAR = 1e-3
+KALMAN_INIT_VAR = 1.0  # loose prior on the starting [beta, alpha]
+
+
+def _as_2d(a: np.ndarray):
+    a = np.asarray(a, dtype=float)
+    return (a[:, None], True) if a.ndim == 1 else (a, False)
+
+
+def static_beta(y: np.ndarray, x: np.ndarray) -> float:
+    # OLS y ~ beta * x + alpha over the whole sample (look-ahead)
+    return float(np.polyfit(x, y, 1)[0])
+
+
+def static_betas(y: np.ndarray, x: np.ndarray) -> np.ndarray:
+    """
+    static_beta for every column of (bars x pairs) inputs in one pass,
+    fitted on the rows where both series are present.
+    """
+    y = np.asarray(y, dtype=float)
+    x = np.asarray(x, dtype=float)
+    ok = ~(np.isnan(y) | np.isnan(x))
+    count = ok.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        xm = np.where(ok, x, 0.0).sum(axis=0) / count
+        ym = np.where(ok, y, 0.0).sum(axis=0) / count
+        xc = np.where(ok, x - xm, 0.0)
+        yc = np.where(ok, y - ym, 0.0)
+        sxx = np.einsum("ij,ij->j", xc, xc)
+        return np.where(sxx > 0, np.einsum("ij,ij->j", xc, yc) / sxx, np.nan)
+
+
+def rolling_ols_beta(y: np.ndarray, x: np.ndarray, window: int = HEDGE_WINDOW) -> np.ndarray:
+    """
+    Slope of y ~ beta * x + alpha over the `window` bars *before* each bar,
+    so beta[t] only uses data up to t - 1. Works on (bars,) or
+    (bars x pairs) arrays and costs O(bars) per pair: window sums are
+    running-sum differences, not refits. Bars missing either price are left
+    out of the window they fall in, like static_betas. Bars before the
+    first full window, and windows with fewer than two usable bars, are NaN.
+    """
+    y, squeeze = _as_2d(y)
+    x, _ = _as_2d(x)
+    n = y.shape[0]
+    out = np.full(y.shape, np.nan)
+    if n <= window:
+        return out[:, 0] if squeeze else out
+
+    # shift by the first finite observation to keep the running sums well
+    # scaled; the slope is invariant to the shift
+    ok = ~(np.isnan(y) | np.isnan(x))
+    first = np.argmax(ok, axis=0)
+    cols = np.arange(y.shape[1])
+    x = np.where(ok, x - x[first, cols], 0.0)
+    y = np.where(ok, y - y[first, cols], 0.0)
+
+    def window_sums(a):
+        c = np.cumsum(a, axis=0)
+        c = np.vstack([np.zeros((1, a.shape[1])), c])
+        return c[window:] - c[:-window]  # row k: sum over bars [k, k + window)
+
+    count = window_sums(ok.astype(float))
+    sx = window_sums(x)
+    sy = window_sums(y)
+    sxx = window_sums(x * x)
+    sxy = window_sums(x * y)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        var = sxx - sx * sx / count
+        cov = sxy - sx * sy / count
+        beta = np.where((count > 1) & (var > 0), cov / var, np.nan)
+
+    # window ending at bar t - 1 -> estimate used on bar t
+    out[window:] = beta[:-1]
+    return out[:, 0] if squeeze else out
+
+
+def kalman_beta(
+    y: np.ndarray,
+    x: np.ndarray,
+    delta: float = KALMAN_DELTA,
+    obs_var: float = KALMAN_OBS_VAR,
+    state: dict = None,
+) -> np.ndarray:
+    """
+    Time-varying hedge ratio from a Kalman filter with observation
+    y[t] = beta[t] * x[t] + alpha[t] + e. beta[t] is the prior estimate
+    before y[t] is seen (no look-ahead). One O(1) update per bar, vectorized
+    across all pair columns of (bars x pairs) inputs.
+
+    Pass the same `state` dict to consecutive calls to filter a series in
+    chunks: it holds the filter state after the last bar, and the output
+    matches a single call over the whole series exactly.
+    """
+    y, squeeze = _as_2d(y)
+    x, _ = _as_2d(x)
+    n, m = y.shape
+    q = delta / (1.0 - delta)
+
+    if state and "beta" in state:
+        beta, alpha = state["beta"], state["alpha"]
+        p11, p12, p22 = state["p11"], state["p12"], state["p22"]
+        started = state["started"]
+    else:
+        beta = np.zeros(m)
+        alpha = np.zeros(m)
+        # state covariance [[p11, p12], [p12, p22]]
+        p11 = np.full(m, KALMAN_INIT_VAR)
+        p12 = np.zeros(m)
+        p22 = np.full(m, KALMAN_INIT_VAR)
+        started = np.zeros(m, dtype=bool)
+
+    out = np.full((n, m), np.nan)
+    for t in range(n):
+        xt = x[t]
+        yt = y[t]
+        ok = ~(np.isnan(xt) | np.isnan(yt))
+
+        # predict
+        p11 = p11 + q
+        p22 = p22 + q
+        out[t] = np.where(started, beta, np.nan)
+
+        # update
+        err = yt - (beta * xt + alpha)
+        s = xt * xt * p11 + 2 * xt * p12 + p22 + obs_var
+        k1 = (p11 * xt + p12) / s
+        k2 = (p12 * xt + p22) / s
+        beta = np.where(ok, beta + k1 * err, beta)
+        alpha = np.where(ok, alpha + k2 * err, alpha)
+        n11 = p11 - k1 * (xt * p11 + p12)
+        n12 = p12 - k1 * (xt * p12 + p22)
+        n22 = p22 - k2 * (xt * p12 + p22)
+        p11 = np.where(ok, n11, p11)
+        p12 = np.where(ok, n12, p12)
+        p22 = np.where(ok, n22, p22)
+        started |= ok
+
+    if state is not None:
+        state.update(beta=beta, alpha=alpha, p11=p11, p12=p12, p22=p22, started=started)
+    return out[:, 0] if squeeze else out
+
+
+def hedge_ratio(
+    y: np.ndarray,
+    x: np.ndarray,
+    method: str = "static",
+    window: int = HEDGE_WINDOW,
+):
+    """Float beta for "static", per-bar beta array for the rolling methods."""
+    if method == "static":
+        return static_beta(y, x)
+    if method == "rolling_ols":
+        return rolling_ols_beta(y, x, window)
+    if method == "kalman":
+        return kalman_beta(y, x)
+    raise ValueError(f"Unknown hedge_method '{method}'. Use one of {', '.join(HEDGE_METHODS)}.")
+
+
+def latest_beta(beta) -> float:
+    """The static beta, or the last finite value of a per-bar beta array (NaN if none)."""
+    if not np.ndim(beta):
+        return beta
+    finite = beta[np.isfinite(beta)]
+    return float(finite[-1]) if len(finite) else np.nan
@@ -0,0 +1,258 @@
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+# -----------------------------
+# CONFIG
+# -----------------------------
+JOB_WORKERS = max(1, (os.cpu_count() or 2) // 2)  # processes running jobs at once
+MAX_PENDING_JOBS = 32  # queued + running; beyond that submit() refuses
+JOB_TIMEOUT = 600.0  # seconds, per job unless the request sets its own
+MAX_FINISHED_JOBS = 200  # finished jobs kept around for GET /api/jobs/{id}
+
+FINISHED = ("done", "failed", "cancelled", "timeout")
+
+
+class JobCancelled(Exception):
+    """Raised inside a worker when its job was cancelled or timed out."""
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+# -----------------------------
+# WORKER SIDE
+# -----------------------------
+_EVENTS = None
+_CANCELLED = None
+
+
+def _init_worker(events, cancelled):
+    global _EVENTS, _CANCELLED
+    _EVENTS = events
+    _CANCELLED = cancelled
+
+
+def _run_job(job_id: str, fn: Callable, params: dict):
+    """
+    Runs in a pool process. `fn(params, progress)` reports through
+    progress(done, total, message=""); every report is also a cancellation
+    point, so cancel / timeout take effect at the job's next report.
+    """
+    def progress(done, total, message: str = ""):
+        if job_id in _CANCELLED:
+            raise JobCancelled()
+        _EVENTS.put((job_id, "progress", done / total if total else 1.0, message))
+
+    if job_id in _CANCELLED:
+        raise JobCancelled()
+    _EVENTS.put((job_id, "started", time.time(), ""))
+    return fn(params, progress)
+
+
+# -----------------------------
+# JOB STATE
+# -----------------------------
+@dataclass
+class Job:
+    id: str
+    kind: str
+    params: dict
+    timeout: float
+    status: str = "queued"  # queued / running / done / failed / cancelled / timeout
+    progress: float = 0.0
+    message: str = ""
+    result: Any = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    revision: int = 0  # bumped on every change; event streams poll it
+    future: Any = field(default=None, repr=False)
+
+    def to_dict(self, include_result: bool = True) -> dict:
+        out = {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": self.progress,
+            "message": self.message,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "timeout": self.timeout,
+        }
+        if include_result:
+            out["params"] = self.params
+            out["result"] = self.result
+        return out
+
+
+class JobManager:
+    """
+    Runs heavy requests on a bounded process pool so they never tie up the
+    API's request threads.
+
+    At most `workers` jobs run at once and at most `max_pending` are queued
+    or running. Workers send progress over a manager queue, and a listener
+    thread in the API process applies it to the job table. The same thread
+    enforces timeouts. A cancelled or timed-out job is reported as finished
+    right away. Its worker stops at the job's next progress report, and a
+    job that is still queued never starts. The pool and manager are
+    created on first submit.
+    """
+
+    def __init__(
+        self,
+        workers: int = JOB_WORKERS,
+        max_pending: int = MAX_PENDING_JOBS,
+        default_timeout: float = JOB_TIMEOUT,
+    ):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.default_timeout = default_timeout
+        self.jobs = {}
+        # re-entrant: Future.cancel() runs the done callback in the caller
+        self._lock = threading.RLock()
+        self._pool = None
+        self._manager = None
+        self._events = None
+        self._cancelled = None
+        self._listener = None
+
+    def _ensure_started(self):
+        if self._pool is not None:
+            return
+        self._manager = multiprocessing.Manager()
+        self._events = self._manager.Queue()
+        self._cancelled = self._manager.dict()
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self._events, self._cancelled),
+        )
+        self._listener = threading.Thread(target=self._listen, name="job-events", daemon=True)
+        self._listener.start()
+
+    # ---- state changes (caller holds the lock) ----
+    def _touch(self, job: Job, **changes):
+        for key, value in changes.items():
+            setattr(job, key, value)
+        job.revision += 1
+
+    def _finish(self, job: Job, status: str, **changes):
+        if job.status in FINISHED:
+            return
+        self._touch(job, status=status, finished_at=time.time(), **changes)
+        self._prune()
+
+    def _prune(self):
+        finished = sorted(
+            (j for j in self.jobs.values() if j.status in FINISHED and j.future.done()),
+            key=lambda j: j.finished_at,
+        )
+        for job in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job.id]
+
+    # ---- API ----
+    def submit(self, kind: str, fn: Callable, params: dict, timeout: float = None) -> Job:
+        """Queue fn(params, progress) in the pool; fn must be a picklable module-level function."""
+        with self._lock:
+            # cancelled jobs still hold a worker until they notice
+            active = sum(1 for j in self.jobs.values() if not j.future.done())
+            if active >= self.max_pending:
+                raise JobQueueFull(f"Too many pending jobs (max {self.max_pending}).")
+            self._ensure_started()
+            job = Job(
+                id=uuid.uuid4().hex,
+                kind=kind,
+                params=params,
+                timeout=self.default_timeout if timeout is None else timeout,
+            )
+            self.jobs[job.id] = job
+            job.future = self._pool.submit(_run_job, job.id, fn, params)
+        job.future.add_done_callback(lambda fut, job=job: self._on_done(job, fut))
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def list(self):
+        with self._lock:
+            return sorted(self.jobs.values(), key=lambda j: j.created_at, reverse=True)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None or job.status in FINISHED:
+                return job
+            self._cancelled[job.id] = True
+            self._finish(job, "cancelled", message=f"cancelled while {job.status}")
+            job.future.cancel()  # only succeeds if no worker picked it up yet
+            return job
+
+    def shutdown(self):
+        if self._pool is None:
+            return
+        with self._lock:
+            for job in self.jobs.values():
+                if not job.future.done():
+                    self._cancelled[job.id] = True
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._manager.shutdown()
+        self._pool = None
+
+    # ---- background ----
+    def _on_done(self, job: Job, fut):
+        with self._lock:
+            try:
+                self._cancelled.pop(job.id, None)
+            except (EOFError, OSError):
+                pass  # manager already shut down
+            if job.status in FINISHED:
+                self._prune()
+                return
+            try:
+                result = fut.result()
+            except (JobCancelled, CancelledError):
+                self._finish(job, "cancelled")
+            except Exception as e:
+                self._finish(job, "failed", error=f"{type(e).__name__}: {e}")
+            else:
+                self._finish(job, "done", progress=1.0, result=result, message="done")
+
+    def _listen(self):
+        while True:
+            try:
+                job_id, event, value, message = self._events.get(timeout=0.5)
+            except queue.Empty:
+                job_id = None
+            except (EOFError, OSError):
+                return  # manager shut down
+
+            now = time.time()
+            with self._lock:
+                job = self.jobs.get(job_id)
+                if job is not None and job.status not in FINISHED:
+                    if event == "started":
+                        self._touch(job, status="running", started_at=value)
+                    elif event == "progress":
+                        self._touch(job, progress=value, message=message or job.message)
+
+                for job in list(self.jobs.values()):
+                    if (
+                        job.status == "running"
+                        and job.started_at is not None
+                        and now - job.started_at > job.timeout
+                    ):
+                        self._cancelled[job.id] = True
+                        self._finish(job, "timeout", message=f"timed out after {job.timeout:g}s")
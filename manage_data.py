@@ -1,10 +1,35 @@
-from stat_arb_pairs import main as build_universe
+import argparse
+
 from backtest_stat_arb import main as run_sample_backtest
 
 if __name__ == "__main__":
-    print("[+] Rebuilding universe & cointegration table...")
-    build_universe()
+    parser = argparse.ArgumentParser(description="Refresh prices & cointegration table")
+    parser.add_argument("--full", action="store_true", help="re-download everything and rescan all pairs")
+    parser.add_argument("--provider-csv", help="read prices from a local CSV instead of yfinance (offline)")
+    parser.add_argument("--plot-file", help="also save a correlation heatmap of the universe to this image file")
+    args = parser.parse_args()
+
+    if args.full:
+        from stat_arb_pairs import main as build_universe
+
+        print("[+] Rebuilding universe & cointegration table...")
+        # headless: never opens a plot window (this runs from cron / start.sh)
+        build_universe(plot=False, plot_file=args.plot_file)
+    else:
+        from data_providers import CSVPriceProvider, YFinanceProvider
+        from data_refresh import incremental_refresh
+
+        provider = CSVPriceProvider(args.provider_csv) if args.provider_csv else YFinanceProvider()
+        print("[+] Refreshing universe & cointegration table incrementally...")
+        prices, _ = incremental_refresh(provider)
+        if args.plot_file:
+            from plots import plot_correlation_matrix
+
+            plot_correlation_matrix(prices, title="Daily Returns Correlation", path=args.plot_file)
+    from pair_views import build_views
+
+    print("[+] Precomputing default pair views...")
+    build_views()
     print("[+] Running sample backtest for sanity...")
     run_sample_backtest()
     print("[+] Data refresh complete.")
-
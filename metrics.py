@@ -0,0 +1,185 @@
+import contextvars
+import functools
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+# -----------------------------
+# CONFIG
+# -----------------------------
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") != "0"
+# seconds; request latencies and stage spans share one bucket layout
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+# -----------------------------
+# METRIC TYPES
+# -----------------------------
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{str(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name, self.help, self.labels = name, help, labels
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_labels(self.labels, k)} {v:g}" for k, v in items]
+        return lines
+
+
+class Gauge(Counter):
+    def dec(self, *labels, amount: float = 1.0):
+        self.inc(*labels, amount=-amount)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set, rendered the Prometheus way."""
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labels = name, help, labels
+        self.buckets = tuple(buckets)
+        self._series: Dict[tuple, list] = {}  # labels -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        slot = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[slot] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, series in items:
+            running = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                running += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                le_label = f'le="{le}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labels, key, le_label)} {running}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, key)} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{_labels(self.labels, key)} {running}")
+        return lines
+
+
+# -----------------------------
+# REGISTRY
+# -----------------------------
+REQUESTS = Counter("http_requests_total", "HTTP requests by endpoint, method and status.", ("endpoint", "method", "status"))
+REQUEST_SECONDS = Histogram("http_request_duration_seconds", "HTTP request latency.", ("endpoint", "method"))
+IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests being served.", ("endpoint", "method"))
+SPAN_SECONDS = Histogram("span_duration_seconds", "Time spent in instrumented stages.", ("span",))
+
+METRICS = [REQUESTS, REQUEST_SECONDS, IN_FLIGHT, SPAN_SECONDS]
+
+
+def sample_lines(name: str, help: str, kind: str, samples) -> List[str]:
+    """
+    Exposition lines for values read at scrape time (cache stats, job
+    counts). `samples` is a number, or {((label, value), ...): number}.
+    """
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+    if not isinstance(samples, dict):
+        samples = {(): samples}
+    for labels, value in samples.items():
+        names = tuple(n for n, _ in labels)
+        values = tuple(v for _, v in labels)
+        lines.append(f"{name}{_labels(names, values)} {float(value):g}")
+    return lines
+
+
+def render(extra: List[str] = ()) -> str:
+    """Prometheus text exposition of every registered metric plus `extra` lines."""
+    lines = []
+    for metric in METRICS:
+        lines += metric.render()
+    lines += list(extra)
+    return "\n".join(lines) + "\n"
+
+
+# -----------------------------
+# SPANS & PROFILES
+# -----------------------------
+_PROFILE: contextvars.ContextVar[Optional[list]] = contextvars.ContextVar("profile", default=None)
+
+
+class span:
+    """
+    Times a block into SPAN_SECONDS and, when the current request asked
+    for ?profile=1, into its stage list (in start order, so a stage comes
+    before the stages nested in it). A class rather than a generator
+    context manager so a span costs two clock reads and one histogram update.
+    """
+
+    __slots__ = ("name", "started", "entry")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.entry = None
+        profile = _PROFILE.get()
+        if profile is not None:
+            self.entry = [self.name, 0.0]
+            profile.append(self.entry)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if not METRICS_ENABLED:
+            return False
+        elapsed = time.perf_counter() - self.started
+        SPAN_SECONDS.observe(elapsed, self.name)
+        if self.entry is not None:
+            self.entry[1] = elapsed
+        return False
+
+
+def timed(name: str):
+    """Decorator form of span for functions with several exits."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+
+def start_profile() -> contextvars.Token:
+    """Collect this context's spans; the list is shared with threads the request spawns."""
+    return _PROFILE.set([])
+
+
+def profiling() -> bool:
+    return _PROFILE.get() is not None
+
+
+def finish_profile(token: contextvars.Token) -> list:
+    stages = _PROFILE.get() or []
+    _PROFILE.reset(token)
+    return [{"stage": name, "ms": round(seconds * 1000.0, 3)} for name, seconds in stages]
@@ -0,0 +1,238 @@
+import argparse
+import json
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+import numpy as np
+
+from downsample import DEFAULT_MAX_POINTS, lttb_indices_columns
+from backtest_engine import (
+    ANNUAL_TRADING_DAYS,
+    build_trades,
+    compute_stats,
+    metrics_summary,
+    rolling_zscore,
+    simulate_positions,
+    strategy_returns,
+)
+from hedge import static_betas
+from price_store import PRICES_CSV, STORE_DIR, open_store
+
+# -----------------------------
+# CONFIG
+# -----------------------------
+GOOD_PAIRS_CSV = "cointegration_good_pairs.csv"
+VIEWS_DIR = "pair_views"
+
+# the parameters /api/pair/{pair_id} serves
+VIEW_LOOKBACK = 60
+VIEW_ENTRY_Z = 2.0
+VIEW_EXIT_Z = 0.5
+
+# series_<version>.npy: (pairs x columns x bars) float64, one contiguous block per pair
+# rows_<version>.npy: (pairs x kept) int32, the rows the default chart view keeps
+#     (LTTB on the spread over the full history, downsample.DEFAULT_MAX_POINTS)
+# meta.json: version, source store version, parameters, pair id -> row / beta / metrics
+VIEW_COLUMNS = ["spread", "zscore", "equity"]
+META_FILE = "meta.json"
+
+
+# -----------------------------
+# BUILD
+# -----------------------------
+def compute_views(
+    prices: pd.DataFrame,
+    pairs: List[Tuple[str, str]],
+    lookback: int = VIEW_LOOKBACK,
+    entry_z: float = VIEW_ENTRY_Z,
+    exit_z: float = VIEW_EXIT_Z,
+    annual_days: int = ANNUAL_TRADING_DAYS,
+):
+    """
+    Default-parameter backtest of every pair at once: spreads, rolling
+    z-scores and returns are (bars x pairs) matrices; only the event walk
+    and the stats run per pair. Betas come from one static_betas call
+    (NaN-aware: a pair with gaps is fitted on the bars both prices have),
+    then the live path's rolling / cumulative operations, so the stored
+    views are the ones /api/pair would compute.
+
+    Returns (series (pairs x 3 x bars), default view rows (pairs x kept),
+    betas, [metrics per pair]).
+    """
+    t1s = [a for a, _ in pairs]
+    t2s = [b for _, b in pairs]
+    y = prices[t1s].to_numpy(dtype=float)
+    x = prices[t2s].to_numpy(dtype=float)
+    betas = static_betas(y, x)
+
+    spreads = y - betas * x
+    z = rolling_zscore(pd.DataFrame(spreads, index=prices.index), lookback).to_numpy(dtype=float)
+
+    tickers = list(dict.fromkeys(t1s + t2s))
+    col = {t: k for k, t in enumerate(tickers)}
+    returns = prices[tickers].astype(np.float64, copy=False).pct_change().to_numpy()
+    ret1 = returns[:, [col[t] for t in t1s]]
+    ret2 = returns[:, [col[t] for t in t2s]]
+
+    series = np.empty((len(pairs), len(VIEW_COLUMNS), len(prices)))
+    metrics = []
+    for k in range(len(pairs)):
+        pos, legs = simulate_positions(z[:, k], entry_z, exit_z)
+        strat = strategy_returns(pos, ret1[:, k], ret2[:, k], betas[k])
+        trades = build_trades(prices.index, z[:, k], strat, legs)
+        strat_series = pd.Series(strat, index=prices.index)
+        equity = (1 + strat_series.fillna(0)).cumprod()
+        metrics.append(metrics_summary(compute_stats(strat_series, equity, trades, annual_days)))
+        series[k, 0] = spreads[:, k]
+        series[k, 1] = z[:, k]
+        series[k, 2] = equity.to_numpy()
+    rows = lttb_indices_columns(spreads, DEFAULT_MAX_POINTS).T.astype(np.int32)
+    return series, rows, betas, metrics
+
+
+def build_views(
+    csv_path: str = PRICES_CSV,
+    good_pairs_csv: str = GOOD_PAIRS_CSV,
+    store_dir: str = STORE_DIR,
+    views_dir: str = VIEWS_DIR,
+    force: bool = False,
+) -> Optional[int]:
+    """
+    Materialize the default views of every pair in `good_pairs_csv` for
+    the current price store. Skipped when the views already match the
+    store version and pair list (unless force). Files are versioned and
+    meta.json is switched last, as in price_store.write_store. Returns the
+    views version, or None when there was nothing to build.
+    """
+    store = open_store(csv_path, store_dir)
+    good = pd.read_csv(good_pairs_csv)
+    pairs = [
+        (a, b) for a, b in zip(good["ticker1"], good["ticker2"]) if a in store and b in store
+    ]
+    ids = [f"{a}-{b}" for a, b in pairs]
+
+    current = read_meta(views_dir)
+    if (
+        not force
+        and current is not None
+        and current["store_version"] == store.version
+        and list(current["pairs"]) == ids
+    ):
+        print(f"[+] Pair views up to date ({len(ids)} pairs)")
+        return current["version"]
+    if not pairs or len(store) < VIEW_LOOKBACK + 10:
+        print("[+] No cointegrated pairs to precompute")
+        return None
+
+    started = time.perf_counter()
+    prices = store.frame(list(dict.fromkeys([t for p in pairs for t in p])))
+    series, rows, betas, metrics = compute_views(prices, pairs)
+
+    os.makedirs(views_dir, exist_ok=True)
+    version = time.time_ns()
+    with open(os.path.join(views_dir, f"series_{version}.npy"), "wb") as fh:
+        np.save(fh, series)
+    with open(os.path.join(views_dir, f"rows_{version}.npy"), "wb") as fh:
+        np.save(fh, rows)
+    meta = {
+        "version": version,
+        "store_version": store.version,
+        "lookback": VIEW_LOOKBACK,
+        "entry_z": VIEW_ENTRY_Z,
+        "exit_z": VIEW_EXIT_Z,
+        "columns": VIEW_COLUMNS,
+        "pairs": {
+            pid: {"row": k, "beta": float(beta), "metrics": m}
+            for k, (pid, beta, m) in enumerate(zip(ids, betas, metrics))
+        },
+    }
+    tmp = os.path.join(views_dir, META_FILE + ".tmp")
+    with open(tmp, "w") as fh:
+        json.dump(meta, fh)
+    os.replace(tmp, os.path.join(views_dir, META_FILE))
+
+    for name in os.listdir(views_dir):
+        stem, ext = os.path.splitext(name)
+        if ext == ".npy" and not stem.endswith(f"_{version}"):
+            os.remove(os.path.join(views_dir, name))
+
+    print(f"[+] Precomputed {len(ids)} pair views in {time.perf_counter() - started:.2f}s -> {views_dir}/")
+    return version
+
+
+# -----------------------------
+# READ
+# -----------------------------
+def read_meta(views_dir: str = VIEWS_DIR) -> Optional[dict]:
+    try:
+        with open(os.path.join(views_dir, META_FILE)) as fh:
+            return json.load(fh)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def views_version(views_dir: str = VIEWS_DIR) -> Optional[int]:
+    meta = read_meta(views_dir)
+    return meta["version"] if meta else None
+
+
+class PairViews:
+    """
+    Read-only, memory-mapped precomputed views. get() is a dict lookup plus
+    one contiguous (columns x bars) block read; dates come from the price
+    index the views were built on. default_rows() is the downsampling the
+    default chart view would do, so that request skips it too.
+    """
+
+    def __init__(self, meta: dict, views_dir: str, index: pd.DatetimeIndex):
+        self.meta = meta
+        self.version = meta["version"]
+        self.index = index
+        self.params = (meta["lookback"], meta["entry_z"], meta["exit_z"])
+        self._pairs: Dict[str, dict] = meta["pairs"]
+        self.series = np.load(os.path.join(views_dir, f"series_{self.version}.npy"), mmap_mode="r")
+        self.rows = np.load(os.path.join(views_dir, f"rows_{self.version}.npy"), mmap_mode="r")
+
+    def __len__(self) -> int:
+        return len(self._pairs)
+
+    def __contains__(self, pair_id: str) -> bool:
+        return pair_id in self._pairs
+
+    def get(self, pair_id: str) -> Optional[Tuple[float, dict, pd.DataFrame]]:
+        """(beta, metrics, frame of VIEW_COLUMNS) or None if the pair was not precomputed."""
+        entry = self._pairs.get(pair_id)
+        if entry is None:
+            return None
+        block = self.series[entry["row"]]
+        frame = pd.DataFrame(
+            {name: block[k] for k, name in enumerate(self.meta["columns"])}, index=self.index
+        )
+        return entry["beta"], entry["metrics"], frame
+
+    def default_rows(self, pair_id: str) -> np.ndarray:
+        return np.asarray(self.rows[self._pairs[pair_id]["row"]])
+
+
+def load_views(views_dir: str, store_version: int, index: pd.DatetimeIndex) -> Optional[PairViews]:
+    """Views built from `store_version` of the prices, else None (stale or missing)."""
+    meta = read_meta(views_dir)
+    if meta is None or meta["store_version"] != store_version:
+        return None
+    try:
+        return PairViews(meta, views_dir, index)
+    except FileNotFoundError:  # replaced between reading meta and mapping the arrays
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute the default /api/pair views of every good pair")
+    parser.add_argument("--force", action="store_true", help="rebuild even if the views are current")
+    args = parser.parse_args()
+    build_views(force=args.force)
+
+
+if __name__ == "__main__":
+    main()
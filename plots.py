@@ -0,0 +1,40 @@
+import pandas as pd
+
+# matplotlib / seaborn take seconds to import, so they are only imported
+# inside the functions here and nothing on the data or API path imports
+# this module.
+
+
+# -----------------------------
+# CORRELATION ANALYSIS
+# -----------------------------
+def plot_correlation_matrix(prices: pd.DataFrame, title: str = "Correlation Matrix", path: str = None):
+    """
+    Heatmap of daily-return correlations. Shown in a window, or written to
+    `path` through a bare Figure (no GUI backend, safe on headless boxes).
+    """
+    import seaborn as sns
+
+    returns = prices.pct_change().dropna()
+    corr = returns.corr()
+
+    if path:
+        from matplotlib.figure import Figure
+
+        fig = Figure(figsize=(10, 8))
+        ax = fig.subplots()
+        sns.heatmap(corr, annot=True, fmt=".2f", square=True, ax=ax)
+        ax.set_title(title)
+        fig.tight_layout()
+        fig.savefig(path)
+        print(f"[+] Saved correlation heatmap to {path}")
+    else:
+        import matplotlib.pyplot as plt
+
+        plt.figure(figsize=(10, 8))
+        sns.heatmap(corr, annot=True, fmt=".2f", square=True)
+        plt.title(title)
+        plt.tight_layout()
+        plt.show()
+
+    return corr
@@ -0,0 +1,230 @@
+import argparse
+from dataclasses import dataclass
+from typing import List, Tuple
+
+import pandas as pd
+import numpy as np
+
+from backtest_engine import (
+    ANNUAL_TRADING_DAYS,
+    batch_metrics,
+    compute_stats,
+    entry_table,
+    exit_table,
+    walk_events,
+)
+from hedge import HEDGE_WINDOW, hedge_ratio, static_betas
+from price_store import load_prices
+
+# -----------------------------
+# CONFIG
+# -----------------------------
+PRICES_CSV = "prices_daily_adj_close.csv"
+COINTEGRATION_CSV = "cointegration_good_pairs.csv"
+
+WEIGHTINGS = ("equal", "capital")
+# bars x pairs cells per chunk; ~40 MB per float64 working matrix
+CHUNK_CELLS = 5_000_000
+
+
+@dataclass
+class PortfolioBacktest:
+    returns: pd.Series
+    equity: pd.Series
+    pairs: pd.DataFrame  # one row per pair: weight, contribution, own metrics
+    stats: dict
+
+
+# -----------------------------
+# PER-CHUNK MATRICES
+# -----------------------------
+def pair_matrices(
+    y: np.ndarray,
+    x: np.ndarray,
+    lookback: int,
+    entry_z: float,
+    exit_z: float,
+    hedge_method: str = "static",
+    hedge_window: int = HEDGE_WINDOW,
+):
+    """
+    Strategy returns for a block of pairs, y[:, k] vs x[:, k] as (bars x pairs)
+    arrays. Spreads, z-scores and returns are whole-matrix operations; only
+    the position walk runs per column, and that is O(#trades) per pair.
+    Column k matches run_pair_backtest on the same two series.
+    Returns (strat, latest beta per pair, completed trades per pair).
+    """
+    n, m = y.shape
+    if hedge_method == "static":
+        beta = static_betas(y, x)
+        latest = beta
+    else:
+        beta = hedge_ratio(y, x, hedge_method, hedge_window)
+        last_ok = np.where(np.isfinite(beta), np.arange(n)[:, None], -1).max(axis=0)
+        latest = np.where(last_ok >= 0, beta[np.maximum(last_ok, 0), np.arange(m)], np.nan)
+
+    spread = pd.DataFrame(y - beta * x)
+    z = ((spread - spread.rolling(lookback).mean()) / spread.rolling(lookback).std()).to_numpy()
+
+    ret1 = pd.DataFrame(y).pct_change().to_numpy()
+    ret2 = pd.DataFrame(x).pct_change().to_numpy()
+    # a NaN beta (warm-up, degenerate fit) only occurs where we are flat
+    with np.errstate(invalid="ignore"):
+        base = ret1 - np.nan_to_num(beta) * ret2
+    base[np.isnan(ret1) | np.isnan(ret2)] = 0.0
+    if n:
+        base[0] = 0.0
+
+    positions = np.empty((n, m), dtype=np.int8)
+    num_trades = np.zeros(m, dtype=np.int64)
+    for k in range(m):
+        zk = z[:, k]
+        pos, legs = walk_events(n, entry_table(zk, entry_z), exit_table(zk, exit_z))
+        positions[:, k] = pos
+        num_trades[k] = len(legs) - (bool(legs) and legs[-1][2] is None)
+
+    with np.errstate(invalid="ignore"):
+        strat = positions * base
+    return strat, latest, num_trades
+
+
+# -----------------------------
+# PORTFOLIO
+# -----------------------------
+def portfolio_backtest(
+    prices: pd.DataFrame,
+    pairs: List[Tuple[str, str]],
+    lookback: int = 60,
+    entry_z: float = 2.0,
+    exit_z: float = 0.5,
+    weighting: str = "equal",
+    hedge_method: str = "static",
+    hedge_window: int = HEDGE_WINDOW,
+    annual_days: int = ANNUAL_TRADING_DAYS,
+    chunk_cells: int = CHUNK_CELLS,
+) -> PortfolioBacktest:
+    """
+    Backtest every (ticker1, ticker2) pair with the same parameters and
+    combine them into one portfolio with weight 1 / len(pairs) each.
+
+    weighting="equal":   weights are reset every bar, so the portfolio
+                         return is the average pair return.
+    weighting="capital": each pair gets a fixed sleeve of starting capital
+                         that compounds on its own; equity is the sum of
+                         the sleeves.
+
+    Pairs are processed in chunks of about `chunk_cells` (bars x pairs)
+    cells, and only per-bar sums are carried between chunks, so memory
+    does not grow with the size of the universe.
+
+    A pair's contribution is its share of the portfolio's cumulative return.
+    For capital weighting the contributions add up to the cumulative return
+    exactly. For equal weighting they are each pair's summed weighted daily
+    returns, which add up to the portfolio's summed daily returns.
+    """
+    if weighting not in WEIGHTINGS:
+        raise ValueError(f"Unknown weighting '{weighting}'. Use one of {', '.join(WEIGHTINGS)}.")
+    if not pairs:
+        raise ValueError("No pairs selected.")
+    missing = sorted({t for pair in pairs for t in pair if t not in prices.columns})
+    if missing:
+        raise ValueError(f"Tickers not in price data: {', '.join(missing)}.")
+
+    n = len(prices)
+    weight = 1.0 / len(pairs)
+    chunk = max(1, chunk_cells // max(n, 1))
+    col = {t: k for k, t in enumerate(prices.columns)}
+    values = prices.to_numpy(dtype=float)
+
+    port = np.zeros(n)  # equal: weighted return sum, capital: sleeve equity sum
+    rows = []
+    for start in range(0, len(pairs), chunk):
+        block = pairs[start:start + chunk]
+        y = values[:, [col[t1] for t1, _ in block]]
+        x = values[:, [col[t2] for _, t2 in block]]
+        strat, beta, num_trades = pair_matrices(
+            y, x, lookback, entry_z, exit_z, hedge_method, hedge_window
+        )
+        metrics = batch_metrics(strat, annual_days)
+        if weighting == "equal":
+            port += weight * strat.sum(axis=1)
+            contribution = weight * strat.sum(axis=0)
+        else:
+            sleeves = np.cumprod(1 + strat, axis=0)
+            port += weight * sleeves.sum(axis=1)
+            contribution = weight * (sleeves[-1] - 1.0) if n else np.zeros(len(block))
+
+        for k, (t1, t2) in enumerate(block):
+            rows.append(
+                {
+                    "pair": f"{t1}/{t2}",
+                    "ticker1": t1,
+                    "ticker2": t2,
+                    "beta": float(beta[k]),
+                    "weight": weight,
+                    "contribution": float(contribution[k]),
+                    "cumulative_return": float(metrics["cumulative_return"][k]),
+                    "sharpe_ratio": float(metrics["sharpe_ratio"][k]),
+                    "max_drawdown": float(metrics["max_drawdown"][k]),
+                    "num_trades": int(num_trades[k]),
+                }
+            )
+
+    if weighting == "equal":
+        returns = pd.Series(port, index=prices.index)
+        equity = (1 + returns).cumprod()
+    else:
+        equity = pd.Series(port, index=prices.index)
+        returns = equity.pct_change().fillna(0.0)
+
+    pair_df = pd.DataFrame(rows)
+    stats = compute_stats(returns, equity, [], annual_days)
+    del stats["win_rate"], stats["avg_bars_held"]
+    stats["num_trades"] = int(pair_df["num_trades"].sum())
+    stats["num_pairs"] = len(pairs)
+    stats["weighting"] = weighting
+
+    return PortfolioBacktest(returns=returns, equity=equity, pairs=pair_df, stats=stats)
+
+
+def good_pairs(path: str = COINTEGRATION_CSV, max_pairs: int = None) -> List[Tuple[str, str]]:
+    df = pd.read_csv(path)
+    if max_pairs is not None:
+        df = df.head(max_pairs)
+    return list(zip(df["ticker1"], df["ticker2"]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Portfolio backtest over the cointegrated pairs")
+    parser.add_argument("--weighting", choices=WEIGHTINGS, default="equal")
+    parser.add_argument("--max-pairs", type=int, default=None)
+    parser.add_argument("--lookback", type=int, default=60)
+    parser.add_argument("--entry-z", type=float, default=2.0)
+    parser.add_argument("--exit-z", type=float, default=0.5)
+    parser.add_argument("--hedge-method", default="static")
+    args = parser.parse_args()
+
+    prices = load_prices(PRICES_CSV)
+    pairs = [p for p in good_pairs(max_pairs=args.max_pairs) if p[0] in prices and p[1] in prices]
+    print(f"[+] Portfolio backtest over {len(pairs)} pairs ({args.weighting} weighting)...")
+
+    result = portfolio_backtest(
+        prices,
+        pairs,
+        lookback=args.lookback,
+        entry_z=args.entry_z,
+        exit_z=args.exit_z,
+        weighting=args.weighting,
+        hedge_method=args.hedge_method,
+    )
+    result.equity.to_csv("portfolio_equity.csv", header=["equity"])
+    result.pairs.to_csv("portfolio_pairs.csv", index=False)
+    print("[+] Saved portfolio_equity.csv and portfolio_pairs.csv")
+
+    print("\n=== PORTFOLIO SUMMARY ===")
+    for k, v in result.stats.items():
+        print(f"{k:20s}: {v}")
+
+
+if __name__ == "__main__":
+    main()
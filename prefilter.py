@@ -0,0 +1,146 @@
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+import numpy as np
+
+from metrics import span
+
+# -----------------------------
+# CONFIG
+# -----------------------------
+# `--prune` default: a loose return-correlation floor. Cointegrated pairs
+# share a stochastic trend, so their returns correlate; the SSD and
+# cluster screens cut deeper but also drop real pairs, so they are opt-in.
+PRUNE_MIN_CORR = 0.3
+
+PRUNE_DEFAULTS = {"min_corr": PRUNE_MIN_CORR}
+
+
+# -----------------------------
+# PAIRWISE MATRICES
+# -----------------------------
+def _filled(prices: pd.DataFrame) -> np.ndarray:
+    # gaps inside a series carry the last price; bars before a listing stay NaN
+    return prices.ffill().to_numpy(dtype=np.float64)
+
+
+def return_correlation(prices: pd.DataFrame) -> np.ndarray:
+    """
+    (tickers x tickers) correlation of bar returns as one matrix product.
+    Missing returns count as the column mean (zero after centring), so
+    every entry uses the same rows; constant columns get NaN.
+    """
+    p = _filled(prices)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        r = p[1:] / p[:-1] - 1.0
+    r[~np.isfinite(r)] = np.nan
+    r = np.nan_to_num(r - np.nanmean(r, axis=0))
+    norm = np.sqrt(np.einsum("ij,ij->j", r, r))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (r.T @ r) / np.outer(norm, norm)
+
+
+def normalized_ssd(prices: pd.DataFrame) -> np.ndarray:
+    """
+    Sum of squared differences between every two price paths rebased to 1
+    at their first bar (the distance method), from the Gram matrix:
+    ||a - b||^2 = ||a||^2 + ||b||^2 - 2 a.b. Bars before a listing count as 1.
+    """
+    p = _filled(prices)
+    first = pd.DataFrame(p).bfill().to_numpy()[0]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        norm = np.nan_to_num(p / first, nan=1.0)
+    sq = np.einsum("ij,ij->j", norm, norm)
+    ssd = sq[:, None] + sq[None, :] - 2.0 * (norm.T @ norm)
+    return np.maximum(ssd, 0.0)
+
+
+def correlation_clusters(corr: np.ndarray, n_clusters: int) -> np.ndarray:
+    """
+    Cluster label per ticker: average-linkage hierarchical clustering on the
+    correlation distance sqrt((1 - rho) / 2), cut into `n_clusters` groups.
+    """
+    from scipy.cluster.hierarchy import fcluster, linkage
+    from scipy.spatial.distance import squareform
+
+    dist = np.sqrt(np.clip((1.0 - np.nan_to_num(corr)) / 2.0, 0.0, 1.0))
+    np.fill_diagonal(dist, 0.0)
+    tree = linkage(squareform(dist, checks=False), method="average")
+    return fcluster(tree, t=n_clusters, criterion="maxclust")
+
+
+# -----------------------------
+# PRUNING
+# -----------------------------
+def prune_pairs(
+    prices: pd.DataFrame,
+    min_corr: Optional[float] = None,
+    max_corr: Optional[float] = None,
+    ssd_keep: Optional[float] = None,
+    n_clusters: Optional[int] = None,
+    groups: Optional[Dict[str, str]] = None,
+) -> Tuple[List[Tuple[str, str]], List[dict]]:
+    """
+    Narrow the N*(N-1)/2 candidate pairs before the Engle-Granger tests.
+    Filters run in this order, each on the pairs the previous ones kept:
+
+    - groups: only pairs within the same sector (ticker -> sector mapping;
+      tickers missing from it are dropped)
+    - n_clusters: only pairs within the same correlation cluster
+    - min_corr / max_corr: bar-return correlation bounds (max_corr drops
+      near-duplicates such as share classes)
+    - ssd_keep: the lowest-SSD share of what is left, on rebased prices
+
+    Returns (pairs, report): the surviving (ticker1, ticker2) pairs in the
+    scanner's (i, j) order, and one {"filter", "removed", "remaining"} row
+    per filter that ran.
+    """
+    tickers = list(prices.columns)
+    n = len(tickers)
+    rows, cols = np.triu_indices(n, 1)
+    keep = np.ones(len(rows), dtype=bool)
+    report = []
+
+    def apply(name: str, mask: np.ndarray):
+        before = int(keep.sum())
+        keep[:] &= mask
+        report.append({"filter": name, "removed": before - int(keep.sum()), "remaining": int(keep.sum())})
+
+    if groups is not None:
+        labels = np.array([groups.get(t) for t in tickers], dtype=object)
+        known = np.array([g is not None for g in labels])
+        apply("sector", known[rows] & known[cols] & (labels[rows] == labels[cols]))
+
+    if n_clusters or min_corr is not None or max_corr is not None:
+        with span("prune.correlation"):
+            full = return_correlation(prices)
+            corr = full[rows, cols]
+
+    if n_clusters and n > 1:
+        with span("prune.cluster"):
+            labels = correlation_clusters(full, n_clusters)
+        apply(f"cluster(k={n_clusters})", labels[rows] == labels[cols])
+
+    with np.errstate(invalid="ignore"):
+        if min_corr is not None:
+            apply(f"corr>={min_corr:g}", corr >= min_corr)
+        if max_corr is not None:
+            apply(f"corr<={max_corr:g}", corr <= max_corr)
+
+    if ssd_keep is not None and keep.any():
+        with span("prune.ssd"):
+            ssd = normalized_ssd(prices)[rows, cols]
+            cutoff = np.quantile(ssd[keep], ssd_keep)
+        apply(f"ssd(keep={ssd_keep:g})", ssd <= cutoff)
+
+    for row in report:
+        print(f"[+] Prefilter {row['filter']}: removed {row['removed']}, {row['remaining']} left")
+    print(f"[+] Prefilter kept {int(keep.sum())}/{len(keep)} candidate pairs")
+
+    return [(tickers[i], tickers[j]) for i, j in zip(rows[keep], cols[keep])], report
+
+
+def load_sectors(path: str) -> Dict[str, str]:
+    """ticker -> sector from a two-column CSV (ticker, sector)."""
+    df = pd.read_csv(path)
+    return dict(zip(df.iloc[:, 0].astype(str), df.iloc[:, 1].astype(str)))
@@ -0,0 +1,241 @@
+import contextlib
+import json
+import os
+import time
+from typing import List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process use, no cross-process lock
+    fcntl = None
+
+import pandas as pd
+import numpy as np
+
+# -----------------------------
+# CONFIG
+# -----------------------------
+PRICES_CSV = "prices_daily_adj_close.csv"
+STORE_DIR = "prices_store"
+
+# float64, or float32 to halve the matrix (memory map, page cache, disk). float32
+# keeps 24 significant bits: each price is rounded by at most 6e-8 of its value
+# (under a hundredth of a cent at $1000). Readers widen the columns they compute on
+# back to float64, so only that input rounding reaches spreads, z-scores and returns.
+STORE_DTYPE = os.environ.get("PRICE_STORE_DTYPE", "float64")
+STORE_DTYPES = ("float64", "float32")
+
+# values_<version>.npy: (tickers x bars), one contiguous row per ticker
+# dates_<version>.npy:  datetime64 index values
+# meta.json points at the current version
+META_FILE = "meta.json"
+# held while a store is (re)built, so concurrent processes convert once
+LOCK_FILE = ".lock"
+
+
+# -----------------------------
+# WRITE
+# -----------------------------
+def _file_signature(path: str):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+@contextlib.contextmanager
+def store_lock(store_dir: str = STORE_DIR):
+    """
+    Exclusive cross-process lock on the store directory. Writers hold it
+    around the CSV write and write_store, so readers that find the store
+    stale wait for the new version instead of converting it themselves.
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    with open(os.path.join(store_dir, LOCK_FILE), "a") as fh:
+        if fcntl is not None:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def write_store(
+    prices: pd.DataFrame, store_dir: str = STORE_DIR, source: str = None, dtype: str = None
+) -> None:
+    """
+    Persist a (dates x tickers) price frame as a binary store, in `dtype`
+    (default STORE_DTYPE).
+
+    Values are stored ticker-major so every ticker is one contiguous block
+    and a memory-mapped column read only touches that ticker's pages.
+    Each write goes to new versioned files and meta.json is switched last,
+    so readers never see a half-written store; older versions are unlinked
+    (processes that still have them mapped keep their view).
+    """
+    dtype = dtype or STORE_DTYPE
+    if dtype not in STORE_DTYPES:
+        raise ValueError(f"Unknown store dtype '{dtype}'. Use one of {', '.join(STORE_DTYPES)}.")
+    os.makedirs(store_dir, exist_ok=True)
+    values = np.ascontiguousarray(prices.to_numpy(dtype=dtype).T)
+    dates = prices.index.to_numpy()
+
+    version = time.time_ns()
+    for name, arr in (("values", values), ("dates", dates)):
+        with open(os.path.join(store_dir, f"{name}_{version}.npy"), "wb") as fh:
+            np.save(fh, arr)
+
+    meta = {
+        "version": version,
+        "tickers": [str(t) for t in prices.columns],
+        "index_name": prices.index.name,
+        "shape": list(values.shape),
+        "dtype": str(values.dtype),
+        "written_at": time.time(),
+        "source": source,
+        "source_signature": _file_signature(source) if source else None,
+    }
+    tmp = os.path.join(store_dir, META_FILE + ".tmp")
+    with open(tmp, "w") as fh:
+        json.dump(meta, fh)
+    os.replace(tmp, os.path.join(store_dir, META_FILE))
+
+    for name in os.listdir(store_dir):
+        stem, ext = os.path.splitext(name)
+        if ext == ".npy" and not stem.endswith(f"_{version}"):
+            os.remove(os.path.join(store_dir, name))
+
+
+# -----------------------------
+# READ
+# -----------------------------
+def _read_range(arr: np.memmap, start: int, count: int) -> np.ndarray:
+    # positioned read of `count` items of a memory-mapped .npy, bypassing the map
+    with open(arr.filename, "rb") as fh:
+        return np.fromfile(fh, dtype=arr.dtype, count=count, offset=arr.offset + start * arr.itemsize)
+
+
+class PriceStore:
+    """Read-only, memory-mapped view of a price store directory."""
+
+    def __init__(self, store_dir: str = STORE_DIR):
+        self.store_dir = store_dir
+        with open(os.path.join(store_dir, META_FILE)) as fh:
+            self.meta = json.load(fh)
+        self.version = self.meta["version"]
+        self.values = np.load(
+            os.path.join(store_dir, f"values_{self.version}.npy"), mmap_mode="r"
+        )
+        # memory-mapped too, so chunked readers never load the whole history
+        self.dates = np.load(
+            os.path.join(store_dir, f"dates_{self.version}.npy"), mmap_mode="r"
+        )
+        self.tickers: List[str] = self.meta["tickers"]
+        self._col = {t: k for k, t in enumerate(self.tickers)}
+        self._index = None
+
+    @property
+    def index(self) -> pd.DatetimeIndex:
+        if self._index is None:
+            self._index = pd.DatetimeIndex(np.asarray(self.dates), name=self.meta["index_name"])
+        return self._index
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self._col
+
+    def column(self, ticker: str) -> np.ndarray:
+        """Zero-copy memory-mapped price array for one ticker."""
+        return self.values[self._col[ticker]]
+
+    def read(self, ticker: str, start: int, stop: int) -> np.ndarray:
+        """
+        Bars [start, stop) of one ticker as a fresh float64 array, read
+        straight from the file so no mapped pages stay resident once it is
+        released.
+        """
+        row = self._col[ticker] * self.values.shape[1]
+        return _read_range(self.values, row + start, stop - start).astype(np.float64, copy=False)
+
+    def read_dates(self, start: int, stop: int) -> np.ndarray:
+        return _read_range(self.dates, start, stop - start)
+
+    def frame(self, tickers: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        (dates x tickers) DataFrame in the stored dtype. Without `tickers`
+        the frame wraps the memory map directly; with a subset only those
+        rows are read from disk.
+        """
+        if tickers is None:
+            values, columns = self.values, self.tickers
+        else:
+            values = self.values[[self._col[t] for t in tickers]]
+            columns = list(tickers)
+        return pd.DataFrame(values.T, index=self.index, columns=columns, copy=False)
+
+
+def store_is_current(store_dir: str = STORE_DIR, csv_path: str = PRICES_CSV) -> bool:
+    """True if the store exists and was built from the CSV as it is now, in STORE_DTYPE."""
+    meta_path = os.path.join(store_dir, META_FILE)
+    if not os.path.exists(meta_path):
+        return False
+    csv_sig = _file_signature(csv_path)
+    if csv_sig is None:
+        return True  # no CSV to compare against
+    with open(meta_path) as fh:
+        meta = json.load(fh)
+    return meta.get("source_signature") == csv_sig and meta.get("dtype") == STORE_DTYPE
+
+
+def store_version(store_dir: str = STORE_DIR) -> Optional[int]:
+    """
+    Version counter of the published store (bumped by every write_store),
+    or None if there is none. Cheap enough to poll: processes compare it
+    with the version they have mapped to pick up refreshes.
+    """
+    try:
+        with open(os.path.join(store_dir, META_FILE)) as fh:
+            return json.load(fh)["version"]
+    except (FileNotFoundError, ValueError, KeyError):
+        return None
+
+
+def open_store(csv_path: str = PRICES_CSV, store_dir: str = STORE_DIR) -> PriceStore:
+    """
+    Open the binary store, converting `csv_path` once if the store is
+    missing or older than the CSV. Conversion happens under store_lock, so
+    when several processes (API workers) start on a stale store one of
+    them parses the CSV and the rest map its output.
+    """
+    if not store_is_current(store_dir, csv_path):
+        with store_lock(store_dir):
+            if not store_is_current(store_dir, csv_path):
+                prices = pd.read_csv(csv_path, index_col=0, parse_dates=True)
+                write_store(prices, store_dir, source=csv_path)
+    return PriceStore(store_dir)
+
+
+def load_prices(
+    csv_path: str = PRICES_CSV,
+    store_dir: str = STORE_DIR,
+    tickers: Optional[List[str]] = None,
+) -> pd.DataFrame:
+    return open_store(csv_path, store_dir).frame(tickers)
+
+
+def main():
+    # one-time conversion of an existing CSV; start.sh runs this before the
+    # API workers so they all map the same published files
+    store = open_store()
+    print(
+        f"[+] Price store at {STORE_DIR}: {len(store.tickers)} tickers x {len(store)} bars, "
+        f"{store.values.dtype} (version {store.version})"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -24,13 +24,29 @@ export interface PairsResponse {
   pairs: PairItem[];
 }
 
+// ?max_points / from / to / method on the time-series endpoints
+export interface SeriesQuery {
+  max_points?: number; // 0 = every point
+  from?: string;
+  to?: string;
+  method?: "lttb" | "minmax";
+}
+
+// parallel arrays, downsampled server-side; total_points = rows in the window
+export interface EquitySeries {
+  times: string[];
+  equity: (number | null)[];
+  total_points: number;
+}
+
 export interface PairDetailResponse {
   pair: string;
   beta: number;
   times: string[];
-  spread: number[];
-  zscore: number[];
-  equity: number[];
+  spread: (number | null)[];
+  zscore: (number | null)[];
+  equity: (number | null)[];
+  total_points: number;
   metrics: {
     pair: string;
     beta: number;
@@ -44,9 +60,12 @@ export interface PairDetailResponse {
     num_trades: number;
     win_rate: number | null;
     avg_bars_held: number | null;
+    hedge_method?: HedgeMethod;
   };
 }
 
+export type HedgeMethod = "static" | "rolling_ols" | "kalman";
+
 export interface BacktestRequest {
   ticker1: string;
   ticker2: string;
@@ -55,16 +74,119 @@ export interface BacktestRequest {
   lookback: number;
   entry_z: number;
   exit_z: number;
+  hedge_method?: HedgeMethod;
+  hedge_window?: number;
 }
 
 export interface BacktestResponse {
   metrics: PairDetailResponse["metrics"];
-  equity_curve: { timestamp: string; equity: number }[];
+  equity_curve: EquitySeries;
   trades: any[]; // you can tighten this type later if you want
 }
 
+export interface BacktestSweepRequest {
+  ticker1: string;
+  ticker2: string;
+  start_date?: string | null;
+  end_date?: string | null;
+  lookbacks: number[];
+  entry_zs: number[];
+  exit_zs: number[];
+  hedge_method?: HedgeMethod;
+  hedge_window?: number;
+}
+
+// surfaces are indexed [lookback][entry_z][exit_z]
+export interface BacktestSweepResponse {
+  pair: string;
+  beta: number;
+  lookbacks: number[];
+  entry_zs: number[];
+  exit_zs: number[];
+  surface: {
+    sharpe_ratio: (number | null)[][][];
+    cumulative_return: (number | null)[][][];
+    max_drawdown: (number | null)[][][];
+    num_trades: number[][][];
+  };
+}
+
+export interface PortfolioBacktestRequest {
+  pairs?: string[] | null; // "AAPL-MSFT" ids; default: all cointegrated pairs
+  max_pairs?: number | null;
+  start_date?: string | null;
+  end_date?: string | null;
+  lookback?: number;
+  entry_z?: number;
+  exit_z?: number;
+  weighting?: "equal" | "capital";
+  hedge_method?: HedgeMethod;
+  hedge_window?: number;
+}
+
+export interface PortfolioPairContribution {
+  pair: string;
+  ticker1: string;
+  ticker2: string;
+  beta: number | null;
+  weight: number;
+  contribution: number;
+  cumulative_return: number;
+  sharpe_ratio: number | null;
+  max_drawdown: number | null;
+  num_trades: number;
+}
+
+export interface PortfolioBacktestResponse {
+  metrics: {
+    cumulative_return: number;
+    annualized_return: number | null;
+    sharpe_ratio: number | null;
+    max_drawdown: number | null;
+    num_trades: number;
+    num_pairs: number;
+    weighting: "equal" | "capital";
+  };
+  equity_curve: EquitySeries;
+  pairs: PortfolioPairContribution[]; // sorted by contribution, best first
+}
+
+export type JobKind = "backtest" | "sweep" | "scan" | "stability";
+export type JobStatus = "queued" | "running" | "done" | "failed" | "cancelled" | "timeout";
+
+export interface JobRequest {
+  kind: JobKind;
+  params: Record<string, unknown>; // BacktestRequest / BacktestSweepRequest / scan or stability options
+  timeout?: number | null; // seconds
+}
+
+export interface JobInfo {
+  id: string;
+  kind: JobKind;
+  status: JobStatus;
+  progress: number; // 0..1
+  message: string;
+  error: string | null;
+  created_at: number;
+  started_at: number | null;
+  finished_at: number | null;
+  timeout: number;
+  params?: Record<string, unknown>;
+  result?: any; // same shape as the matching synchronous endpoint; stability: per-pair summary table
+}
+
 // ---------- API HELPERS ----------
 
+function seriesQueryString(query?: SeriesQuery): string {
+  if (!query) return "";
+  const params = new URLSearchParams();
+  Object.entries(query).forEach(([key, value]) => {
+    if (value !== undefined && value !== null) params.set(key, String(value));
+  });
+  const qs = params.toString();
+  return qs ? `?${qs}` : "";
+}
+
 async function handleResponse<T>(res: Response): Promise<T> {
   if (!res.ok) {
     const text = await res.text();
@@ -84,16 +206,18 @@ export async function fetchPairs(): Promise<PairsResponse> {
 }
 
 export async function fetchPairDetail(
-  pairId: string
+  pairId: string,
+  query?: SeriesQuery
 ): Promise<PairDetailResponse> {
-  const res = await fetch(`${API_BASE}/api/pair/${pairId}`);
+  const res = await fetch(`${API_BASE}/api/pair/${pairId}${seriesQueryString(query)}`);
   return handleResponse<PairDetailResponse>(res);
 }
 
 export async function runBacktest(
-  body: BacktestRequest
+  body: BacktestRequest,
+  query?: SeriesQuery
 ): Promise<BacktestResponse> {
-  const res = await fetch(`${API_BASE}/api/backtest`, {
+  const res = await fetch(`${API_BASE}/api/backtest${seriesQueryString(query)}`, {
     method: "POST",
     headers: {
       "Content-Type": "application/json",
@@ -102,3 +226,65 @@ export async function runBacktest(
   });
   return handleResponse<BacktestResponse>(res);
 }
+
+export async function runBacktestSweep(
+  body: BacktestSweepRequest
+): Promise<BacktestSweepResponse> {
+  const res = await fetch(`${API_BASE}/api/backtest/sweep`, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+    },
+    body: JSON.stringify(body),
+  });
+  return handleResponse<BacktestSweepResponse>(res);
+}
+
+export async function runPortfolioBacktest(
+  body: PortfolioBacktestRequest,
+  query?: SeriesQuery
+): Promise<PortfolioBacktestResponse> {
+  const res = await fetch(`${API_BASE}/api/portfolio/backtest${seriesQueryString(query)}`, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+    },
+    body: JSON.stringify(body),
+  });
+  return handleResponse<PortfolioBacktestResponse>(res);
+}
+
+export async function submitJob(body: JobRequest): Promise<JobInfo> {
+  const res = await fetch(`${API_BASE}/api/jobs`, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+    },
+    body: JSON.stringify(body),
+  });
+  return handleResponse<JobInfo>(res);
+}
+
+export async function fetchJob(id: string): Promise<JobInfo> {
+  const res = await fetch(`${API_BASE}/api/jobs/${id}`);
+  return handleResponse<JobInfo>(res);
+}
+
+export async function cancelJob(id: string): Promise<JobInfo> {
+  const res = await fetch(`${API_BASE}/api/jobs/${id}`, {
+    method: "DELETE",
+  });
+  return handleResponse<JobInfo>(res);
+}
+
+// Server-sent events: onUpdate fires on every progress change and once more
+// with the final job (including its result); returns a function that stops listening.
+export function watchJob(id: string, onUpdate: (job: JobInfo) => void): () => void {
+  const source = new EventSource(`${API_BASE}/api/jobs/${id}/events`);
+  source.addEventListener("progress", (e) => onUpdate(JSON.parse((e as MessageEvent).data)));
+  source.addEventListener("end", (e) => {
+    onUpdate(JSON.parse((e as MessageEvent).data));
+    source.close();
+  });
+  return () => source.close();
+}
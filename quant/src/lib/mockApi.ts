@@ -52,11 +52,13 @@ export const mockApi = {
 
     const detail = await fetchPairDetail(id);
 
-    const spreadData = detail.times.map((t, idx) => ({
-      timestamp: t,
-      spread: round2(detail.spread[idx]),
-      zScore: round2(detail.zscore[idx]),
-    }));
+    // z-score is null during the lookback warm-up -> skip those points
+    const spreadData = detail.times.flatMap((t, idx) => {
+      const spread = detail.spread[idx];
+      const zScore = detail.zscore[idx];
+      if (spread === null || zScore === null) return [];
+      return [{ timestamp: t, spread: round2(spread), zScore: round2(zScore) }];
+    });
 
     // Build Pair type that UI expects
     const pair: Pair = {
@@ -121,10 +123,11 @@ export const mockApi = {
 
     const apiResp = await runBacktestApi(body);
 
-    // Map equity curve
-    const equityCurve: EquityCurvePoint[] = apiResp.equity_curve.map((pt) => ({
-      timestamp: pt.timestamp,
-      equity: round2(pt.equity),
+    // Map the columnar equity series
+    const series = apiResp.equity_curve;
+    const equityCurve: EquityCurvePoint[] = series.times.map((t, idx) => ({
+      timestamp: t,
+      equity: round2(series.equity[idx] ?? 1),
     }));
 
     // Map trades into UI shape
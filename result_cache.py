@@ -0,0 +1,127 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+# -----------------------------
+# CONFIG
+# -----------------------------
+RESULT_CACHE_BYTES = 64 * 1024 * 1024  # in-memory tier
+RESULT_CACHE_DIR = os.environ.get("RESULT_CACHE_DIR")  # on-disk tier, off unless set
+
+
+def cache_key(kind: str, params: dict, data_version: str) -> str:
+    """Stable digest of (endpoint kind, request parameters, data version)."""
+    raw = json.dumps([kind, params, data_version], sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    LRU cache of rendered response bodies (bytes), bounded by total size.
+
+    Keys embed the data version, so a refresh never serves stale results;
+    when a new version shows up the older entries are dropped from both
+    tiers instead of waiting to be evicted. The optional disk tier keeps
+    one subdirectory per data version and survives server restarts.
+    """
+
+    def __init__(self, max_bytes: int = RESULT_CACHE_BYTES, disk_dir: Optional[str] = RESULT_CACHE_DIR):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._bytes = 0
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.evictions = 0
+
+    # ---- versioning ----
+    def set_version(self, data_version: str) -> None:
+        with self._lock:
+            if data_version == self._version:
+                return
+            self._version = data_version
+            self._entries.clear()
+            self._bytes = 0
+        if self.disk_dir and os.path.isdir(self.disk_dir):
+            for name in os.listdir(self.disk_dir):
+                if name != data_version:
+                    shutil.rmtree(os.path.join(self.disk_dir, name), ignore_errors=True)
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, self._version, f"{key}.json")
+
+    # ---- lookups ----
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return body
+
+        if self.disk_dir and self._version is not None:
+            try:
+                with open(self._disk_path(key), "rb") as fh:
+                    body = fh.read()
+            except FileNotFoundError:
+                body = None
+            if body is not None:
+                self._remember(key, body)
+                with self._lock:
+                    self.disk_hits += 1
+                return body
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, body: bytes) -> None:
+        self._remember(key, body)
+        if self.disk_dir and self._version is not None:
+            path = self._disk_path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as fh:
+                fh.write(body)
+            os.replace(tmp, path)
+
+    def _remember(self, key: str, body: bytes) -> None:
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._entries[key] = body
+            self._bytes += len(body)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def record_not_modified(self) -> None:
+        with self._lock:
+            self.not_modified += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "data_version": self._version,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified,
+                "evictions": self.evictions,
+                "disk_dir": self.disk_dir,
+            }
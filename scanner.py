@@ -0,0 +1,308 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import pandas as pd
+import numpy as np
+
+from metrics import span
+from prefilter import PRUNE_DEFAULTS, load_sectors, prune_pairs
+from price_store import load_prices
+
+# -----------------------------
+# CONFIG
+# -----------------------------
+PRICES_CSV = "prices_daily_adj_close.csv"
+ALL_PAIRS_CSV = "cointegration_all_pairs.csv"
+GOOD_PAIRS_CSV = "cointegration_good_pairs.csv"
+CHECKPOINT_CSV = "cointegration_scan_checkpoint.csv"
+
+MIN_OBS = 100
+CHUNK_SIZE = 500
+PVALUE_THRESHOLD = 0.05
+
+RESULT_COLUMNS = ["ticker1", "ticker2", "pvalue", "score"]
+
+
+# -----------------------------
+# WORKER SIDE
+# -----------------------------
+_SHM = None
+_PRICES = None
+
+
+def _attach_prices(shm_name: str, shape, dtype: str):
+    # Runs once per worker: map the parent's price matrix, no per-task pickling
+    global _SHM, _PRICES
+    _SHM = shared_memory.SharedMemory(name=shm_name)
+    _PRICES = np.ndarray(shape, dtype=np.dtype(dtype), buffer=_SHM.buf)
+
+
+def test_pair(a: np.ndarray, b: np.ndarray, min_obs: int = MIN_OBS):
+    """
+    Engle-Granger test on two aligned price columns after dropping rows
+    where either is NaN. Returns (pvalue, score), or None if too little data.
+    """
+    from statsmodels.tsa.stattools import coint  # ~2s to import; only this engine needs it
+
+    mask = ~(np.isnan(a) | np.isnan(b))
+    if mask.sum() < min_obs:
+        return None
+    score, pvalue, _ = coint(a[mask], b[mask])
+    return pvalue, score
+
+
+def scan_chunk(
+    pairs, min_obs: int = MIN_OBS, prices: np.ndarray = None, engine: str = "statsmodels"
+):
+    """
+    Test a chunk of (i, j) column pairs. Skipped pairs are reported with
+    NaN p-value/score so a resumed scan knows they were already visited.
+    """
+    prices = _PRICES if prices is None else prices
+    with span(f"scan.chunk.{engine}"):
+        if engine == "batched":
+            return scan_chunk_batched(pairs, min_obs, prices)
+        out = []
+        for i, j in pairs:
+            res = test_pair(prices[:, i], prices[:, j], min_obs)
+            pvalue, score = res if res is not None else (np.nan, np.nan)
+            out.append((i, j, pvalue, score))
+        return out
+
+
+def scan_chunk_batched(pairs, min_obs: int, prices: np.ndarray):
+    """
+    Same contract as scan_chunk, but pairs sharing an anchor column are
+    tested together with coint_batch.coint_anchor. Columns with gaps fall
+    back to the per-pair statsmodels test on their overlapping rows.
+    """
+    from coint_batch import coint_anchor
+
+    complete = ~np.isnan(prices).any(axis=0)
+    by_anchor = {}
+    for i, j in pairs:
+        by_anchor.setdefault(i, []).append(j)
+
+    found = {}
+    for i, js in by_anchor.items():
+        fast = [j for j in js if complete[i] and complete[j]]
+        if fast and prices.shape[0] >= min_obs:
+            scores, pvalues = coint_anchor(prices[:, i], prices[:, fast])
+            for j, pvalue, score in zip(fast, pvalues, scores):
+                found[(i, j)] = (float(pvalue), float(score))
+        elif fast:
+            for j in fast:
+                found[(i, j)] = (np.nan, np.nan)
+        for j in js:
+            if (i, j) not in found:
+                res = test_pair(prices[:, i], prices[:, j], min_obs)
+                found[(i, j)] = res if res is not None else (np.nan, np.nan)
+
+    return [(i, j, *found[(i, j)]) for i, j in pairs]
+
+
+# -----------------------------
+# CHECKPOINTING
+# -----------------------------
+def load_checkpoint(path: str) -> pd.DataFrame:
+    if path is None or not os.path.exists(path):
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+    return pd.read_csv(path)
+
+
+def append_checkpoint(path: str, rows) -> None:
+    if path is None or not rows:
+        return
+    df = pd.DataFrame(rows, columns=RESULT_COLUMNS)
+    header = not os.path.exists(path)
+    df.to_csv(path, mode="a", header=header, index=False)
+
+
+# -----------------------------
+# SCAN
+# -----------------------------
+def chunk_pairs(pairs, chunk_size: int):
+    for k in range(0, len(pairs), chunk_size):
+        yield pairs[k:k + chunk_size]
+
+
+def scan_pairs(
+    prices: pd.DataFrame,
+    pvalue_threshold: float = PVALUE_THRESHOLD,
+    workers: int = None,
+    chunk_size: int = CHUNK_SIZE,
+    checkpoint: str = None,
+    min_obs: int = MIN_OBS,
+    pairs=None,
+    engine: str = "statsmodels",
+    progress=None,
+    prune: dict = None,
+):
+    """
+    Parallel Engle-Granger scan over all column pairs of `prices`
+    (or just the given list of (ticker1, ticker2) pairs).
+
+    `prune` takes prefilter.prune_pairs keyword arguments: without an
+    explicit pair list, only the candidates that survive the correlation /
+    cluster / distance screens are tested (see prefilter.py).
+
+    The price matrix is published once in shared memory and every worker
+    attaches to it in its initializer; tasks only carry column indices.
+    Finished chunks are appended to `checkpoint`, and pairs already present
+    there are skipped, so an interrupted scan can be resumed.
+
+    engine="batched" swaps the per-pair statsmodels coint call for the
+    matrix Engle-Granger engine in coint_batch (p-values agree to ~1e-8).
+
+    `progress(done, total)` is called after every finished chunk.
+
+    Returns (all_pairs, good_pairs) with the same schema and ordering as
+    stat_arb_pairs.find_cointegrated_pairs.
+    """
+    tickers = list(prices.columns)
+    col = {t: k for k, t in enumerate(tickers)}
+    n = len(tickers)
+    if pairs is None and prune:
+        pairs, _ = prune_pairs(prices, **prune)
+    if pairs is None:
+        todo = [(i, j) for i in range(n) for j in range(i + 1, n)]
+    else:
+        todo = [(col[a], col[b]) for a, b in pairs]
+
+    done = load_checkpoint(checkpoint)
+    finished = {}
+    for row in done.itertuples(index=False):
+        if row.ticker1 in col and row.ticker2 in col:
+            finished[(col[row.ticker1], col[row.ticker2])] = (row.pvalue, row.score)
+    remaining = [p for p in todo if p not in finished]
+    if finished:
+        print(f"[+] Resuming scan: {len(todo) - len(remaining)}/{len(todo)} pairs already done")
+
+    workers = workers or os.cpu_count() or 1
+    total = len(remaining)
+    print(f"[+] Scanning {total} pairs on {workers} worker(s) [{engine}]...")
+
+    def record(rows):
+        for i, j, pvalue, score in rows:
+            finished[(i, j)] = (pvalue, score)
+        with span("scan.checkpoint"):
+            append_checkpoint(
+                checkpoint,
+                [(tickers[i], tickers[j], pvalue, score) for i, j, pvalue, score in rows],
+            )
+
+    matrix = np.ascontiguousarray(prices.to_numpy(dtype=np.float64))
+    started = time.perf_counter()
+    completed = 0
+    next_report = 0.0
+
+    def report(count):
+        nonlocal next_report
+        if progress is not None:
+            progress(count, total)
+        frac = count / total if total else 1.0
+        if frac >= next_report or count == total:
+            elapsed = time.perf_counter() - started
+            rate = count / elapsed if elapsed > 0 else 0.0
+            print(f"[+] {count}/{total} pairs ({frac:.0%}), {rate:.0f} pairs/s")
+            next_report = frac + 0.05
+
+    if workers == 1 or total <= chunk_size:
+        for chunk in chunk_pairs(remaining, chunk_size):
+            rows = scan_chunk(chunk, min_obs, matrix, engine)
+            record(rows)
+            completed += len(chunk)
+            report(completed)
+    else:
+        shm = shared_memory.SharedMemory(create=True, size=max(matrix.nbytes, 1))
+        try:
+            np.ndarray(matrix.shape, dtype=matrix.dtype, buffer=shm.buf)[:] = matrix
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_attach_prices,
+                initargs=(shm.name, matrix.shape, matrix.dtype.str),
+            ) as pool:
+                futures = {
+                    pool.submit(scan_chunk, chunk, min_obs, None, engine): len(chunk)
+                    for chunk in chunk_pairs(remaining, chunk_size)
+                }
+                for fut in as_completed(futures):
+                    record(fut.result())
+                    completed += futures[fut]
+                    report(completed)
+        finally:
+            shm.close()
+            shm.unlink()
+
+    # keep the serial scan's (i, j) order so sort_values ties break the same way
+    with span("scan.collect"):
+        results = [
+            (tickers[i], tickers[j], *finished[(i, j)])
+            for i, j in todo
+            if not np.isnan(finished[(i, j)][0])
+        ]
+        res_df = pd.DataFrame(results, columns=RESULT_COLUMNS).sort_values("pvalue")
+        good_pairs = res_df[res_df["pvalue"] < pvalue_threshold].reset_index(drop=True)
+
+    print(f"[+] Total pairs tested: {len(results)}")
+    print(f"[+] Cointegrated pairs found (p < {pvalue_threshold}): {len(good_pairs)}")
+    return res_df, good_pairs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel cointegration scanner")
+    parser.add_argument("--prices", default=PRICES_CSV)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--pvalue", type=float, default=PVALUE_THRESHOLD)
+    parser.add_argument("--engine", choices=["statsmodels", "batched"], default="statsmodels")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_CSV)
+    parser.add_argument("--fresh", action="store_true", help="ignore an existing checkpoint")
+    prune = parser.add_argument_group("candidate pruning (see prefilter.py)")
+    prune.add_argument("--prune", action="store_true",
+                       help=f"screen candidates first with the defaults ({PRUNE_DEFAULTS})")
+    prune.add_argument("--min-corr", type=float, default=None, help="minimum bar-return correlation")
+    prune.add_argument("--max-corr", type=float, default=None, help="maximum bar-return correlation")
+    prune.add_argument("--ssd-keep", type=float, default=None,
+                       help="keep this share of candidates with the lowest rebased-price SSD")
+    prune.add_argument("--clusters", type=int, default=None,
+                       help="only pairs within the same of N correlation clusters")
+    prune.add_argument("--sectors", default=None, help="CSV of ticker,sector; only same-sector pairs")
+    args = parser.parse_args()
+
+    if args.fresh and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+
+    prune = dict(PRUNE_DEFAULTS) if args.prune else {}
+    for key, value in (("min_corr", args.min_corr), ("max_corr", args.max_corr),
+                       ("ssd_keep", args.ssd_keep), ("n_clusters", args.clusters)):
+        if value is not None:
+            prune[key] = value
+    if args.sectors:
+        prune["groups"] = load_sectors(args.sectors)
+
+    prices = load_prices(args.prices)
+    all_pairs, good_pairs = scan_pairs(
+        prices,
+        pvalue_threshold=args.pvalue,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        checkpoint=args.checkpoint,
+        engine=args.engine,
+        prune=prune,
+    )
+
+    all_pairs.to_csv(ALL_PAIRS_CSV, index=False)
+    good_pairs.to_csv(GOOD_PAIRS_CSV, index=False)
+    print(f"[+] Saved cointegration results to {ALL_PAIRS_CSV} and {GOOD_PAIRS_CSV}")
+
+    # scan is complete -> the checkpoint is no longer needed
+    if os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+import asyncio
+import copy
+from typing import AsyncIterator, List, Sequence, Tuple
+
+import pandas as pd
+import numpy as np
+
+from backtest_engine import rolling_zscore, simulate_positions
+from hedge import static_betas
+
+# -----------------------------
+# CONFIG
+# -----------------------------
+SIGNAL_LOOKBACK = 60
+SIGNAL_ENTRY_Z = 2.0
+SIGNAL_EXIT_Z = 0.5
+# recompute the window moments from the ring buffer this often, so
+# rounding in the O(1) updates cannot accumulate over a long session
+RESYNC_BARS = 10_000
+
+
+# -----------------------------
+# ROLLING STATE
+# -----------------------------
+class RollingWindow:
+    """
+    Last `length` values of every column in a (length x columns) ring
+    buffer, with the window mean and sum of squared deviations kept by
+    Welford's update (remove the value leaving, add the one arriving).
+    One push costs O(columns), whatever the window length. NaNs are held
+    in the buffer but left out of the moments; `full` is true for columns
+    whose whole window is valid, matching pandas rolling(length).
+    """
+
+    def __init__(self, length: int, columns: int):
+        self.length = length
+        self.buffer = np.full((length, columns), np.nan)
+        self.head = 0  # slot the next push overwrites
+        self.pushes = 0
+        self.count = np.zeros(columns)
+        self.mean = np.zeros(columns)
+        self.m2 = np.zeros(columns)
+
+    def push(self, x: np.ndarray):
+        old = self.buffer[self.head]
+        leaving = ~np.isnan(old)
+        arriving = ~np.isnan(x)
+
+        # remove the oldest value
+        count = self.count - leaving
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(leaving, np.where(count > 0, self.mean - (old - self.mean) / count, 0.0), self.mean)
+        m2 = np.where(leaving, self.m2 - (old - self.mean) * (old - mean), self.m2)
+
+        # add the new one
+        count = count + arriving
+        delta = np.where(arriving, x - mean, 0.0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(arriving, mean + delta / count, mean)
+        m2 = np.where(arriving, m2 + delta * (x - mean), m2)
+
+        self.buffer[self.head] = x
+        self.head = (self.head + 1) % self.length
+        self.count, self.mean, self.m2 = count, np.where(count > 0, mean, 0.0), np.maximum(m2, 0.0)
+        self.pushes += 1
+        if self.pushes % RESYNC_BARS == 0:
+            self.resync()
+
+    def resync(self):
+        valid = ~np.isnan(self.buffer)
+        self.count = valid.sum(axis=0).astype(float)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self.mean = np.where(self.count > 0, np.nansum(self.buffer, axis=0) / self.count, 0.0)
+        self.m2 = np.nansum((self.buffer - self.mean) ** 2, axis=0)
+
+    @property
+    def full(self) -> np.ndarray:
+        return self.count == self.length
+
+    def std(self) -> np.ndarray:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.sqrt(self.m2 / (self.count - 1))
+
+
+# -----------------------------
+# SIGNAL ENGINE
+# -----------------------------
+class SignalEngine:
+    """
+    Live z-scores and positions for many pairs, advanced one bar at a time.
+
+    Each update is a handful of vectorized operations over all pairs: the
+    spread s1 - beta * s2 enters a RollingWindow, z is (spread - mean) / std
+    over the last `lookback` spreads, and the flat / long / short state
+    machine of backtest_engine runs on the new z (at most one transition per
+    pair per bar). Fed the same bars, the z-scores and positions are those
+    of run_pair_backtest with the same static beta.
+    """
+
+    def __init__(
+        self,
+        tickers: Sequence[str],
+        pairs: Sequence[Tuple[str, str]],
+        betas: np.ndarray,
+        lookback: int = SIGNAL_LOOKBACK,
+        entry_z: float = SIGNAL_ENTRY_Z,
+        exit_z: float = SIGNAL_EXIT_Z,
+    ):
+        col = {t: k for k, t in enumerate(tickers)}
+        self.tickers = list(tickers)
+        self.pairs = [(a, b) for a, b in pairs]
+        self.ids = [f"{a}-{b}" for a, b in self.pairs]
+        self.i1 = np.array([col[a] for a, _ in self.pairs], dtype=np.intp)
+        self.i2 = np.array([col[b] for _, b in self.pairs], dtype=np.intp)
+        self.betas = np.asarray(betas, dtype=float)
+        self.lookback = lookback
+        self.entry_z = entry_z
+        self.exit_z = exit_z
+
+        self.window = RollingWindow(lookback, len(self.pairs))
+        self.z = np.full(len(self.pairs), np.nan)
+        self.position = np.zeros(len(self.pairs), dtype=np.int8)
+        self.bars = 0
+        self.last_time = None
+
+    @classmethod
+    def from_history(
+        cls,
+        prices: pd.DataFrame,
+        pairs: Sequence[Tuple[str, str]],
+        lookback: int = SIGNAL_LOOKBACK,
+        entry_z: float = SIGNAL_ENTRY_Z,
+        exit_z: float = SIGNAL_EXIT_Z,
+    ) -> "SignalEngine":
+        """Static betas fitted on `prices`, then the state after every bar of it (see load_history)."""
+        t1s = [a for a, _ in pairs]
+        t2s = [b for _, b in pairs]
+        betas = static_betas(prices[t1s].to_numpy(dtype=float), prices[t2s].to_numpy(dtype=float))
+        engine = cls(prices.columns, pairs, betas, lookback, entry_z, exit_z)
+        engine.load_history(prices)
+        return engine
+
+    def load_history(self, prices: pd.DataFrame):
+        """
+        The state warm(prices) would leave, without the per-bar loop: the
+        z-scores of every bar come from rolling_zscore over the whole spread
+        matrix, positions from simulate_positions per pair, and the window
+        from the last `lookback` spreads (moments recomputed by resync).
+        Matches warm to rounding (~1e-14 in the window moments).
+        """
+        values = prices[self.tickers].to_numpy(dtype=float)
+        n = len(values)
+        if not n:
+            return
+        spread = values[:, self.i1] - self.betas * values[:, self.i2]
+        z = rolling_zscore(pd.DataFrame(spread), self.lookback).to_numpy()
+        self.z = z[-1].copy()
+        self.position = np.array(
+            [simulate_positions(z[:, k], self.entry_z, self.exit_z)[0][-1] for k in range(z.shape[1])],
+            dtype=np.int8,
+        )
+
+        # oldest spread in slot 0, so the next push (head 0) replaces it
+        tail = spread[-self.lookback:]
+        self.window.buffer[:] = np.nan
+        self.window.buffer[self.lookback - len(tail):] = tail
+        self.window.head = 0
+        self.window.pushes = n
+        self.window.resync()
+        self.bars = n
+        self.last_time = prices.index[-1]
+
+    def warm(self, prices: pd.DataFrame):
+        """Replay every bar of `prices` through update; see load_history for the vectorized path."""
+        values = prices[self.tickers].to_numpy(dtype=float)
+        for row in values:
+            self.update(row)
+        if len(prices):
+            self.last_time = prices.index[-1]
+
+    def update(self, prices: np.ndarray, time=None) -> List[dict]:
+        """Advance every pair by one bar (prices in `tickers` order); returns the signals it fired."""
+        spread = prices[self.i1] - self.betas * prices[self.i2]
+        self.window.push(spread)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            z = np.where(self.window.full, (spread - self.window.mean) / self.window.std(), np.nan)
+        self.z = z
+        self.bars += 1
+        self.last_time = time
+
+        pos = self.position
+        with np.errstate(invalid="ignore"):
+            exits = (pos != 0) & (np.abs(z) < self.exit_z)
+            shorts = (pos == 0) & (z > self.entry_z)
+            longs = (pos == 0) & (z < -self.entry_z)
+        if self.bars == 1:  # bar 0 never trades
+            shorts[:] = longs[:] = False
+
+        events = []
+        fired = exits | shorts | longs
+        if fired.any():
+            for k in np.flatnonzero(fired):
+                side = pos[k] if exits[k] else (-1 if shorts[k] else 1)
+                events.append(
+                    {
+                        "pair": self.ids[k],
+                        "action": "exit" if exits[k] else "enter",
+                        "side": "long_spread" if side == 1 else "short_spread",
+                        "zscore": float(z[k]),
+                    }
+                )
+            self.position = np.where(exits, 0, np.where(shorts, -1, np.where(longs, 1, pos))).astype(np.int8)
+        return events
+
+    def copy(self) -> "SignalEngine":
+        """An independent engine in the same state, e.g. one per feed from a shared warmed engine."""
+        return copy.deepcopy(self)
+
+    def state(self) -> List[dict]:
+        return [
+            {
+                "id": pid,
+                "ticker1": a,
+                "ticker2": b,
+                "beta": float(beta),
+                "zscore": None if np.isnan(z) else float(z),
+                "position": int(pos),
+            }
+            for pid, (a, b), beta, z, pos in zip(self.ids, self.pairs, self.betas, self.z, self.position)
+        ]
+
+
+# -----------------------------
+# FEEDS
+# -----------------------------
+async def replay_feed(
+    prices: pd.DataFrame, start: int, interval: float = 1.0
+) -> AsyncIterator[Tuple[pd.Timestamp, np.ndarray]]:
+    """
+    Local stand-in for a market-data source: the stored bars from row
+    `start` on, one every `interval` seconds, as (timestamp, prices row).
+    Anything yielding the same tuples can drive a SignalEngine.
+    """
+    values = prices.to_numpy(dtype=float)
+    for k in range(start, len(values)):
+        yield prices.index[k], values[k]
+        await asyncio.sleep(interval)
@@ -0,0 +1,214 @@
+from typing import Optional, Sequence
+
+import pandas as pd
+import numpy as np
+
+from backtest_engine import ANNUAL_TRADING_DAYS, batch_metrics, run_pair_backtest, strategy_returns
+
+# -----------------------------
+# CONFIG
+# -----------------------------
+SIGNIFICANCE_METHODS = ("bootstrap", "permutation")
+DEFAULT_RESAMPLES = 2000
+MAX_RESAMPLES = 100_000
+DEFAULT_CONFIDENCE = 0.95
+# (resamples x bars) cells per chunk; ~32 MB per float64 working matrix. Chunks
+# are also the unit of parallel work and of seeding, so results depend on the
+# seed but not on how many processes ran them.
+CHUNK_CELLS = 4_000_000
+# below this many cells in total the chunks run in the calling process
+PARALLEL_CELLS = 8_000_000
+
+# metrics with a one-sided "is it positive?" p-value
+TESTED_METRICS = ("sharpe_ratio", "cumulative_return")
+
+
+# -----------------------------
+# RESAMPLES
+# -----------------------------
+def stationary_bootstrap_indices(n: int, rows: int, mean_block: float, rng: np.random.Generator) -> np.ndarray:
+    """
+    (rows x n) bar indices of Politis-Romano stationary bootstrap samples:
+    blocks start at uniform random bars, wrap around the end, and have
+    geometric lengths with mean `mean_block`. Built without a Python loop:
+    each bar either starts a new block (probability 1 / mean_block) or
+    continues the previous one, and its index is the block's start plus its
+    offset into the block.
+    """
+    starts = rng.integers(0, n, size=(rows, n))
+    new_block = rng.random((rows, n)) < 1.0 / mean_block
+    new_block[:, 0] = True
+    bars = np.arange(n)
+    block_at = np.maximum.accumulate(np.where(new_block, bars, 0), axis=1)
+    return (np.take_along_axis(starts, block_at, axis=1) + bars - block_at) % n
+
+
+def position_segments(pos: np.ndarray, start: int):
+    """(lengths, values) of the runs of constant position in pos[start:]."""
+    window = np.asarray(pos[start:], dtype=np.int8)
+    if not len(window):
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int8)
+    edges = np.flatnonzero(np.diff(window)) + 1
+    bounds = np.concatenate([[0], edges, [len(window)]])
+    return np.diff(bounds), window[bounds[:-1]]
+
+
+def permuted_positions(lengths: np.ndarray, values: np.ndarray, rows: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    (rows x sum(lengths)) position paths with the segments (flat spells and
+    trades) in a random order per row: the same trades, sides and holding
+    periods entered at random times, never overlapping.
+    """
+    order = np.argsort(rng.random((rows, len(lengths))), axis=1)
+    return np.repeat(values[order].ravel(), lengths[order].ravel()).reshape(rows, -1)
+
+
+def _resample_chunk(task) -> dict:
+    """
+    Metrics of one chunk of resamples (run in a pool process for large
+    counts): rows of bootstrapped strategy returns, or of permuted positions
+    applied to the pair's per-bar spread returns.
+    """
+    method, seed, rows, data, param, annual_days = task
+    rng = np.random.default_rng(seed)
+    if method == "bootstrap":
+        strat = data[stationary_bootstrap_indices(len(data), rows, param, rng)]
+    else:
+        base, lengths, values = data
+        strat = np.zeros((rows, len(base)))
+        start = len(base) - int(lengths.sum())
+        strat[:, start:] = permuted_positions(lengths, values, rows, rng) * base[start:]
+    return batch_metrics(strat.T, annual_days)
+
+
+def run_resamples(
+    method: str,
+    data,
+    param,
+    n_bars: int,
+    resamples: int,
+    seed: np.random.SeedSequence,
+    annual_days: int,
+    executor=None,
+    chunk_cells: int = CHUNK_CELLS,
+) -> dict:
+    rows = max(1, chunk_cells // max(n_bars, 1))
+    sizes = [min(rows, resamples - k) for k in range(0, resamples, rows)]
+    tasks = [
+        (method, child, size, data, param, annual_days)
+        for child, size in zip(seed.spawn(len(sizes)), sizes)
+    ]
+    if executor is not None and len(tasks) > 1 and resamples * n_bars >= PARALLEL_CELLS:
+        results = list(executor.map(_resample_chunk, tasks))
+    else:
+        results = [_resample_chunk(task) for task in tasks]
+    return {key: np.concatenate([r[key] for r in results]) for key in results[0]}
+
+
+# -----------------------------
+# SUMMARIES
+# -----------------------------
+def _distribution(values: np.ndarray, confidence: float) -> dict:
+    finite = values[np.isfinite(values)]
+    if not len(finite):
+        return {"mean": None, "std": None, "ci_low": None, "ci_high": None}
+    tail = (1.0 - confidence) / 2.0
+    low, high = np.quantile(finite, [tail, 1.0 - tail])
+    return {
+        "mean": float(finite.mean()),
+        "std": float(finite.std(ddof=1)) if len(finite) > 1 else None,
+        "ci_low": float(low),
+        "ci_high": float(high),
+    }
+
+
+def _p_value(null: np.ndarray, observed: float) -> Optional[float]:
+    # share of the null at least as good as observed, with the +1 that keeps it above 0
+    if not np.isfinite(observed):
+        return None
+    null = null[np.isfinite(null)]
+    return float((1 + np.count_nonzero(null >= observed)) / (len(null) + 1))
+
+
+# -----------------------------
+# TEST
+# -----------------------------
+def pair_significance(
+    s1: pd.Series,
+    s2: pd.Series,
+    beta,
+    lookback: int = 60,
+    entry_z: float = 2.0,
+    exit_z: float = 0.5,
+    resamples: int = DEFAULT_RESAMPLES,
+    seed: int = 0,
+    block_size: Optional[float] = None,
+    methods: Sequence[str] = SIGNIFICANCE_METHODS,
+    confidence: float = DEFAULT_CONFIDENCE,
+    annual_days: int = ANNUAL_TRADING_DAYS,
+    executor=None,
+) -> dict:
+    """
+    How much of a pair backtest's Sharpe, return and drawdown could be luck.
+
+    bootstrap:   stationary block bootstrap of the strategy's daily returns
+                 (mean block `block_size`, default n ** (1/3) bars), giving
+                 confidence intervals; the p-value tests metric > 0 on the
+                 bootstrap distribution shifted to zero mean.
+    permutation: the backtest's trades entered at random times (segments of
+                 the position path shuffled after the z-score warm-up) on
+                 the same spread returns; the p-value is the share of random
+                 timings doing at least as well.
+
+    Every resample is a row of a (resamples x bars) matrix scored by
+    batch_metrics, in chunks of ~CHUNK_CELLS. Chunk k draws from child k of
+    SeedSequence(seed), so a seed reproduces the result whether or not the
+    chunks ran on `executor` (a concurrent.futures pool).
+    """
+    unknown = sorted(set(methods) - set(SIGNIFICANCE_METHODS))
+    if unknown or not methods:
+        raise ValueError(f"Unknown significance method(s) {unknown}. Use {', '.join(SIGNIFICANCE_METHODS)}.")
+    if not 1 <= resamples <= MAX_RESAMPLES:
+        raise ValueError(f"resamples must be between 1 and {MAX_RESAMPLES}.")
+
+    bt = run_pair_backtest(s1, s2, beta, lookback, entry_z, exit_z, annual_days)
+    strat = bt.strategy_return.to_numpy(dtype=float)
+    n = len(strat)
+    observed = {key: float(v[0]) for key, v in batch_metrics(strat[:, None], annual_days).items()}
+    block_size = float(block_size) if block_size else float(max(1, round(n ** (1.0 / 3.0))))
+
+    seeds = dict(zip(SIGNIFICANCE_METHODS, np.random.SeedSequence(seed).spawn(len(SIGNIFICANCE_METHODS))))
+    out = {
+        "observed": {key: value if np.isfinite(value) else None for key, value in observed.items()},
+        "num_trades": len(bt.trades),
+        "resamples": resamples,
+        "seed": seed,
+        "confidence": confidence,
+    }
+
+    if "bootstrap" in methods:
+        boot = run_resamples("bootstrap", strat, block_size, n, resamples, seeds["bootstrap"], annual_days, executor)
+        out["bootstrap"] = {
+            "block_size": block_size,
+            "metrics": {key: _distribution(values, confidence) for key, values in boot.items()},
+            "p_values": {
+                key: _p_value(boot[key] - np.nanmean(boot[key]), observed[key]) for key in TESTED_METRICS
+            },
+        }
+
+    if "permutation" in methods:
+        # per-bar return of a long spread position: what a position of +1 earns
+        ret1 = s1.pct_change().to_numpy(dtype=float)
+        ret2 = s2.pct_change().to_numpy(dtype=float)
+        base = strategy_returns(np.ones(n), ret1, ret2, beta)
+        z = bt.zscore.to_numpy()
+        warm = np.flatnonzero(np.isfinite(z))
+        lengths, sides = position_segments(bt.position.to_numpy(), int(warm[0]) if len(warm) else n)
+        perm = run_resamples(
+            "permutation", (base, lengths, sides), None, n, resamples, seeds["permutation"], annual_days, executor
+        )
+        out["permutation"] = {
+            "metrics": {key: _distribution(values, confidence) for key, values in perm.items()},
+            "p_values": {key: _p_value(perm[key], observed[key]) for key in TESTED_METRICS},
+        }
+    return out
@@ -0,0 +1,297 @@
+import argparse
+import time
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+from coint_batch import SQRTEPS, mackinnon_pvalues
+from price_store import PRICES_CSV, open_store
+
+# -----------------------------
+# CONFIG
+# -----------------------------
+GOOD_PAIRS_CSV = "cointegration_good_pairs.csv"
+STABILITY_CSV = "cointegration_stability.csv"
+
+STABILITY_WINDOW = 252  # bars per Engle-Granger test (~1 trading year)
+MIN_WINDOW = 40
+PVALUE_THRESHOLD = 0.05
+# bars of history per chunk of windows: each chunk keeps a (bars x d x d)
+# running sum, d = 2 * maxlag + 5 (~14 MB at the default window). Chunks are
+# the unit of parallel work.
+CHUNK_BARS = 1024
+# below this many windows a pair's chunks run in the calling process
+PARALLEL_WINDOWS = 4096
+
+# one row per pair of pairs_stability / cointegration_stability.csv
+SUMMARY_COLUMNS = [
+    "ticker1",
+    "ticker2",
+    "windows",
+    "latest_statistic",
+    "latest_pvalue",
+    "share_cointegrated",
+    "cointegrated_now",
+    "since",
+]
+
+
+def adf_maxlag(window: int) -> int:
+    """adfuller's default maxlag for a residual series of `window` bars."""
+    maxlag = int(np.ceil(12.0 * np.power(window / 100.0, 1 / 4.0)))
+    return min(window // 2 - 1, maxlag)
+
+
+# -----------------------------
+# SUFFICIENT STATISTICS
+# -----------------------------
+def _lagged_terms(y: np.ndarray, x: np.ndarray, maxlag: int) -> np.ndarray:
+    """
+    (bars x d) rows u_g = [1, y[g-1], x[g-1], dy[g], dx[g], ..., dy[g-maxlag], dx[g-maxlag]].
+
+    Every ADF regressor of an Engle-Granger residual e = y - a - b * x is a
+    linear combination of these: e[g-1] = y[g-1] - a - b x[g-1] and
+    de[g-k] = dy[g-k] - b dx[g-k]. Terms from before the start are 0; no
+    window reads them with a non-zero coefficient.
+    """
+    n = len(y)
+    u = np.zeros((n, 3 + 2 * (maxlag + 1)))
+    u[:, 0] = 1.0
+    u[1:, 1] = y[:-1]
+    u[1:, 2] = x[:-1]
+    dy, dx = np.diff(y), np.diff(x)
+    for k in range(maxlag + 1):
+        if k + 1 < n:
+            u[k + 1:, 3 + 2 * k] = dy[:n - 1 - k]
+            u[k + 1:, 4 + 2 * k] = dx[:n - 1 - k]
+    return u
+
+
+def _running_sums(a: np.ndarray) -> np.ndarray:
+    # sums over bars [i, j) are out[j] - out[i]
+    out = np.zeros((a.shape[0] + 1,) + a.shape[1:])
+    np.cumsum(a, axis=0, out=out[1:])
+    return out
+
+
+def _residual_moments(C: np.ndarray, P: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    """C S C^T per window, S = sum of u u^T over bars [lo, hi): the residual regressors' cross-products."""
+    S = P[hi] - P[lo]
+    return np.matmul(np.matmul(C, S), C.transpose(0, 2, 1))
+
+
+def _window_chunk(task) -> tuple:
+    """
+    Engle-Granger statistics of windows [s, s + window) for each s in
+    `starts` over the bars y, x of one chunk.
+
+    The cointegrating regression of every window comes from running sums of
+    y, x, y^2, xy, x^2; the ADF regressions from running sums of the outer
+    products u u^T of _lagged_terms, mapped through each window's (a, b).
+    Moving the window is two lookups in those sums, so the cost per window
+    is independent of its length. Lag selection follows
+    coint_batch.adf_statistics (AIC on the common maxlag-trimmed sample,
+    chosen lag refit on its full sample).
+    """
+    y, x, starts, window, maxlag = task
+    y = y - y.mean()  # centred: keeps the running sums small, results unchanged
+    x = x - x.mean()
+    starts = np.asarray(starts)
+    ends = starts + window
+    m = len(starts)
+
+    # cointegrating regression y ~ a + b x per window
+    lv = _running_sums(np.column_stack([y, x, y * y, x * y, x * x]))
+    sy, sx, syy, sxy, sxx = (lv[ends] - lv[starts]).T
+    my, mx = sy / window, sx / window
+    vxx, vxy, vyy = sxx - window * mx * mx, sxy - window * mx * my, syy - window * my * my
+    with np.errstate(invalid="ignore", divide="ignore"):
+        beta = np.where(vxx > 0, vxy / vxx, 0.0)
+        rsquared = beta * vxy / vyy
+    alpha = my - beta * mx
+    stats = np.full(m, -np.inf)  # (almost) colinear windows, as coint_anchor
+    live = np.flatnonzero(rsquared < 1 - 100 * SQRTEPS)
+    if not len(live):
+        return stats, beta
+    starts, ends, alpha, slope = starts[live], ends[live], alpha[live], beta[live]
+
+    # rows: de[g], e[g-1], de[g-1..g-maxlag] in terms of u
+    d = 3 + 2 * (maxlag + 1)
+    C = np.zeros((len(live), maxlag + 2, d))
+    C[:, 0, 3], C[:, 0, 4] = 1.0, -slope
+    C[:, 1, 0], C[:, 1, 1], C[:, 1, 2] = -alpha, 1.0, -slope
+    for k in range(1, maxlag + 1):
+        C[:, 1 + k, 3 + 2 * k], C[:, 1 + k, 4 + 2 * k] = 1.0, -slope
+
+    u = _lagged_terms(y, x, maxlag)
+    P = _running_sums(u[:, :, None] * u[:, None, :])
+    del u
+
+    # lag selection on the common sample: dependent bars starts + maxlag + 1 .. ends - 1
+    rows = window - 1 - maxlag
+    Q = _residual_moments(C, P, starts + maxlag + 1, ends)
+    yy, c, G = Q[:, 0, 0], Q[:, 1:, 0], Q[:, 1:, 1:]
+    aic = np.empty((maxlag + 1, len(live)))
+    for lag in range(maxlag + 1):
+        k = lag + 1
+        b = np.linalg.solve(G[:, :k, :k], c[:, :k, None])[:, :, 0]
+        ssr = yy - np.einsum("mk,mk->m", b, c[:, :k])
+        llf = -rows / 2.0 * (np.log(2 * np.pi) + np.log(ssr / rows) + 1)
+        aic[lag] = -2.0 * llf + 2.0 * k
+    best = np.argmin(aic, axis=0)  # ties -> shortest lag, like _autolag
+
+    for lag in np.unique(best):
+        cols = np.flatnonzero(best == lag)
+        k = int(lag) + 1
+        Q = _residual_moments(C[cols, :k + 1], P, starts[cols] + k, ends[cols])
+        yy, c, G = Q[:, 0, 0], Q[:, 1:, 0], Q[:, 1:, 1:]
+        b = np.linalg.solve(G, c[:, :, None])[:, :, 0]
+        ssr = yy - np.einsum("mk,mk->m", b, c)
+        e0 = np.zeros((k, 1))
+        e0[0] = 1.0
+        g00 = np.linalg.solve(G, np.broadcast_to(e0, (len(cols), k, 1)))[:, 0, 0]
+        stats[live[cols]] = b[:, 0] / np.sqrt(ssr / (window - 1 - k - int(lag)) * g00)
+    return stats, beta
+
+
+def rolling_coint(
+    y: np.ndarray,
+    x: np.ndarray,
+    window: int = STABILITY_WINDOW,
+    step: int = 1,
+    executor=None,
+    chunk_bars: int = CHUNK_BARS,
+):
+    """
+    Engle-Granger test of y against x on every `window`-bar window, one
+    window ending every `step` bars (the last one at the final bar); the
+    rolling equivalent of coint(y[s:s + window], x[s:s + window]).
+
+    Returns (ends, scores, pvalues, betas): ends are the index of each
+    window's last bar. Windows are split into chunks of ~chunk_bars bars of
+    history that run on `executor` (a concurrent.futures pool) when there
+    are PARALLEL_WINDOWS or more; inputs must be NaN-free and aligned.
+    """
+    y = np.asarray(y, dtype=float)
+    x = np.asarray(x, dtype=float)
+    n = len(y)
+    if window < MIN_WINDOW:
+        raise ValueError(f"window must be at least {MIN_WINDOW} bars.")
+    if n < window:
+        raise ValueError(f"Not enough data: {n} bars for a {window}-bar window.")
+
+    starts = np.arange(n - window, -1, -step)[::-1]
+    per_chunk = max(1, chunk_bars // step)
+    tasks = []
+    for k in range(0, len(starts), per_chunk):
+        chunk = starts[k:k + per_chunk]
+        lo, hi = chunk[0], chunk[-1] + window
+        tasks.append((y[lo:hi], x[lo:hi], chunk - lo, window, adf_maxlag(window)))
+
+    if executor is not None and len(tasks) > 1 and len(starts) >= PARALLEL_WINDOWS:
+        results = list(executor.map(_window_chunk, tasks))
+    else:
+        results = [_window_chunk(task) for task in tasks]
+    scores = np.concatenate([r[0] for r in results])
+    betas = np.concatenate([r[1] for r in results])
+    return starts + window - 1, scores, mackinnon_pvalues(scores), betas
+
+
+# -----------------------------
+# PAIRS
+# -----------------------------
+def pair_stability(
+    s1: pd.Series,
+    s2: pd.Series,
+    window: int = STABILITY_WINDOW,
+    step: int = 1,
+    executor=None,
+) -> pd.DataFrame:
+    """
+    Rolling Engle-Granger of one pair over the bars both prices exist,
+    indexed by each window's last date: statistic, pvalue, beta.
+    """
+    both = s1.notna().to_numpy() & s2.notna().to_numpy()
+    index = s1.index[both]
+    ends, scores, pvalues, betas = rolling_coint(
+        s1.to_numpy(dtype=float)[both], s2.to_numpy(dtype=float)[both], window, step, executor
+    )
+    return pd.DataFrame({"statistic": scores, "pvalue": pvalues, "beta": betas}, index=index[ends])
+
+
+def stability_summary(frame: pd.DataFrame, pvalue_threshold: float = PVALUE_THRESHOLD) -> dict:
+    """How long and how recently a pair's rolling test stayed below the threshold."""
+    passed = frame["pvalue"].to_numpy() < pvalue_threshold
+    changed = np.flatnonzero(passed != passed[-1])
+    streak = changed[-1] + 1 if len(changed) else 0
+    return {
+        "windows": len(frame),
+        "latest_statistic": float(frame["statistic"].iloc[-1]),
+        "latest_pvalue": float(frame["pvalue"].iloc[-1]),
+        "share_cointegrated": float(passed.mean()),
+        "cointegrated_now": bool(passed[-1]),
+        # last date of the first window in the current run of passing (or failing) windows
+        "since": frame.index[streak].strftime("%Y-%m-%d"),
+    }
+
+
+def _pair_summary(task) -> dict:
+    t1, t2, s1, s2, window, step, pvalue_threshold = task
+    summary = stability_summary(pair_stability(s1, s2, window, step), pvalue_threshold)
+    return {"ticker1": t1, "ticker2": t2, **summary}
+
+
+def pairs_stability(
+    prices: pd.DataFrame,
+    pairs: pd.DataFrame,
+    window: int = STABILITY_WINDOW,
+    step: int = 1,
+    pvalue_threshold: float = PVALUE_THRESHOLD,
+    executor=None,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> pd.DataFrame:
+    """
+    stability_summary of every (ticker1, ticker2) row of `pairs`, one pair
+    per task on `executor` if given. Pairs with fewer than `window` shared
+    bars are left out.
+    """
+    tasks = [
+        (t1, t2, prices[t1], prices[t2], window, step, pvalue_threshold)
+        for t1, t2 in zip(pairs["ticker1"], pairs["ticker2"])
+        if (prices[t1].notna() & prices[t2].notna()).sum() >= window
+    ]
+    results = executor.map(_pair_summary, tasks) if executor is not None else map(_pair_summary, tasks)
+    rows = []
+    for done, row in enumerate(results, start=1):
+        rows.append(row)
+        if progress is not None:
+            progress(done, len(tasks))
+    return pd.DataFrame(rows, columns=SUMMARY_COLUMNS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rolling cointegration stability of every good pair")
+    parser.add_argument("--window", type=int, default=STABILITY_WINDOW)
+    parser.add_argument("--step", type=int, default=5)
+    parser.add_argument("--pvalue", type=float, default=PVALUE_THRESHOLD)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--out", default=STABILITY_CSV)
+    args = parser.parse_args()
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    prices = open_store(PRICES_CSV).frame()
+    pairs = pd.read_csv(GOOD_PAIRS_CSV)
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        table = pairs_stability(prices, pairs, args.window, args.step, args.pvalue, executor=pool)
+    table.to_csv(args.out, index=False)
+    print(
+        f"[+] {len(table)} pairs, {int(table['cointegrated_now'].sum()) if len(table) else 0} still "
+        f"cointegrated in the last {args.window} bars ({time.perf_counter() - started:.2f}s) -> {args.out}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -7,5 +7,11 @@ if [ ! -f prices_daily_adj_close.csv ]; then
   python manage_data.py
 fi
 
-echo "[+] Starting API server..."
-uvicorn api_server:app --host 0.0.0.0 --port ${PORT:-8000}
+# publish the binary price store once; every worker maps these files
+# read-only instead of parsing the CSV into its own copy
+python price_store.py
+# and the default /api/pair payloads of the cointegrated pairs (no-op if current)
+python pair_views.py
+
+echo "[+] Starting API server (${API_WORKERS:-1} worker(s))..."
+uvicorn api_server:app --host 0.0.0.0 --port ${PORT:-8000} --workers ${API_WORKERS:-1}
@@ -1,11 +1,12 @@
+import argparse
 import pandas as pd
 import numpy as np
-import yfinance as yf
-import matplotlib.pyplot as plt
-import seaborn as sns
-from statsmodels.tsa.stattools import coint
+import os
 from datetime import datetime
 
+from data_providers import PriceProvider, YFinanceProvider
+from price_store import store_lock, write_store
+
 # -----------------------------
 # CONFIG
 # -----------------------------
@@ -17,29 +18,21 @@ TICKERS = [
 START_DATE = "2015-01-01"
 END_DATE = datetime.today().strftime("%Y-%m-%d")
 
+# process-pool size for the cointegration scan (see scanner.py)
+SCAN_WORKERS = os.cpu_count()
+# "statsmodels" (per-pair coint) or "batched" (coint_batch.py)
+SCAN_ENGINE = "statsmodels"
+# candidate screens run before the tests (prefilter.prune_pairs kwargs,
+# e.g. prefilter.PRUNE_DEFAULTS); None tests every pair
+SCAN_PRUNE = None
+
 
 # -----------------------------
 # DATA DOWNLOAD
 # -----------------------------
-def download_price_data(tickers, start, end):
-    print(f"[+] Downloading data from {start} to {end} for {len(tickers)} tickers...")
-
-    # Force yfinance to keep OHLCV columns, including Adj Close
-    data = yf.download(tickers, start=start, end=end, auto_adjust=False)
-
-    # If multiple tickers, yfinance returns a MultiIndex columns (field, ticker)
-    if isinstance(data.columns, pd.MultiIndex):
-        # Select only the "Adj Close" level -> columns become tickers
-        data = data["Adj Close"]
-    else:
-        # Single ticker case: keep as DataFrame
-        data = data.to_frame(name="Adj Close")
-
-    data = data.sort_index()
-    # Clean: drop days where everything is NaN
-    data = data.dropna(how="all")
-    print(f"[+] Data shape: {data.shape}")
-    return data
+def download_price_data(tickers, start, end, provider: PriceProvider = None):
+    provider = provider or YFinanceProvider()
+    return provider.fetch(tickers, start, end)
 
 
 # -----------------------------
@@ -53,30 +46,36 @@ def clean_price_data(prices: pd.DataFrame) -> pd.DataFrame:
     return prices_ffill
 
 
-# -----------------------------
-# CORRELATION ANALYSIS
-# -----------------------------
-def plot_correlation_matrix(prices: pd.DataFrame, title: str = "Correlation Matrix"):
-    returns = prices.pct_change().dropna()
-    corr = returns.corr()
-
-    plt.figure(figsize=(10, 8))
-    sns.heatmap(corr, annot=True, fmt=".2f", square=True)
-    plt.title(title)
-    plt.tight_layout()
-    plt.show()
-
-    return corr
-
-
 # -----------------------------
 # COINTEGRATION SCAN
 # -----------------------------
-def find_cointegrated_pairs(prices: pd.DataFrame, pvalue_threshold: float = 0.05):
+def find_cointegrated_pairs(
+    prices: pd.DataFrame,
+    pvalue_threshold: float = 0.05,
+    workers: int = None,
+    checkpoint: str = None,
+    engine: str = "statsmodels",
+    prune: dict = None,
+):
     """
     Run Engle-Granger cointegration test on all pairs.
     Return list of (ticker1, ticker2, pvalue, score).
+
+    Pass `workers` (and optionally a resumable `checkpoint` CSV) to spread
+    the tests over a process pool via scanner.scan_pairs. engine="batched"
+    opts into the matrix Engle-Granger implementation in coint_batch.py.
+    `prune` screens the candidates first (prefilter.prune_pairs kwargs);
+    pairs it removes are not tested and do not appear in the results.
     """
+    if workers is not None or checkpoint is not None or engine != "statsmodels" or prune:
+        from scanner import scan_pairs
+
+        return scan_pairs(
+            prices, pvalue_threshold, workers=workers, checkpoint=checkpoint, engine=engine, prune=prune
+        )
+
+    from statsmodels.tsa.stattools import coint
+
     tickers = prices.columns
     n = len(tickers)
     results = []
@@ -113,22 +112,34 @@ def find_cointegrated_pairs(prices: pd.DataFrame, pvalue_threshold: float = 0.05
 # -----------------------------
 # MAIN PIPELINE
 # -----------------------------
-def main():
+def main(plot: bool = True, plot_file: str = None):
+    """
+    Full rebuild. plot=False is the headless mode (cron, manage_data.py):
+    no correlation heatmap and matplotlib is never imported. plot_file
+    saves the heatmap instead of opening a window.
+    """
     # 1) Download
     prices_raw = download_price_data(TICKERS, START_DATE, END_DATE)
 
     # 2) Clean
     prices = clean_price_data(prices_raw)
 
-    # 3) Save raw prices to CSV for future research
-    prices.to_csv("prices_daily_adj_close.csv")
-    print("[+] Saved cleaned prices to prices_daily_adj_close.csv")
+    # 3) Save raw prices to CSV for future research, plus the binary store
+    with store_lock():
+        prices.to_csv("prices_daily_adj_close.csv")
+        write_store(prices, source="prices_daily_adj_close.csv")
+    print("[+] Saved cleaned prices to prices_daily_adj_close.csv and prices_store/")
+
+    # 4) Correlation matrix (optional; plotting lives in plots.py)
+    if plot or plot_file:
+        from plots import plot_correlation_matrix
 
-    # 4) Correlation matrix
-    corr = plot_correlation_matrix(prices, title="Daily Returns Correlation")
+        plot_correlation_matrix(prices, title="Daily Returns Correlation", path=plot_file)
 
     # 5) Cointegration scan
-    all_pairs, good_pairs = find_cointegrated_pairs(prices, pvalue_threshold=0.05)
+    all_pairs, good_pairs = find_cointegrated_pairs(
+        prices, pvalue_threshold=0.05, workers=SCAN_WORKERS, engine=SCAN_ENGINE, prune=SCAN_PRUNE
+    )
 
     # 6) Save results
     all_pairs.to_csv("cointegration_all_pairs.csv", index=False)
@@ -141,4 +152,8 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Download prices and build the cointegration table")
+    parser.add_argument("--headless", action="store_true", help="skip the correlation heatmap")
+    parser.add_argument("--plot-file", help="save the heatmap to this image file instead of showing it")
+    args = parser.parse_args()
+    main(plot=not args.headless, plot_file=args.plot_file)
@@ -0,0 +1,399 @@
+import argparse
+import os
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+import pandas as pd
+import numpy as np
+
+from backtest_engine import (
+    ANNUAL_TRADING_DAYS,
+    Trade,
+    entry_table,
+    exit_table,
+    rolling_zscore,
+    strategy_returns,
+)
+from hedge import HEDGE_METHODS, HEDGE_WINDOW, kalman_beta, rolling_ols_beta
+from price_store import PRICES_CSV, STORE_DIR, PriceStore, open_store
+
+# -----------------------------
+# CONFIG
+# -----------------------------
+# bars per chunk; ~15 float64 working arrays of this length are live at once
+STREAM_CHUNK_BARS = 250_000
+
+
+@dataclass
+class StreamedBacktest:
+    trades: List[Trade]
+    stats: dict
+    beta: float  # static beta, or the last rolling estimate
+    bars: int
+    chunks: int
+
+
+# -----------------------------
+# READING
+# -----------------------------
+def bar_range(store: PriceStore, start=None, end=None) -> slice:
+    """Positions of start <= t <= end, by binary search on the memory-mapped dates."""
+    dates = store.dates
+    lo = 0 if start is None else int(np.searchsorted(dates, pd.Timestamp(start).to_datetime64(), side="left"))
+    hi = len(dates) if end is None else int(np.searchsorted(dates, pd.Timestamp(end).to_datetime64(), side="right"))
+    return slice(lo, max(lo, hi))
+
+
+def iter_chunks(store: PriceStore, t1: str, t2: str, bars: slice, chunk_bars: int = STREAM_CHUNK_BARS):
+    """
+    (offset, dates, s1, s2) blocks of at most chunk_bars rows. Each ticker
+    is one contiguous row of the store, so a block is two positioned reads
+    and nothing outside the current block is held in memory.
+    """
+    for lo in range(bars.start, bars.stop, chunk_bars):
+        hi = min(lo + chunk_bars, bars.stop)
+        yield (
+            lo - bars.start,
+            store.read_dates(lo, hi),
+            store.read(t1, lo, hi).astype(float, copy=False),
+            store.read(t2, lo, hi).astype(float, copy=False),
+        )
+
+
+def streaming_static_beta(store: PriceStore, t1: str, t2: str, bars: slice, chunk_bars: int = STREAM_CHUNK_BARS) -> float:
+    """
+    OLS slope of t1 on t2 over the range in one chunked pass, merging
+    per-chunk means and co-moments (Chan et al.), so it agrees with
+    np.polyfit on the full columns to rounding.
+    """
+    n, mx, my, sxx, sxy = 0, 0.0, 0.0, 0.0, 0.0
+    for _, _, y, x in iter_chunks(store, t1, t2, bars, chunk_bars):
+        m = len(x)
+        cx, cy = x.mean(), y.mean()
+        dx, dy = x - cx, y - cy
+        total = n + m
+        ddx, ddy = cx - mx, cy - my
+        sxx += dx @ dx + ddx * ddx * n * m / total
+        sxy += dx @ dy + ddx * ddy * n * m / total
+        mx += ddx * m / total
+        my += ddy * m / total
+        n = total
+    return float(sxy / sxx) if sxx > 0 else np.nan
+
+
+# -----------------------------
+# CARRIED STATE
+# -----------------------------
+@dataclass
+class _OpenTrade:
+    side: int
+    entry: int  # bar offset from the start of the range
+    entry_date: object
+    entry_z: float
+    pnl: float = 0.0  # strategy returns summed over the chunks seen so far
+
+
+@dataclass
+class _StreamState:
+    prev_s1: float = np.nan
+    prev_s2: float = np.nan
+    spread_tail: np.ndarray = field(default_factory=lambda: np.empty(0))
+    hedge_tail: tuple = (np.empty(0), np.empty(0))
+    kalman: dict = field(default_factory=dict)
+    open_trade: Optional[_OpenTrade] = None
+    equity: float = 1.0
+    peak: float = -np.inf
+    max_dd: float = np.inf
+    # finite strategy returns: count / mean / sum of squared deviations
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+    last_beta: float = np.nan
+
+
+def _walk_chunk(z: np.ndarray, entry_z: float, exit_z: float, open_trade, first: bool):
+    """
+    walk_events for one chunk, starting from the carried position. From
+    flat the first chunk never trades on bar 0, later chunks may; an open
+    trade exits at its first exit bar in the chunk. Legs are
+    (side, entry or None if carried in, exit or None if still open).
+    """
+    n = len(z)
+    entry_idx, next_entry, sides = entry_table(z, entry_z)
+    exit_idx, next_exit = exit_table(z, exit_z)
+
+    legs = []
+    cursor = 0 if first else -1  # events must come strictly after the cursor bar
+    if open_trade is not None:
+        x = exit_idx[0]
+        legs.append((open_trade.side, None, x))
+        if x is None:
+            return legs
+        cursor = x
+
+    k = (next_entry[cursor] if cursor >= 0 else 0) if n else 0
+    while k < len(sides):
+        e = entry_idx[k]
+        x = exit_idx[next_exit[e]]
+        legs.append((sides[k], e, x))
+        if x is None:
+            break
+        k = next_entry[x]
+    return legs
+
+
+def _positions(n: int, legs) -> np.ndarray:
+    delta = np.zeros(n + 1, dtype=np.int8)
+    for side, e, x in legs:
+        delta[0 if e is None else e] += side
+        delta[n if x is None else x] -= side
+    return np.cumsum(delta[:n], dtype=np.int8)
+
+
+# -----------------------------
+# ENGINE
+# -----------------------------
+def stream_pair_backtest(
+    store: PriceStore,
+    t1: str,
+    t2: str,
+    start=None,
+    end=None,
+    lookback: int = 60,
+    entry_z: float = 2.0,
+    exit_z: float = 0.5,
+    hedge_method: str = "static",
+    hedge_window: int = HEDGE_WINDOW,
+    annual_days: int = ANNUAL_TRADING_DAYS,
+    chunk_bars: int = STREAM_CHUNK_BARS,
+    on_chunk: Callable[[pd.DataFrame], None] = None,
+) -> StreamedBacktest:
+    """
+    run_pair_backtest over t1 / t2 read from the store in chunks of
+    chunk_bars, so peak memory depends on the chunk size, not the history.
+
+    Carried across chunk boundaries: the last lookback - 1 spreads (rolling
+    z-score), the last hedge_window bars (rolling OLS) or the filter state
+    (Kalman), the previous prices (returns), the open position and its
+    running P&L, and running equity / drawdown / return moments. Static
+    beta takes one extra chunked pass first.
+
+    Positions and trades are those of the in-memory engine, and the Kalman
+    hedge is bit-identical. Rolling means / sums restart at each chunk and
+    the static beta and Sharpe moments are merged per chunk, so z-scores,
+    P&L and metrics agree to rounding (~1e-12; ~1e-9 on z with rolling OLS).
+
+    on_chunk receives each chunk's per-bar results (the results_frame
+    columns) to write out; only metrics and trades are kept in memory.
+    """
+    if hedge_method not in HEDGE_METHODS:
+        raise ValueError(f"Unknown hedge_method '{hedge_method}'. Use one of {', '.join(HEDGE_METHODS)}.")
+    for t in (t1, t2):
+        if t not in store:
+            raise ValueError(f"Ticker {t} not in price store.")
+
+    bars = bar_range(store, start, end)
+    n_bars = bars.stop - bars.start
+    warmup = lookback + (hedge_window if hedge_method == "rolling_ols" else 0)
+    if n_bars < warmup + 10:
+        raise ValueError("Not enough data for this date range and lookback.")
+
+    static = None
+    if hedge_method == "static":
+        static = streaming_static_beta(store, t1, t2, bars, chunk_bars)
+
+    st = _StreamState()
+    trades: List[Trade] = []
+    chunks = 0
+    for offset, dates, s1, s2 in iter_chunks(store, t1, t2, bars, chunk_bars):
+        first = offset == 0
+        n = len(s1)
+        chunks += 1
+
+        # hedge ratio
+        if hedge_method == "static":
+            beta = static
+        elif hedge_method == "rolling_ols":
+            tail1, tail2 = st.hedge_tail
+            y = np.concatenate([tail1, s1])
+            x = np.concatenate([tail2, s2])
+            beta = rolling_ols_beta(y, x, hedge_window)[len(tail1):]
+            st.hedge_tail = (y[-hedge_window:], x[-hedge_window:])
+        else:
+            beta = kalman_beta(s1, s2, state=st.kalman)
+        if np.ndim(beta):
+            finite = beta[np.isfinite(beta)]
+            if len(finite):
+                st.last_beta = float(finite[-1])
+        else:
+            st.last_beta = beta
+
+        # spread and rolling z-score, continued from the previous chunk's tail
+        spread = s1 - beta * s2
+        padded = np.concatenate([st.spread_tail, spread])
+        z = rolling_zscore(pd.Series(padded), lookback).to_numpy(dtype=float)[len(st.spread_tail):]
+        st.spread_tail = padded[-(lookback - 1):] if lookback > 1 else np.empty(0)
+
+        # bar returns against the previous chunk's last prices
+        ret1 = s1 / np.concatenate([[st.prev_s1], s1[:-1]]) - 1
+        ret2 = s2 / np.concatenate([[st.prev_s2], s2[:-1]]) - 1
+        st.prev_s1, st.prev_s2 = s1[-1], s2[-1]
+
+        # positions from the carried state
+        legs = _walk_chunk(z, entry_z, exit_z, st.open_trade, first)
+        pos = _positions(n, legs)
+        strat = strategy_returns(pos, ret1, ret2, beta, first_bar=first)
+
+        for side, e, x in legs:
+            if e is None:
+                trade = st.open_trade
+                trade.pnl += float(np.nansum(strat[:n if x is None else x]))
+            else:
+                trade = _OpenTrade(side, offset + e, dates[e], float(z[e]))
+                trade.pnl = float(np.nansum(strat[e:n if x is None else x]))
+            if x is None:
+                st.open_trade = trade
+                continue
+            st.open_trade = None
+            trades.append(
+                Trade(
+                    direction="long_spread" if trade.side == 1 else "short_spread",
+                    entry_date=pd.Timestamp(trade.entry_date),
+                    exit_date=pd.Timestamp(dates[x]),
+                    entry_z=trade.entry_z,
+                    exit_z=float(z[x]),
+                    pnl=trade.pnl,
+                    return_pct=trade.pnl,
+                    bars_held=offset + x - trade.entry,
+                )
+            )
+
+        # equity and drawdown continue the running product / peak exactly
+        growth = 1 + np.nan_to_num(strat, nan=0.0, posinf=np.inf, neginf=-np.inf)
+        equity = np.cumprod(np.concatenate([[st.equity], growth]))[1:]
+        peak = np.maximum.accumulate(np.concatenate([[st.peak], equity]))[1:]
+        st.equity, st.peak = equity[-1], peak[-1]
+        st.max_dd = min(st.max_dd, float(np.min(equity / peak - 1.0)))
+
+        # merge this chunk's return moments into the running ones
+        clean = strat[np.isfinite(strat)]
+        if len(clean):
+            m = len(clean)
+            cmean = clean.mean()
+            total = st.count + m
+            delta = cmean - st.mean
+            st.m2 += ((clean - cmean) ** 2).sum() + delta * delta * st.count * m / total
+            st.mean += delta * m / total
+            st.count = total
+
+        if on_chunk is not None:
+            frame = pd.DataFrame(
+                {
+                    "equity": equity,
+                    "strategy_return": strat,
+                    "position": pos.astype(np.int64),
+                    "spread": spread,
+                    "zscore": z,
+                },
+                index=pd.DatetimeIndex(dates, name=store.meta["index_name"]),
+            )
+            if np.ndim(beta):
+                frame["hedge_ratio"] = beta
+            on_chunk(frame)
+
+    return StreamedBacktest(
+        trades=trades,
+        stats=_stats(st, trades, annual_days),
+        beta=st.last_beta,
+        bars=n_bars,
+        chunks=chunks,
+    )
+
+
+def _stats(st: _StreamState, trades: List[Trade], annual_days: int) -> dict:
+    """compute_stats from the running accumulators."""
+    if st.count > 1:
+        vol = np.sqrt(st.m2 / (st.count - 1))
+        sharpe = np.sqrt(annual_days) * st.mean / vol if vol != 0 else np.nan
+        cum_return = st.equity - 1.0
+        ann_return = (1 + cum_return) ** (annual_days / st.count) - 1
+        max_dd = st.max_dd
+    else:
+        sharpe = np.nan
+        cum_return = 0.0
+        ann_return = np.nan
+        max_dd = np.nan
+
+    if trades:
+        win_rate = sum(1 for t in trades if t.return_pct > 0) / len(trades)
+        avg_bars = np.mean([t.bars_held for t in trades])
+    else:
+        win_rate = np.nan
+        avg_bars = np.nan
+
+    return {
+        "cumulative_return": cum_return,
+        "annualized_return": ann_return,
+        "sharpe_ratio": sharpe,
+        "max_drawdown": max_dd,
+        "num_trades": len(trades),
+        "win_rate": win_rate,
+        "avg_bars_held": avg_bars,
+    }
+
+
+# -----------------------------
+# CLI
+# -----------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Chunked, out-of-core pair backtest over the price store")
+    parser.add_argument("ticker1")
+    parser.add_argument("ticker2")
+    parser.add_argument("--start", default=None)
+    parser.add_argument("--end", default=None)
+    parser.add_argument("--lookback", type=int, default=60)
+    parser.add_argument("--entry-z", type=float, default=2.0)
+    parser.add_argument("--exit-z", type=float, default=0.5)
+    parser.add_argument("--hedge-method", choices=HEDGE_METHODS, default="static")
+    parser.add_argument("--hedge-window", type=int, default=HEDGE_WINDOW)
+    parser.add_argument("--annual-bars", type=int, default=ANNUAL_TRADING_DAYS,
+                        help="bars per year for annualizing (252 daily, ~98280 for 1-minute US equities)")
+    parser.add_argument("--chunk-bars", type=int, default=STREAM_CHUNK_BARS)
+    parser.add_argument("--store", default=STORE_DIR)
+    parser.add_argument("--out", default=None, help="append per-bar results to this CSV, chunk by chunk")
+    args = parser.parse_args()
+
+    store = PriceStore(args.store) if os.path.exists(os.path.join(args.store, "meta.json")) else open_store(PRICES_CSV, args.store)
+
+    on_chunk = None
+    if args.out:
+        if os.path.exists(args.out):
+            os.remove(args.out)
+
+        def on_chunk(frame):
+            frame.to_csv(args.out, mode="a", header=not os.path.exists(args.out))
+
+    result = stream_pair_backtest(
+        store,
+        args.ticker1,
+        args.ticker2,
+        start=args.start,
+        end=args.end,
+        lookback=args.lookback,
+        entry_z=args.entry_z,
+        exit_z=args.exit_z,
+        hedge_method=args.hedge_method,
+        hedge_window=args.hedge_window,
+        annual_days=args.annual_bars,
+        chunk_bars=args.chunk_bars,
+        on_chunk=on_chunk,
+    )
+    print(f"[+] {result.bars} bars in {result.chunks} chunk(s), beta {result.beta:.4f}")
+    for key, value in result.stats.items():
+        print(f"    {key}: {value}")
+    if args.out:
+        print(f"[+] Per-bar results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+run_pair_backtest against the bar-by-bar loop it replaced, on randomized
+price paths and parameters: same positions, returns, equity, trades and stats.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest_engine import ANNUAL_TRADING_DAYS, compute_stats, run_pair_backtest
+
+
+def legacy_backtest(s1: pd.Series, s2: pd.Series, beta: float, lookback: int, entry_z: float, exit_z: float):
+    """The original backtest_stat_arb loop, kept as the reference implementation."""
+    spread = s1 - beta * s2
+    zscore = (spread - spread.rolling(lookback).mean()) / spread.rolling(lookback).std()
+    ret1 = s1.pct_change()
+    ret2 = s2.pct_change()
+
+    pos = 0
+    pos_history, strat_ret, trades = [], [], []
+    current_trade_index = trade_entry_z = trade_entry_date = None
+    dates = s1.index
+
+    for i in range(len(dates)):
+        date = dates[i]
+        if i == 0:
+            pos_history.append(0)
+            strat_ret.append(0.0)
+            continue
+
+        z = zscore.iloc[i]
+        prev_pos = pos
+        if not np.isnan(z):
+            if pos == 0:
+                if z > entry_z:
+                    pos = -1
+                    trade_entry_z, trade_entry_date, current_trade_index = float(z), date, len(strat_ret)
+                elif z < -entry_z:
+                    pos = 1
+                    trade_entry_z, trade_entry_date, current_trade_index = float(z), date, len(strat_ret)
+            elif abs(z) < exit_z:
+                trade_pnl = float(np.nansum(strat_ret[current_trade_index:]))
+                trades.append(
+                    {
+                        "direction": "long_spread" if prev_pos == 1 else "short_spread",
+                        "entry_date": trade_entry_date,
+                        "exit_date": date,
+                        "entry_z": trade_entry_z,
+                        "exit_z": float(z),
+                        "pnl": trade_pnl,
+                        "return_pct": trade_pnl,
+                        "bars_held": i - current_trade_index,
+                    }
+                )
+                pos = 0
+                current_trade_index = trade_entry_z = trade_entry_date = None
+
+        r1, r2 = ret1.iloc[i], ret2.iloc[i]
+        strat_ret.append(0.0 if np.isnan(r1) or np.isnan(r2) else float(pos * (r1 - beta * r2)))
+        pos_history.append(pos)
+
+    strat = pd.Series(strat_ret, index=dates)
+    equity = (1 + strat.fillna(0)).cumprod()
+    return np.array(pos_history), strat, equity, zscore, trades
+
+
+def random_pair(rng: np.random.Generator, n: int, gap: int):
+    """Two cointegrated random-walk prices; the first `gap` bars of s2 are missing."""
+    common = np.cumsum(rng.normal(0, 1, n))
+    noise = np.zeros(n)
+    for t in range(1, n):  # mean-reverting spread, so trades actually happen
+        noise[t] = 0.9 * noise[t - 1] + rng.normal(0, 1)
+    index = pd.bdate_range("2010-01-01", periods=n)
+    s2 = pd.Series(300 + common, index=index)
+    s1 = pd.Series(0.8 * s2.to_numpy() + 40 + noise + rng.uniform(-5, 5), index=index)
+    s2.iloc[:gap] = np.nan
+    return s1, s2
+
+
+@pytest.mark.parametrize("seed", range(12))
+def test_vectorized_engine_matches_legacy_loop(seed):
+    rng = np.random.default_rng(seed)
+    s1, s2 = random_pair(rng, int(rng.integers(300, 900)), int(rng.choice([0, 0, 25])))
+    lookback = int(rng.integers(5, 80))
+    entry_z = float(rng.uniform(1.0, 2.0))
+    exit_z = float(rng.uniform(0.0, 0.8))
+    valid = s2.notna().to_numpy()
+    beta = float(np.polyfit(s2.to_numpy()[valid], s1.to_numpy()[valid], 1)[0])
+
+    pos, strat, equity, zscore, trades = legacy_backtest(s1, s2, beta, lookback, entry_z, exit_z)
+    bt = run_pair_backtest(s1, s2, beta, lookback, entry_z, exit_z, ANNUAL_TRADING_DAYS)
+
+    assert trades, "the random path should produce trades"
+    np.testing.assert_array_equal(bt.position.to_numpy(), pos)
+    np.testing.assert_allclose(bt.zscore.to_numpy(), zscore.to_numpy(), rtol=1e-12, equal_nan=True)
+    np.testing.assert_allclose(bt.strategy_return.to_numpy(), strat.to_numpy(), rtol=1e-12, atol=1e-15)
+    np.testing.assert_allclose(bt.equity.to_numpy(), equity.to_numpy(), rtol=1e-12)
+
+    got = [t.__dict__ for t in bt.trades]
+    assert [(t["direction"], t["entry_date"], t["exit_date"], t["bars_held"]) for t in got] == [
+        (t["direction"], t["entry_date"], t["exit_date"], t["bars_held"]) for t in trades
+    ]
+    for key in ("entry_z", "exit_z", "pnl", "return_pct"):
+        np.testing.assert_allclose([t[key] for t in got], [t[key] for t in trades], rtol=1e-12, atol=1e-15)
+
+    expected = compute_stats(strat, equity, bt.trades, ANNUAL_TRADING_DAYS)
+    for key, value in expected.items():
+        np.testing.assert_allclose(bt.stats[key], value, rtol=1e-12, equal_nan=True)
@@ -0,0 +1,81 @@
+"""
+incremental_refresh end to end, offline: a CSVPriceProvider serves a
+synthetic source file and the refresh runs in an empty working directory.
+"""
+import os
+
+import pandas as pd
+import pytest
+
+import data_refresh
+from benchmarks.synthetic import make_universe
+from data_providers import CSVPriceProvider
+from price_store import PriceStore
+
+
+def dates(prices: pd.DataFrame, k: int) -> str:
+    return prices.index[k].strftime("%Y-%m-%d")
+
+
+@pytest.fixture
+def source(tmp_path, monkeypatch):
+    prices = make_universe(6, 400, seed=5)
+    prices.index.name = "Date"
+    prices.to_csv(tmp_path / "source.csv")
+    monkeypatch.chdir(tmp_path)
+    return prices
+
+
+@pytest.fixture
+def scans(monkeypatch):
+    """The `pairs` argument of every scan_pairs call (None: all pairs)."""
+    calls = []
+    scan_pairs = data_refresh.scan_pairs
+
+    def recording_scan(prices, *args, pairs=None, **kwargs):
+        calls.append(None if pairs is None else sorted(pairs))
+        return scan_pairs(prices, *args, pairs=pairs, **kwargs)
+
+    monkeypatch.setattr(data_refresh, "scan_pairs", recording_scan)
+    return calls
+
+
+def stored(path: str = data_refresh.PRICES_CSV) -> pd.DataFrame:
+    return pd.read_csv(path, index_col=0, parse_dates=True)
+
+
+def test_incremental_refresh(source, scans):
+    provider = CSVPriceProvider("source.csv")
+    tickers = list(source.columns)
+    known, new = tickers[:-1], tickers[-1]
+    start = dates(source, 0)
+
+    # nothing stored: full download and full scan
+    prices, _ = data_refresh.incremental_refresh(provider, known, start, dates(source, 300))
+    assert len(prices) == 300
+    assert scans == [None]
+    pd.testing.assert_frame_equal(stored(), source.iloc[:300][known], check_freq=False)
+    assert os.path.exists(data_refresh.GOOD_PAIRS_CSV)
+
+    # same columns: only the new rows are fetched and appended; too few bars to rescan
+    end = dates(source, 310)
+    prices, result = data_refresh.incremental_refresh(provider, known, start, end)
+    assert len(prices) == 310 and result is not None
+    assert scans == [None]
+    pd.testing.assert_frame_equal(stored(), source.iloc[:310][known], check_freq=False)
+    assert PriceStore(data_refresh.STORE_DIR).frame().shape == (310, len(known))
+
+    # new ticker: full history for it, and only its pairs are tested
+    prices, _ = data_refresh.incremental_refresh(provider, tickers, start, end)
+    assert list(prices.columns) == tickers
+    assert scans[1:] == [sorted((t, new) for t in known)]
+    pd.testing.assert_frame_equal(stored(), source.iloc[:310], check_freq=False)
+    all_pairs = pd.read_csv(data_refresh.ALL_PAIRS_CSV)
+    assert len(all_pairs) == len(tickers) * (len(tickers) - 1) // 2
+
+    # nothing new: no writes, no scan
+    before = os.path.getmtime(data_refresh.PRICES_CSV)
+    prices, result = data_refresh.incremental_refresh(provider, tickers, start, end)
+    assert result is None
+    assert len(scans) == 2
+    assert os.path.getmtime(data_refresh.PRICES_CSV) == before
@@ -0,0 +1,22 @@
+"""
+downsample_indices keeps at most max_points sorted, distinct rows, first
+and last included, for every method and for the smallest budgets.
+"""
+import numpy as np
+import pytest
+
+from downsample import DOWNSAMPLE_METHODS, downsample_indices
+
+
+@pytest.mark.parametrize("method", DOWNSAMPLE_METHODS)
+@pytest.mark.parametrize("n", [1, 2, 3, 5, 10, 101, 1000])
+def test_at_most_max_points(method, n):
+    rng = np.random.default_rng(n)
+    y = np.cumsum(rng.normal(size=n))
+    if n > 10:
+        y[n // 3:n // 3 + 5] = np.nan
+    for m in list(range(2, 12)) + [50, 999, 1000, 5000]:
+        idx = downsample_indices(y, m, method)
+        assert len(idx) <= m
+        assert np.all(np.diff(idx) > 0)
+        assert idx[0] == 0 and idx[-1] == n - 1